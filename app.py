@@ -1,22 +1,37 @@
 import os
 import uuid
 import json
+import time
+import base64
+import hashlib
+import csv
+import zlib
+import zipfile
+import shutil
+import threading
 from datetime import datetime, date, timedelta
-from functools import wraps
+from functools import wraps, lru_cache
+from itertools import groupby
+from types import SimpleNamespace
+from concurrent.futures import as_completed
 from io import BytesIO
 
 from flask import (
     Flask, render_template, request, redirect, url_for, flash, jsonify,
-    session, abort, send_from_directory
+    session, abort, send_from_directory, Response, stream_with_context, g, has_request_context
 )
+from flask.json.tag import TaggedJSONSerializer
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf.csrf import CSRFProtect
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from markupsafe import Markup
 from dotenv import load_dotenv
 from flask import send_file
+import click
+from flask.cli import AppGroup
 
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.platypus import Image as RLImage, KeepTogether
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -31,6 +46,18 @@ from reportlab.graphics.barcode import createBarcodeDrawing
 from reportlab import rl_config
 from werkzeug.utils import secure_filename
 import pathlib
+import re
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+
+from search_index import TrigramIndex
+from seat_allocator import allocate_seats, grid_layout, parsed_layout, seat_bitmap, SEAT_CLASSES
+from receipt_cache import ReceiptCache, fingerprint
+from receipt_jobs import ReceiptJobs
+from docs_cache import DocsCache
+from user_cache import UserCache
+from session_store import ServerSideSessionInterface, store_from_url
 
 
 # load environment
@@ -55,6 +82,41 @@ STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')  # put secure pwd in .env
 
+# Admin live event stream (Server-Sent Events)
+# Each stream is held open for at most EVENT_STREAM_SECONDS and then closed so the
+# browser reconnects with Last-Event-ID; at most EVENT_STREAM_SLOTS streams run per
+# process so open admin tabs can never take every worker thread (see gunicorn.conf.py).
+EVENT_STREAM_SECONDS = int(os.getenv('EVENT_STREAM_SECONDS', 55))
+EVENT_POLL_INTERVAL = float(os.getenv('EVENT_POLL_INTERVAL', 2))
+EVENT_STREAM_SLOTS = int(os.getenv('EVENT_STREAM_SLOTS', 4))
+
+# Seat holds: /book reserves seats for BOOKING_HOLD_MINUTES while the customer picks
+# seats and pays (choosing seats restarts the clock). Expired holds stop counting
+# against capacity at once; `flask reap-holds` (run from cron) marks them expired.
+BOOKING_HOLD_MINUTES = int(os.getenv('BOOKING_HOLD_MINUTES', 15))
+# Bookings waiting on money the customer sends outside the site (Stripe, PayPal, a bank
+# transfer without a slip yet) keep their seats for PAYMENT_HOLD_HOURS instead.
+PAYMENT_HOLD_HOURS = int(os.getenv('PAYMENT_HOLD_HOURS', 48))
+HOLD_REAP_BATCH_SIZE = int(os.getenv('HOLD_REAP_BATCH_SIZE', 500))
+
+# Idempotency keys: a retried /book or /payment POST carrying the same key gets the
+# first response replayed for IDEMPOTENCY_TTL_SECONDS instead of writing again.
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 3600))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 5))
+
+# Logged-in users are cached per process for USER_CACHE_SECONDS (0 disables the cache),
+# at most USER_CACHE_SIZE of them. Profile and password changes bump the user's
+# session_version, which the session carries, so the changing session never sees a stale copy.
+USER_CACHE_SECONDS = int(os.getenv('USER_CACHE_SECONDS', 60))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 2048))
+
+# Sessions are stored server side; the cookie only carries an opaque id (see session_store.py).
+# Locally a SQLite file next to the app; in production point this at Redis
+# (redis://host:6379/0), or file:///path for one file per session. 'cookie' keeps
+# Flask's signed-cookie sessions. A session unused for SESSION_IDLE_SECONDS expires.
+SESSION_STORE_URL = os.getenv('SESSION_STORE_URL', 'sqlite:///' + os.path.join(os.path.dirname(__file__), 'sessions.db'))
+SESSION_IDLE_SECONDS = int(os.getenv('SESSION_IDLE_SECONDS', 24 * 3600))
+
 # Config file for persistent settings
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.json')
 
@@ -81,6 +143,10 @@ def save_config(config):
 # Load config
 config = load_config()
 FERRY_CAPACITY = config.get('ferry_capacity', int(os.getenv('FERRY_CAPACITY', 35)))
+# The 'standard' vessel layout: FERRY_CAPACITY seats, SEATS_PER_ROW to a row, numbered
+# row by row. Other layouts live under "vessel_layouts" in config.json (see vessel_layouts()).
+SEATS_PER_ROW = int(os.getenv('SEATS_PER_ROW', 7))
+DEFAULT_LAYOUT = 'standard'
 
 # -----------------------
 # Extensions
@@ -91,6 +157,15 @@ login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
+session_store = store_from_url(SESSION_STORE_URL)
+if session_store is not None:
+    app.session_interface = ServerSideSessionInterface(session_store, SESSION_IDLE_SECONDS)
+
+
+def rotate_session_id():
+    """Give the session a new id on login, so an id planted before login is worthless"""
+    if hasattr(session, 'regenerate'):
+        session.regenerate()
 
 
 # -----------------------
@@ -104,6 +179,8 @@ class User(UserMixin, db.Model):
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(30), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # bumped whenever the fields below change; invalidates cached copies (see load_user)
+    session_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationship to bookings
     bookings = db.relationship('FerryBooking', backref='user', lazy=True)
@@ -115,9 +192,43 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 
+user_cache = UserCache(USER_CACHE_SECONDS, USER_CACHE_SIZE)
+USER_VERSIONED_FIELDS = ('email', 'password_hash', 'name', 'phone')
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    """
+    Current user for Flask-Login. A cache hit needs no query: the cached detached
+    copy is merged into the request's session without loading it. A miss loads the
+    user, caches a copy and records its session_version in the session.
+    """
+    user_id = int(user_id)
+    cached = user_cache.get(user_id, session.get('user_version'))
+    if cached is not None:
+        return db.session.merge(cached, load=False)
+    user = db.session.get(User, user_id)
+    if user is None:
+        user_cache.discard(user_id)
+        return None
+    copy = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(copy)
+    user_cache.put(user_id, user.session_version, copy)
+    if session.get('user_version') != user.session_version:
+        session['user_version'] = user.session_version
+    return user
+
+
+@event.listens_for(User, 'before_update')
+def _bump_session_version(mapper, connection, target):
+    """Profile or password change: new session_version, and move the changing session onto it"""
+    state = db.inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in USER_VERSIONED_FIELDS):
+        return
+    target.session_version = (target.session_version or 0) + 1
+    user_cache.discard(target.id)
+    if has_request_context() and session.get('_user_id') == str(target.id):
+        session['user_version'] = target.session_version
 
 
 class FerryBooking(db.Model):
@@ -155,7 +266,36 @@ class FerryBooking(db.Model):
     return_time = db.Column(db.String(10), nullable=True)
     return_selected_seats = db.Column(db.String(200))  # Comma-separated seat numbers for return
 
+    # 'held' (created by /book, not paid yet), 'confirmed', 'expired' (hold ran out) or
+    # 'cancelled' (e.g. a weather-cancelled sailing); only confirmed bookings and live holds take seats
+    status = db.Column(db.String(20), nullable=False, default='confirmed', server_default='confirmed')
+    hold_expires_at = db.Column(db.DateTime, nullable=True)  # set while status == 'held'
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # maintained on every ORM or Core UPDATE; drives incremental exports
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # keyset pagination for the admin bookings list (newest first)
+        db.Index('ix_ferry_bookings_created_at_id', 'created_at', 'id'),
+        # a customer's booking history, newest first
+        db.Index('ix_ferry_bookings_user_created', 'user_id', 'created_at', 'id'),
+        # payment review queue, oldest first within each status
+        db.Index('ix_ferry_bookings_payment_queue', 'payment_status', 'created_at', 'id'),
+        # keyset scan for "changed since watermark" exports
+        db.Index('ix_ferry_bookings_updated_at_id', 'updated_at', 'id'),
+        # seat availability per sailing; `date` leads so it also matches the partition key
+        db.Index('ix_ferry_bookings_sailing', 'date', 'departure', 'destination', 'time'),
+        # expired-hold reaper
+        db.Index('ix_ferry_bookings_hold_expiry', 'status', 'hold_expires_at'),
+    )
+
+    @property
+    def hold_expired(self):
+        """True once an unpaid hold has run out (whether or not the reaper has seen it yet)"""
+        if self.status == 'expired':
+            return True
+        return self.status == 'held' and (self.hold_expires_at is None or self.hold_expires_at <= datetime.utcnow())
 
     def as_dict(self):
         return {
@@ -175,7 +315,10 @@ class FerryBooking(db.Model):
             'return_date': self.return_date.isoformat() if self.return_date else None,
             'return_time': self.return_time,
             'return_selected_seats': self.return_selected_seats,
-            'created_at': self.created_at.isoformat()
+            'status': self.status,
+            'hold_expires_at': self.hold_expires_at.isoformat() if self.hold_expires_at else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 
@@ -191,6 +334,7 @@ class Schedule(db.Model):
     time = db.Column(db.String(10), nullable=False)  # HH:MM
     # optional: note or active flag
     active = db.Column(db.Boolean, default=True)
+    layout = db.Column(db.String(50), nullable=True)  # vessel layout name; NULL = standard
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
@@ -205,7 +349,107 @@ class DailySchedule(db.Model):
     date = db.Column(db.Date, nullable=False, index=True)
     time = db.Column(db.String(10), nullable=False)
     active = db.Column(db.Boolean, default=True)
+    layout = db.Column(db.String(50), nullable=True)  # vessel layout name; NULL = standard
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class BookingEvent(db.Model):
+    """
+    Append-only log of booking activity (created, payment status changed, cancelled,
+    return leg cancelled, moved to another sailing, and a bookings_archived marker per
+    archived chunk).
+    Rows are added in the same transaction as the change they describe, so the
+    admin event stream only ever sees committed activity.
+    """
+    __tablename__ = 'booking_events'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)
+    booking_id = db.Column(db.Integer, nullable=True)  # no FK - archived bookings leave ferry_bookings
+    booking_reference = db.Column(db.String(20), nullable=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON document sent to the browser
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class FerryBookingArchive(db.Model):
+    """
+    Cold storage for old bookings moved out of ferry_bookings by `flask archive-bookings`.
+    Same columns (and ids) as FerryBooking so reports can still query archived history.
+    """
+    __tablename__ = 'ferry_bookings_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    booking_reference = db.Column(db.String(20), nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(100), nullable=False)
+    phone = db.Column(db.String(30), nullable=False)
+    departure = db.Column(db.String(100), nullable=False)
+    destination = db.Column(db.String(100), nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
+    time = db.Column(db.String(10), nullable=False)
+    seats = db.Column(db.Integer, nullable=False)
+    selected_seats = db.Column(db.String(200))
+    total_price = db.Column(db.Float, nullable=False)
+    payment_method = db.Column(db.String(50), nullable=True)
+    payment_status = db.Column(db.String(30), nullable=True)
+    payment_info = db.Column(db.String(300), nullable=True)
+    is_roundtrip = db.Column(db.Boolean, default=False)
+    return_date = db.Column(db.Date, nullable=True)
+    return_time = db.Column(db.String(10), nullable=True)
+    return_selected_seats = db.Column(db.String(200))
+    status = db.Column(db.String(20))
+    hold_expires_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class BookingReference(db.Model):
+    """
+    Every booking reference ever issued. Its primary key is what keeps references
+    unique: a partitioned ferry_bookings cannot have a UNIQUE index on
+    booking_reference (see `flask partitions init`). Rows outlive archived bookings.
+    """
+    __tablename__ = 'booking_references'
+    reference = db.Column(db.String(20), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IdempotencyKey(db.Model):
+    """
+    Outcome of a POST sent with an idempotency key, kept so a retry of the same
+    request can be answered from here. status_code is NULL while the first request
+    is still running.
+    """
+    __tablename__ = 'idempotency_keys'
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(100), nullable=False)  # endpoint + owner, e.g. 'book:user:12'
+    key = db.Column(db.String(64), nullable=False)
+    request_hash = db.Column(db.String(32), nullable=False)  # the same key may not be reused for another request
+    status_code = db.Column(db.Integer, nullable=True)
+    headers = db.Column(db.Text, nullable=True)  # JSON {name: value} of the headers worth replaying
+    body = db.Column(db.LargeBinary, nullable=True)
+    session_changes = db.Column(db.Text, nullable=True)  # session keys set/removed and messages flashed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key'),
+    )
+
+
+class ExportWatermark(db.Model):
+    """
+    Position of a downstream consumer (e.g. accounting) in the incremental
+    bookings export: the (updated_at, id) of the last row it was sent, plus the
+    (id, updated_at) of every row sent within the re-read overlap before it.
+    """
+    __tablename__ = 'export_watermarks'
+    id = db.Column(db.Integer, primary_key=True)
+    consumer = db.Column(db.String(50), unique=True, nullable=False)
+    last_updated_at = db.Column(db.DateTime, nullable=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    last_run_at = db.Column(db.DateTime, nullable=True)
+    recent_keys = db.Column(db.Text, nullable=True)  # JSON [[id, updated_at iso], ...]
 
 
 # -----------------------
@@ -301,58 +545,101 @@ def admin_required(fn):
     return wrapper
 
 
-def available_times_for_route(dep, dest, target_date: date):
+def active_booking_criteria():
+    """Bookings that still hold seats: confirmed ones and holds that have not expired"""
+    return [db.or_(
+        FerryBooking.status == 'confirmed',
+        db.and_(FerryBooking.status == 'held', FerryBooking.hold_expires_at > datetime.utcnow()),
+    )]
+
+
+def sailing_criteria(dep, dest, target_date: date, ttime=None):
+    """
+    Filter for active bookings on one sailing. Always pins FerryBooking.date, which is the
+    partition key on MySQL (see `flask partitions`), so these queries read one partition.
+    """
+    criteria = [
+        FerryBooking.date == target_date,
+        FerryBooking.departure == dep,
+        FerryBooking.destination == dest,
+        *active_booking_criteria(),
+    ]
+    if ttime is not None:
+        criteria.append(FerryBooking.time == ttime)
+    return criteria
+
+
+def booked_seats(dep, dest, target_date: date, ttime: str):
+    """Seats already booked on one sailing"""
+    return db.session.query(db.func.coalesce(db.func.sum(FerryBooking.seats), 0)).filter(
+        *sailing_criteria(dep, dest, target_date, ttime)
+    ).scalar() or 0
+
+
+def booked_seats_by_time(dep, dest, target_date: date):
+    """{time: seats booked} for every sailing of a route on one date, in a single query"""
+    rows = db.session.query(FerryBooking.time, db.func.sum(FerryBooking.seats)).filter(
+        *sailing_criteria(dep, dest, target_date)
+    ).group_by(FerryBooking.time).all()
+    return {t: int(booked or 0) for t, booked in rows}
+
+
+def scheduled_sailings(dep, dest, target_date: date):
     """
-    Return list of times (strings) for a route and date where seats are still available.
-    We look up Schedule entries first (active ones). If none exist, we use FALLBACK_ROUTE_TIMES.
-    Then filter out times where already booked seats >= FERRY_CAPACITY.
+    {time: layout name} for the sailings a route runs on a date, in time order: its
+    active date-specific schedules if there are any, otherwise the recurring schedule
+    (or FALLBACK_ROUTE_TIMES). An inactive date-specific entry cancels that sailing
+    (see cancel_sailing) even when the time comes from the recurring schedule.
     """
     key = (dep, dest)
-    # First check for any date-specific schedules
-    daily = DailySchedule.query.filter_by(departure=dep, destination=dest, date=target_date, active=True).order_by(DailySchedule.time).all()
-    if daily:
-        times = [d.time for d in daily]
+    daily = DailySchedule.query.filter_by(departure=dep, destination=dest, date=target_date).order_by(DailySchedule.time).all()
+    active = [d for d in daily if d.active]
+    if active:
+        times = {d.time: d.layout for d in active}
     else:
         # query recurring schedule
         schedules = Schedule.query.filter_by(departure=dep, destination=dest, active=True).order_by(Schedule.time).all()
         if schedules:
-            times = [s.time for s in schedules]
+            times = {s.time: s.layout for s in schedules}
         else:
-            times = FALLBACK_ROUTE_TIMES.get(key, [])
+            times = {t: None for t in FALLBACK_ROUTE_TIMES.get(key, [])}
+    cancelled = {d.time for d in daily if not d.active} - {d.time for d in active}
+    return {t: layout for t, layout in times.items() if t not in cancelled}
 
-    # filter by seat availability for the specific date/time
-    available = []
-    for t in times:
-        booked = db.session.query(db.func.coalesce(db.func.sum(FerryBooking.seats), 0)).filter(
-            FerryBooking.departure == dep,
-            FerryBooking.destination == dest,
-            FerryBooking.date == target_date,
-            FerryBooking.time == t
-        ).scalar() or 0
 
-        if booked < FERRY_CAPACITY:
-            available.append(t)
-    return available
+def sailing_cancelled(dep, dest, target_date: date, ttime: str):
+    """True when the sailing has been called off for that date (an inactive DailySchedule entry only)"""
+    rows = db.session.query(DailySchedule.active).filter_by(
+        departure=dep, destination=dest, date=target_date, time=ttime
+    ).all()
+    return bool(rows) and not any(active for active, in rows)
 
 
-def seats_left(dep, dest, target_date: date, ttime: str):
-    booked = db.session.query(db.func.coalesce(db.func.sum(FerryBooking.seats), 0)).filter(
-        FerryBooking.departure == dep,
-        FerryBooking.destination == dest,
-        FerryBooking.date == target_date,
-        FerryBooking.time == ttime
-    ).scalar() or 0
-    return max(0, FERRY_CAPACITY - booked)
+def available_times_for_route(dep, dest, target_date: date):
+    """
+    Return list of times (strings) for a route and date where seats are still available:
+    the scheduled sailings (see scheduled_sailings), less those that are full for the
+    vessel layout assigned to them.
+    """
+    layouts = scheduled_sailings(dep, dest, target_date)
+    times = list(layouts)
+
+    # filter by seat availability for the specific date/time
+    booked = booked_seats_by_time(dep, dest, target_date)
+    return [t for t in times if booked.get(t, 0) < layout_named(layouts.get(t)).capacity]
+
+
+def seats_left(dep, dest, target_date: date, ttime: str, capacity=None):
+    if capacity is None:
+        capacity = sailing_layout(dep, dest, target_date, ttime).capacity
+    return max(0, capacity - booked_seats(dep, dest, target_date, ttime))
 
 
 def get_taken_seats(dep, dest, date, time):
     """Get all seats that are already taken for this trip"""
     taken_seats = set()
-    bookings = FerryBooking.query.filter_by(
-        departure=dep,
-        destination=dest,
-        date=date,
-        time=time
+    bookings = db.session.query(FerryBooking.selected_seats).filter(
+        *sailing_criteria(dep, dest, date, time)
     ).all()
     
     for booking in bookings:
@@ -367,11 +654,14 @@ def get_taken_seats(dep, dest, date, time):
 def get_taken_seats_return(dep, dest, date, time):
     """Get all seats that are already taken for return trip"""
     taken_seats = set()
-    bookings = FerryBooking.query.filter_by(
-        departure=dep,
-        destination=dest,
-        return_date=date,
-        return_time=time
+    bookings = db.session.query(FerryBooking.return_selected_seats).filter(
+        # outbound leg is never after the return leg - lets MySQL skip future partitions
+        FerryBooking.date <= date,
+        FerryBooking.departure == dep,
+        FerryBooking.destination == dest,
+        FerryBooking.return_date == date,
+        FerryBooking.return_time == time,
+        *active_booking_criteria()
     ).all()
     
     for booking in bookings:
@@ -383,12 +673,520 @@ def get_taken_seats_return(dep, dest, date, time):
     return taken_seats
 
 
+def vessel_layouts():
+    """
+    Every vessel layout by name: 'standard' (built from FERRY_CAPACITY) plus those
+    defined in config.json, written as text rows (see seat_allocator):
+        "vessel_layouts": {"catamaran-24": {"label": "Catamaran", "rows": ["PP_PP", "SS_SS", ...]}}
+    """
+    layouts = {DEFAULT_LAYOUT: grid_layout(FERRY_CAPACITY, SEATS_PER_ROW, name=DEFAULT_LAYOUT,
+                                           label=f'Standard ({FERRY_CAPACITY} seats)')}
+    for name, spec in config.get('vessel_layouts', {}).items():
+        try:
+            layouts[name] = parsed_layout(tuple(spec['rows']), name, spec.get('label'))
+        except (KeyError, TypeError, ValueError) as e:
+            app.logger.warning('Ignoring vessel layout %r: %s', name, e)
+    return layouts
+
+
+def layout_named(name):
+    """The named layout, or the standard one for NULL / unknown names"""
+    layouts = vessel_layouts()
+    return layouts.get(name) or layouts[DEFAULT_LAYOUT]
+
+
+def seat_layout():
+    return layout_named(DEFAULT_LAYOUT)
+
+
+def sailing_layout(dep, dest, target_date: date, ttime: str):
+    """
+    Vessel layout for one sailing: the active date-specific schedule's if there is one,
+    otherwise the recurring schedule's, otherwise standard.
+    """
+    daily = db.session.query(DailySchedule.layout).filter_by(
+        departure=dep, destination=dest, date=target_date, time=ttime, active=True
+    ).first()
+    if daily is None:
+        daily = db.session.query(Schedule.layout).filter_by(
+            departure=dep, destination=dest, time=ttime, active=True
+        ).first()
+    return layout_named(daily.layout if daily else None)
+
+
+def assign_seats(taken, count, layout=None):
+    """Best available `count` seats on a sailing, kept together where possible, or None if too few are left"""
+    return allocate_seats(layout or seat_layout(), taken, count)
+
+
+@lru_cache(maxsize=32)
+def seat_map_markup(layout):
+    """
+    Seat grid HTML for a layout, rendered once per layout and process. Every seat is
+    drawn free; pages mark the taken ones from seat_bitmap() in the browser.
+    """
+    return Markup(app.jinja_env.get_template('_seat_map.html').render(layout=layout, seat_classes=SEAT_CLASSES))
+
+
+def new_booking_references(count=1):
+    """
+    `count` fresh 8-character booking references, claimed in booking_references
+    within the caller's transaction (a rollback releases them). A batch that hits an
+    existing reference is rolled back to its savepoint and drawn again.
+    """
+    while True:
+        refs = list({uuid.uuid4().hex[:8].upper() for _ in range(count)})
+        if len(refs) < count:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(BookingReference.__table__.insert(),
+                                   [{'reference': ref, 'created_at': datetime.utcnow()} for ref in refs])
+        except IntegrityError:
+            continue
+        return refs
+
+
+def backfill_booking_references():
+    """Claim the references of existing live and archived bookings; returns how many were added"""
+    added = 0
+    for table in (FerryBooking.__table__, FerryBookingArchive.__table__):
+        missing = db.select(table.c.booking_reference, db.func.min(table.c.created_at)).where(
+            ~db.exists().where(BookingReference.reference == table.c.booking_reference)
+        ).group_by(table.c.booking_reference)
+        added += db.session.execute(
+            BookingReference.__table__.insert().from_select(['reference', 'created_at'], missing)
+        ).rowcount
+    db.session.commit()
+    return added
+
+
+def booking_event_values(kind, booking, previous_status=None):
+    """
+    Column values for a BookingEvent row describing `booking` (a FerryBooking or a
+    projected row with the same attribute names).
+    `kind` is one of 'booking_created', 'payment_status_changed', 'booking_cancelled',
+    'return_leg_cancelled', 'booking_moved' (only the first and third move the counters).
+    The payload is kept for days and sent to every admin dashboard, so it carries no
+    contact or payment details - only what the activity feed and counters show.
+    """
+    today = datetime.utcnow().date()
+    created = booking.created_at or datetime.utcnow()
+    price = float(booking.total_price or 0)
+
+    # counter deltas mirror the aggregates computed in admin_dashboard
+    deltas = {}
+    if kind in ('booking_created', 'booking_cancelled'):
+        sign = 1 if kind == 'booking_created' else -1
+        deltas['total_bookings'] = sign
+        deltas['total_revenue'] = sign * price
+        if booking.date and booking.date >= today:
+            deltas['upcoming'] = sign
+        if created.date() == today:
+            deltas['daily_revenue'] = sign * price
+        if (created.year, created.month) == (today.year, today.month):
+            deltas['monthly_revenue'] = sign * price
+
+    payload = {
+        'kind': kind,
+        'id': booking.id,
+        'booking_reference': booking.booking_reference,
+        'departure': booking.departure,
+        'destination': booking.destination,
+        'date': booking.date.isoformat() if booking.date else None,
+        'time': booking.time,
+        'seats': booking.seats,
+        'total_price': price,
+        'payment_status': booking.payment_status,
+        'previous_payment_status': previous_status,
+        'deltas': deltas,
+    }
+    return {
+        'kind': kind,
+        'booking_id': booking.id,
+        'booking_reference': booking.booking_reference,
+        'payload': json.dumps(payload),
+        'created_at': datetime.utcnow(),
+    }
+
+
+def booking_event_columns():
+    """Projection with every attribute booking_event_values reads"""
+    return [
+        FerryBooking.id, FerryBooking.booking_reference,
+        FerryBooking.departure, FerryBooking.destination, FerryBooking.date, FerryBooking.time,
+        FerryBooking.seats, FerryBooking.total_price, FerryBooking.payment_status, FerryBooking.created_at
+    ]
+
+
+def record_booking_event(kind, booking):
+    """
+    Queue a BookingEvent for `booking` on the current session.
+    The caller commits; the event becomes visible to the admin stream only then.
+    """
+    history = db.inspect(booking).attrs.payment_status.history
+    previous = history.deleted[0] if history.deleted else booking.payment_status
+    db.session.add(BookingEvent(**booking_event_values(kind, booking, previous)))
+
+
+def reap_expired_holds(batch_size=HOLD_REAP_BATCH_SIZE, now=None, progress=None):
+    """
+    Mark holds that expired before `now` as 'expired', one short transaction per
+    batch: a single UPDATE by id plus one batched INSERT of booking_cancelled events
+    (so the dashboard counters drop). Rows locked by a payment in flight are skipped
+    and picked up next run. `progress(released_so_far)` is called after every batch.
+    Returns the number of holds released.
+    """
+    now = now or datetime.utcnow()
+    released = 0
+    while True:
+        rows = db.session.query(*booking_event_columns()).filter(
+            FerryBooking.status == 'held',
+            FerryBooking.hold_expires_at <= now,
+        ).order_by(FerryBooking.hold_expires_at, FerryBooking.id).limit(batch_size) \
+            .with_for_update(skip_locked=True).all()
+        if not rows:
+            db.session.commit()
+            return released
+        db.session.execute(
+            db.update(FerryBooking).where(FerryBooking.id.in_([r.id for r in rows]), FerryBooking.status == 'held')
+            .values(status='expired').execution_options(synchronize_session=False)
+        )
+        db.session.execute(BookingEvent.__table__.insert(), [
+            booking_event_values('booking_cancelled', r, r.payment_status) for r in rows
+        ])
+        db.session.commit()
+        released += len(rows)
+        if progress:
+            progress(released)
+
+
+def bookings_archived_event(count):
+    """
+    BookingEvent values for a bulk archive of `count` bookings. Archiving writes one
+    of these per chunk instead of an event per booking; the search index resyncs on it.
+    """
+    return {
+        'kind': 'bookings_archived',
+        'booking_id': None,
+        'booking_reference': None,
+        'payload': json.dumps({'kind': 'bookings_archived', 'count': count, 'deltas': {}}),
+        'created_at': datetime.utcnow(),
+    }
+
+
+ARCHIVE_CHUNK_SIZE = 1000
+ARCHIVE_REQUEST_CHUNKS = 20  # cap for the settings page so the request stays short
+
+
+def archive_old_bookings(cutoff, chunk_size=ARCHIVE_CHUNK_SIZE, max_chunks=None, progress=None):
+    """
+    Move bookings whose travel is over - the sailing, and the return sailing of a
+    round trip, dated before `cutoff` - into ferry_bookings_archive. The cutoff is
+    never later than today and live seat holds are never archived, so upcoming
+    sailings stay in the live table whenever the booking was made.
+    Each chunk is one short transaction: INSERT ... SELECT into the archive, then
+    DELETE by id, so locks are held briefly and memory stays flat.
+    `progress(moved_so_far)` is called after every chunk. Returns (moved, finished).
+    """
+    columns = [c.name for c in FerryBookingArchive.__table__.columns if c.name in FerryBooking.__table__.c]
+    source = FerryBooking.__table__
+    cutoff_date = min(cutoff.date() if isinstance(cutoff, datetime) else cutoff, datetime.utcnow().date())
+    moved = 0
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        ids = [row.id for row in db.session.query(FerryBooking.id).filter(
+            FerryBooking.date < cutoff_date,
+            db.or_(FerryBooking.return_date.is_(None), FerryBooking.return_date < cutoff_date),
+            db.or_(FerryBooking.status != 'held', FerryBooking.hold_expires_at <= datetime.utcnow()),
+        ).order_by(FerryBooking.id).limit(chunk_size)]
+        if not ids:
+            return moved, True
+
+        select_rows = db.select(*[source.c[name] for name in columns]).where(source.c.id.in_(ids))
+        db.session.execute(FerryBookingArchive.__table__.insert().from_select(columns, select_rows))
+        db.session.execute(source.delete().where(source.c.id.in_(ids)))
+        db.session.execute(BookingEvent.__table__.insert(), [bookings_archived_event(len(ids))])
+        db.session.commit()
+
+        moved += len(ids)
+        chunks += 1
+        if progress:
+            progress(moved)
+    return moved, False
+
+
+# -----------------------
+# Idempotency keys
+# -----------------------
+# Forms carry a hidden `idempotency_key` (see the idempotency_key() template global);
+# API clients send an Idempotency-Key header. The first request claims the key with
+# a row insert (the unique index settles races); later requests with the same key
+# wait for it to finish and get its response replayed, flashes and session changes
+# included, without running the view again. A request that wrote nothing (e.g. a
+# validation error) releases its key, so correcting the form and resending works.
+IDEMPOTENCY_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_\-]{8,64}$')
+IDEMPOTENCY_REPLAY_HEADERS = ('Location', 'Content-Type', 'Content-Disposition')
+# session keys owned by Flask-Login / CSRF / flashing - never replayed
+IDEMPOTENCY_SESSION_SKIP = ('_', 'csrf_token')
+
+_session_serializer = TaggedJSONSerializer()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _count_commits(db_session):
+    if has_request_context():
+        g.db_commits = g.get('db_commits', 0) + 1
+
+
+@app.template_global()
+def idempotency_key():
+    """Fresh key for a form that must not be processed twice"""
+    return uuid.uuid4().hex
+
+
+def request_fingerprint():
+    """Hash of what was submitted (form fields and uploaded file names)"""
+    form = sorted((k, v) for k, v in request.form.items(multi=True) if k not in ('csrf_token', 'idempotency_key'))
+    files = sorted((k, f.filename) for k, f in request.files.items(multi=True))
+    body = request.get_data(cache=True) if not (form or files) else b''
+    return fingerprint({'form': form, 'files': files, 'body': hashlib.sha256(body).hexdigest()})
+
+
+def claim_idempotency_key(scope, key, request_hash):
+    """
+    Insert the pending row for (scope, key). Returns (row, True) when this request owns
+    the key, or (existing row, False) when another request got there first.
+    """
+    for _ in range(2):
+        record = IdempotencyKey(scope=scope, key=key, request_hash=request_hash,
+                                expires_at=datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS))
+        db.session.add(record)
+        try:
+            db.session.commit()
+            return record, True
+        except IntegrityError:
+            db.session.rollback()
+        existing = IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+        if existing is None:
+            continue
+        if existing.expires_at > datetime.utcnow():
+            return existing, False
+        # an expired key is free again
+        db.session.delete(existing)
+        db.session.commit()
+    abort(409)
+
+
+def session_changes(before, flashes_before):
+    """Session keys the view set or removed, and the messages it flashed"""
+    keys = [k for k in set(before) | set(session.keys()) if not k.startswith(IDEMPOTENCY_SESSION_SKIP)]
+    changes = {
+        'set': {k: session[k] for k in keys if k in session and before.get(k) != session[k]},
+        'removed': [k for k in keys if k in before and k not in session],
+        'flashes': session.get('_flashes', [])[flashes_before:],
+    }
+    return _session_serializer.dumps(changes)
+
+
+def replay_idempotent_response(record, request_hash):
+    """Answer a repeated request from the stored outcome of the first one"""
+    if record.request_hash != request_hash:
+        return jsonify({'error': 'This idempotency key was already used for a different request.'}), 422
+
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while record.status_code is None and time.monotonic() < deadline:
+        time.sleep(0.2)
+        db.session.expire(record)
+        record = db.session.get(IdempotencyKey, record.id)
+        if record is None:
+            # the first request failed and released the key
+            return jsonify({'error': 'The original request failed; please try again.'}), 409
+    if record.status_code is None:
+        return jsonify({'error': 'The original request is still being processed.'}), 409
+
+    changes = _session_serializer.loads(record.session_changes or '{}')
+    session.update(changes.get('set', {}))
+    for k in changes.get('removed', []):
+        session.pop(k, None)
+    for category, message in changes.get('flashes', []):
+        flash(message, category)
+    response = Response(record.body or b'', status=record.status_code, headers=json.loads(record.headers or '{}'))
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """
+    Make a POST view idempotent per key. `scope(**view_args)` names the endpoint and
+    owner the key is valid for. Requests without a key run as before.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get('Idempotency-Key') or request.form.get('idempotency_key')
+            if request.method != 'POST' or not key:
+                return fn(*args, **kwargs)
+            if not IDEMPOTENCY_KEY_PATTERN.match(key):
+                return jsonify({'error': 'Idempotency key must be 8-64 letters, digits, "-" or "_".'}), 400
+
+            request_hash = request_fingerprint()
+            record, claimed = claim_idempotency_key(scope(**kwargs), key, request_hash)
+            if not claimed:
+                return replay_idempotent_response(record, request_hash)
+
+            record_id = record.id
+            before = dict(session)
+            flashes_before = len(session.get('_flashes', []))
+            commits_before = g.get('db_commits', 0)
+            try:
+                response = app.make_response(fn(*args, **kwargs))
+            except BaseException:
+                db.session.rollback()
+                IdempotencyKey.query.filter_by(id=record_id).delete()
+                db.session.commit()
+                raise
+
+            record = db.session.get(IdempotencyKey, record_id)
+            if g.get('db_commits', 0) == commits_before or response.is_streamed:
+                # nothing was written (or the body cannot be stored) - let a retry run again
+                db.session.delete(record)
+            else:
+                record.status_code = response.status_code
+                record.headers = json.dumps({h: response.headers[h] for h in IDEMPOTENCY_REPLAY_HEADERS
+                                             if h in response.headers})
+                record.body = response.get_data()
+                record.session_changes = session_changes(before, flashes_before)
+            db.session.commit()
+            return response
+        return wrapper
+    return decorator
+
+
+@app.cli.command('prune-idempotency-keys')
+def prune_idempotency_keys():
+    """Delete idempotency keys whose replay window has passed"""
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.expires_at < datetime.utcnow()).delete(synchronize_session=False)
+    db.session.commit()
+    print(f"Deleted {deleted} expired idempotency keys.")
+
+
+@app.cli.command('prune-sessions')
+def prune_sessions():
+    """Delete expired server-side sessions (Redis expires them by itself)"""
+    if session_store is None:
+        print("Sessions are cookie based; nothing to prune.")
+        return
+    print(f"Deleted {session_store.purge()} expired sessions.")
+
+
+# -----------------------
+# Booking search
+# -----------------------
+# MySQL: FULLTEXT index with the ngram parser (created by `flask search-index`).
+# Elsewhere: an in-process TrigramIndex, built on first use and kept in sync by
+# replaying the booking_events log, so every worker sees other workers' writes.
+SEARCH_FULLTEXT_INDEX = 'ft_ferry_bookings_search'
+SEARCH_FIELDS = ('booking_reference', 'name', 'email', 'phone')
+SEARCH_CANDIDATE_LIMIT = 500
+
+_search_state = {'backend': None, 'index': None, 'last_event_id': 0}
+_search_lock = threading.Lock()
+
+
+def search_backend():
+    """'fulltext' when the MySQL ngram FULLTEXT index exists, otherwise 'trigram'"""
+    if _search_state['backend'] is None:
+        backend = 'trigram'
+        if db.engine.dialect.name == 'mysql':
+            from sqlalchemy import inspect
+            names = {ix['name'] for ix in inspect(db.engine).get_indexes('ferry_bookings')}
+            if SEARCH_FULLTEXT_INDEX in names:
+                backend = 'fulltext'
+        _search_state['backend'] = backend
+    return _search_state['backend']
+
+
+def _search_columns():
+    return [FerryBooking.id] + [getattr(FerryBooking, f) for f in SEARCH_FIELDS]
+
+
+def booking_trigram_index():
+    """Return the process-wide TrigramIndex, building it or catching it up first"""
+    with _search_lock:
+        index = _search_state['index']
+        if index is None:
+            index = TrigramIndex()
+            # note the log position before scanning so writes during the build are replayed
+            last_event_id = db.session.query(db.func.coalesce(db.func.max(BookingEvent.id), 0)).scalar()
+            for row in db.session.query(*_search_columns()).yield_per(5000):
+                index.add(row.id, {f: getattr(row, f) for f in SEARCH_FIELDS})
+            _search_state.update(index=index, last_event_id=last_event_id)
+
+        events = db.session.query(BookingEvent.id, BookingEvent.kind, BookingEvent.booking_id).filter(
+            BookingEvent.id > _search_state['last_event_id']
+        ).order_by(BookingEvent.id).all()
+        if events:
+            # re-read every booking an event mentions: rows still there are re-indexed
+            # (cancelled, expired and moved bookings stay searchable), missing ones dropped
+            touched = sorted({e.booking_id for e in events if e.booking_id is not None})
+            for start in range(0, len(touched), SEARCH_CANDIDATE_LIMIT):
+                chunk = touched[start:start + SEARCH_CANDIDATE_LIMIT]
+                present = set()
+                for row in db.session.query(*_search_columns()).filter(FerryBooking.id.in_(chunk)):
+                    index.add(row.id, {f: getattr(row, f) for f in SEARCH_FIELDS})
+                    present.add(row.id)
+                for booking_id in set(chunk) - present:
+                    index.remove(booking_id)
+            if any(e.kind == 'bookings_archived' for e in events):
+                # archiving moves rows out in bulk without per-booking events
+                live = {row.id for row in db.session.query(FerryBooking.id).yield_per(5000)}
+                for booking_id in index.ids() - live:
+                    index.remove(booking_id)
+            _search_state['last_event_id'] = events[-1].id
+        return index
+
+
+def search_booking_ids(q, limit=SEARCH_CANDIDATE_LIMIT, criteria=()):
+    """
+    Booking ids matching `q` (reference, name, email or phone) and the SQL `criteria`,
+    best match first. The criteria are applied before the `limit` cut, so a filtered
+    search finds matches however far down the unfiltered ranking they sit.
+    """
+    q = (q or '').strip()
+    if not q:
+        return []
+    if search_backend() == 'fulltext':
+        match = "MATCH(booking_reference, name, email, phone) AGAINST (:q IN NATURAL LANGUAGE MODE)"
+        rows = db.session.query(FerryBooking.id).filter(db.text(match), *criteria).order_by(
+            db.text(match + ' DESC'), FerryBooking.id.desc()
+        ).params(q=q).limit(limit).all()
+        return [r.id for r in rows]
+
+    index = booking_trigram_index()
+    if not criteria:
+        return [doc_id for doc_id, _ in index.search(q, limit)]
+    # rank every hit, then keep those passing the filters, a chunk at a time
+    ranked = [doc_id for doc_id, _ in index.search(q, None)]
+    found = []
+    for start in range(0, len(ranked), SEARCH_CANDIDATE_LIMIT):
+        chunk = ranked[start:start + SEARCH_CANDIDATE_LIMIT]
+        passing = {row.id for row in db.session.query(FerryBooking.id).filter(FerryBooking.id.in_(chunk), *criteria)}
+        found.extend(doc_id for doc_id in chunk if doc_id in passing)
+        if len(found) >= limit:
+            break
+    return found[:limit]
+
+
 # -----------------------
 # PDF Generation
 # -----------------------
 
 def generate_pdf_receipt(booking):
     # Professional ferry receipt - optimized for single A4 page
+    # Reference Platypus implementation; requests are served by the equivalent
+    # (and much cheaper) canvas renderer in receipt_pdf.render_receipt, run in
+    # the receipt job pool.
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4,
                             leftMargin=35, rightMargin=35, topMargin=30, bottomMargin=30)
@@ -632,6 +1430,102 @@ def generate_pdf_receipt(booking):
     return buffer
 
 
+# -----------------------
+# Receipt cache and background rendering
+# -----------------------
+# Bump when the receipt layout changes so every cached PDF is re-rendered
+RECEIPT_LAYOUT_VERSION = 1
+# Everything that is printed on (or decides) the receipt; a change to any of
+# these gives the booking a new digest and therefore a fresh PDF. The booking
+# and payment status are part of the key so a PDF cached while a booking was
+# confirmed is never served once it is cancelled, expired or refunded.
+RECEIPT_FIELDS = (
+    'booking_reference', 'name', 'email', 'phone', 'departure', 'destination',
+    'date', 'time', 'seats', 'selected_seats', 'is_roundtrip', 'return_date',
+    'return_time', 'return_selected_seats', 'total_price', 'payment_method',
+    'status', 'payment_status',
+)
+receipt_cache = ReceiptCache(os.getenv('RECEIPT_CACHE_DIR', os.path.join(app.root_path, 'receipt_cache')))
+# Rendering runs in a process pool (0 = render inline, e.g. for scripts)
+receipt_jobs = ReceiptJobs(receipt_cache, max_workers=int(os.getenv('RECEIPT_WORKERS', 2)))
+
+
+def receipt_fields(booking):
+    return {name: getattr(booking, name) for name in RECEIPT_FIELDS}
+
+
+def receipt_digest(booking):
+    fields = receipt_fields(booking)
+    fields['layout'] = RECEIPT_LAYOUT_VERSION
+    return fingerprint(fields)
+
+
+def queue_receipt(booking):
+    """Start rendering the booking's current receipt in the background; returns (digest, future)"""
+    digest = receipt_digest(booking)
+    return digest, receipt_jobs.submit(booking.id, digest, receipt_fields(booking))
+
+
+def receipt_job_info(digest):
+    status, error = receipt_jobs.status(digest)
+    info = {
+        'job_id': digest,
+        'status': status,
+        'status_url': url_for('receipt_job_status', job_id=digest),
+    }
+    if status == 'ready':
+        info['download_url'] = url_for('receipt_job_download', job_id=digest)
+    if error:
+        info['error'] = error
+    return info
+
+
+def can_view_receipt(booking):
+    """
+    Receipts carry the passenger's details, so only the booking's owner, an
+    admin, or the session that made (or is paying for) the booking may fetch one.
+    """
+    if session.get('is_admin'):
+        return True
+    if current_user.is_authenticated and booking.user_id == current_user.id:
+        return True
+    return booking.booking_reference in (session.get('last_booking_ref'), session.get('payment_booking_ref'))
+
+
+def receipt_booking_or_404(ref):
+    booking = FerryBooking.query.filter_by(booking_reference=ref).first_or_404()
+    if not can_view_receipt(booking):
+        # same answer as an unknown reference, so references cannot be probed
+        abort(404)
+    return booking
+
+
+def send_receipt_file(path, digest, booking_reference):
+    """Serve a cached receipt with ETag/Last-Modified so repeat downloads can 304"""
+    response = send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"OceanLine_Booking_{booking_reference}.pdf",
+        etag=digest,
+        conditional=True,
+    )
+    response.cache_control.private = True
+    return response
+
+
+def send_receipt(booking):
+    """
+    Serve the booking's receipt from the cache. On a miss the render is queued
+    and the request answers 202 with the job to poll at once, so no request
+    thread ever waits on the pool.
+    """
+    digest, future = queue_receipt(booking)
+    if not future.done() or future.exception() is not None:
+        return jsonify(receipt_job_info(digest)), 202
+    return send_receipt_file(future.result(), digest, booking.booking_reference)
+
+
 # -----------------------
 # Routes: Public (homepage, booking)
 # -----------------------
@@ -707,7 +1601,9 @@ def login():
         user = User.query.filter_by(email=email).first()
         
         if user and user.check_password(password):
+            rotate_session_id()
             login_user(user, remember=remember)
+            session['user_version'] = user.session_version
             flash(f'Welcome back, {user.name}!', 'success')
             
             # Redirect to next page or index
@@ -724,6 +1620,7 @@ def login():
 @login_required
 def logout():
     logout_user()
+    session.pop('user_version', None)
     flash('You have been logged out.', 'info')
     return redirect(url_for('index'))
 
@@ -796,14 +1693,86 @@ def get_timesold():
 @app.route('/cancel/<int:id>')
 def cancel(id):
     booking = FerryBooking.query.get_or_404(id)
-    db.session.delete(booking)
+    if booking.status in ('cancelled', 'expired'):
+        flash('This booking is no longer active.', 'info')
+        return redirect(url_for('bookings'))
+    # cancelled bookings are kept (seat counts ignore them) so history and exports see them
+    booking.status = 'cancelled'
+    booking.hold_expires_at = None
+    record_booking_event('booking_cancelled', booking)
     db.session.commit()
+    receipt_cache.discard(id)
     flash('Booking cancelled successfully', 'success')
     return redirect(url_for('bookings'))
 
 
+# Card and bank slip payments are taken on the payment page. Stripe and PayPal hand
+# off to the gateway and stay 'redirected' (Stripe until its webhook, PayPal until an
+# admin confirms it in the payment queue); so does a bank transfer without a slip.
+PAYMENT_METHODS = ['Bank Transfer', 'Card', 'Stripe', 'PayPal']
+
+
+def confirm_hold(booking):
+    """
+    Turn a seat hold into a confirmed booking once its payment has been taken. A hold
+    that has run out is reinstated if its sailings still have room (see
+    reinstate_booking). Returns True if the booking is now confirmed.
+    """
+    if booking.status == 'confirmed':
+        return True
+    if booking.status == 'held' and not booking.hold_expired:
+        booking.status = 'confirmed'
+        booking.hold_expires_at = None
+        return True
+    if booking.status in ('held', 'expired'):
+        return reinstate_booking(booking)
+    return False
+
+
+def reinstate_booking(booking):
+    """
+    Confirm a booking whose hold ran out, if every leg still fits. Locks the sailings
+    (like create_group_bookings) and keeps the booking's seat numbers where they are
+    still free, otherwise assigns new ones. Returns False, changing nothing, if a leg
+    no longer has room; the caller decides what to do with the payment.
+    """
+    legs = [('selected_seats', (booking.departure, booking.destination, booking.date, booking.time))]
+    if booking.return_date and booking.return_time:
+        legs.append(('return_selected_seats',
+                     (booking.destination, booking.departure, booking.return_date, booking.return_time)))
+    usage = sailing_seat_usage({sailing for _, sailing in legs}, lock=True)
+    reassigned = {}
+    for column, sailing in legs:
+        layout = sailing_layout(*sailing)
+        taken = usage[sailing]['taken']
+        if usage[sailing]['booked'] + booking.seats > layout.capacity:
+            return False
+        current = {int(x) for x in (getattr(booking, column) or '').split(',') if x.strip().isdigit()}
+        if len(current) == booking.seats and not current & taken:
+            continue
+        seats = assign_seats(taken, booking.seats, layout)
+        if seats is None:
+            return False
+        reassigned[column] = ','.join(map(str, seats))
+    for column, value in reassigned.items():
+        setattr(booking, column, value)
+    booking.status = 'confirmed'
+    booking.hold_expires_at = None
+    return True
+
+
+def hold_expired_redirect(booking):
+    """Send the customer back to /book, pre-filled, after their seat hold ran out"""
+    session.pop('temp_booking', None)
+    session.pop('payment_booking_ref', None)
+    flash(f'Your seat hold for booking {booking.booking_reference} expired. Please book again.', 'warning')
+    return redirect(url_for('book', departure=booking.departure, destination=booking.destination,
+                            date=booking.date.isoformat(), time=booking.time, seats=booking.seats))
+
+
 @app.route('/book', methods=['GET', 'POST'])
 @login_required
+@idempotent(lambda: f'book:user:{current_user.id}')
 def book():
     """
     Handles both one-way and round-trip bookings.
@@ -837,16 +1806,16 @@ def book():
             flash('Invalid travel date.', 'danger')
             return redirect(url_for('book'))
 
+        if sailing_cancelled(departure, destination, travel_date, time_str):
+            flash('That sailing has been cancelled. Please choose another time.', 'danger')
+            return redirect(url_for('book'))
+
         # seat availability check for outbound
-        outbound_booked = db.session.query(db.func.coalesce(db.func.sum(FerryBooking.seats), 0)).filter(
-            FerryBooking.departure == departure,
-            FerryBooking.destination == destination,
-            FerryBooking.date == travel_date,
-            FerryBooking.time == time_str
-        ).scalar() or 0
+        outbound_booked = booked_seats(departure, destination, travel_date, time_str)
+        outbound_capacity = sailing_layout(departure, destination, travel_date, time_str).capacity
 
-        if outbound_booked + seats > FERRY_CAPACITY:
-            flash(f'Not enough seats for outbound. Only {FERRY_CAPACITY - outbound_booked} left.', 'danger')
+        if outbound_booked + seats > outbound_capacity:
+            flash(f'Not enough seats for outbound. Only {max(0, outbound_capacity - outbound_booked)} left.', 'danger')
             return redirect(url_for('book'))
 
         # price calculation
@@ -858,7 +1827,7 @@ def book():
         total_price = price_per_seat * seats
 
         # prepare booking
-        booking_ref = str(uuid.uuid4())[:8].upper()
+        booking_ref = new_booking_references()[0]
         booking = FerryBooking(
             booking_reference=booking_ref,
             name=name,
@@ -871,7 +1840,9 @@ def book():
             seats=seats,
             total_price=total_price,
             is_roundtrip=(trip_type == 'round'),
-            user_id=current_user.id
+            user_id=current_user.id,
+            status='held',
+            hold_expires_at=datetime.utcnow() + timedelta(minutes=BOOKING_HOLD_MINUTES)
         )
 
         # if round-trip, store return fields (simple approach)
@@ -889,16 +1860,16 @@ def book():
                 flash('Invalid return date.', 'danger')
                 return redirect(url_for('book'))
 
+            if sailing_cancelled(destination, departure, return_date_val, return_time_str):
+                flash('That return sailing has been cancelled. Please choose another time.', 'danger')
+                return redirect(url_for('book'))
+
             # check return seat availability (note: return route is reversed)
-            return_booked = db.session.query(db.func.coalesce(db.func.sum(FerryBooking.seats), 0)).filter(
-                FerryBooking.departure == destination,
-                FerryBooking.destination == departure,
-                FerryBooking.date == return_date_val,
-                FerryBooking.time == return_time_str
-            ).scalar() or 0
-
-            if return_booked + seats > FERRY_CAPACITY:
-                flash(f'Not enough seats for return. Only {FERRY_CAPACITY - return_booked} left.', 'danger')
+            return_booked = booked_seats(destination, departure, return_date_val, return_time_str)
+            return_capacity = sailing_layout(destination, departure, return_date_val, return_time_str).capacity
+
+            if return_booked + seats > return_capacity:
+                flash(f'Not enough seats for return. Only {max(0, return_capacity - return_booked)} left.', 'danger')
                 return redirect(url_for('book'))
 
             # price for return (assuming same price)
@@ -912,6 +1883,8 @@ def book():
 
         # save booking to generate booking reference
         db.session.add(booking)
+        db.session.flush()
+        record_booking_event('booking_created', booking)
         db.session.commit()
 
         # Store booking info in session for seat selection
@@ -945,6 +1918,47 @@ def book():
     return render_template('book.html', ports=PORTS, initial=initial)
 
 
+def auto_assign_seats(temp_booking, seats_required):
+    """'Auto-assign' on the seat page: pick the best seats for the party on each leg and go to payment"""
+    booking = db.session.get(FerryBooking, temp_booking['booking_id'])
+    if not booking:
+        flash('Booking not found.', 'danger')
+        return redirect(url_for('book'))
+    if booking.hold_expired:
+        return hold_expired_redirect(booking)
+
+    def own(seats):
+        return {int(s) for s in (seats or '').split(',') if s.strip().isdigit()}
+
+    # the booking's own earlier picks do not count as taken
+    taken = get_taken_seats(booking.departure, booking.destination, booking.date, booking.time) - own(booking.selected_seats)
+    outbound = assign_seats(taken, seats_required,
+                            sailing_layout(booking.departure, booking.destination, booking.date, booking.time))
+    inbound = None
+    if booking.is_roundtrip and booking.return_date and booking.return_time:
+        taken = get_taken_seats_return(booking.destination, booking.departure, booking.return_date,
+                                       booking.return_time) - own(booking.return_selected_seats)
+        inbound = assign_seats(taken, seats_required, sailing_layout(booking.destination, booking.departure,
+                                                                     booking.return_date, booking.return_time))
+        if inbound is None:
+            outbound = None
+    if outbound is None:
+        flash('Not enough free seats left to assign automatically. Please pick seats yourself.', 'danger')
+        return redirect(url_for('select_seats'))
+
+    booking.selected_seats = ','.join(map(str, outbound))
+    if inbound is not None:
+        booking.return_selected_seats = ','.join(map(str, inbound))
+    if booking.status == 'held':
+        booking.hold_expires_at = datetime.utcnow() + timedelta(minutes=BOOKING_HOLD_MINUTES)
+    db.session.commit()
+
+    session['payment_booking_ref'] = booking.booking_reference
+    seats_text = booking.selected_seats + (f' (return {booking.return_selected_seats})' if inbound else '')
+    flash(f'Seats {seats_text} assigned! Reference: {booking.booking_reference}', 'success')
+    return redirect(url_for('payment', ref=booking.booking_reference))
+
+
 @app.route('/select_seats', methods=['GET', 'POST'])
 def select_seats():
     temp_booking = session.get('temp_booking')
@@ -958,6 +1972,8 @@ def select_seats():
 
     # ------------------------ POST SUBMISSION ------------------------
     if request.method == 'POST':
+        if request.form.get('auto_assign'):
+            return auto_assign_seats(temp_booking, seats_required)
 
         # ---------------- OUTBOUND SEATS ----------------
         selected_seats_raw = request.form.get('seats', '')  # "1,5" string
@@ -972,8 +1988,13 @@ def select_seats():
         if not booking:
             flash('Booking not found.', 'danger')
             return redirect(url_for('book'))
+        if booking.hold_expired:
+            return hold_expired_redirect(booking)
 
         booking.selected_seats = ",".join(selected_seats)
+        if booking.status == 'held':
+            # seats chosen - give the customer a fresh hold to pay in
+            booking.hold_expires_at = datetime.utcnow() + timedelta(minutes=BOOKING_HOLD_MINUTES)
 
         # ---------------- RETURN SEATS (IF ROUND TRIP) ----------------
         if temp_booking.get('is_roundtrip'):
@@ -1008,14 +2029,19 @@ def select_seats():
     # Convert date strings safely
     trip_date = datetime.strptime(date, '%Y-%m-%d').date()
 
-    # Get taken seats for outbound
-    taken_seats = get_taken_seats(departure, destination, trip_date, time)
+    # Outbound seat map: cached markup for the vessel layout + this sailing's taken seats
+    layout = sailing_layout(departure, destination, trip_date, time)
+    seat_map = seat_map_markup(layout)
+    taken_bitmap = seat_bitmap(get_taken_seats(departure, destination, trip_date, time), layout.capacity)
 
     # Return trip seats
-    return_taken_seats = []
+    return_seat_map = return_taken_bitmap = None
     if is_roundtrip and return_date and return_time:
         r_date = datetime.strptime(return_date, '%Y-%m-%d').date()
-        return_taken_seats = get_taken_seats_return(destination, departure, r_date, return_time)
+        return_layout = sailing_layout(destination, departure, r_date, return_time)
+        return_seat_map = seat_map_markup(return_layout)
+        return_taken_bitmap = seat_bitmap(get_taken_seats_return(destination, departure, r_date, return_time),
+                                          return_layout.capacity)
 
     return render_template(
         'select_seats.html',
@@ -1024,16 +2050,19 @@ def select_seats():
         date=date,
         time=time,
         seats_needed=seats_required,   # IMPORTANT: int only
-        taken_seats=taken_seats,
+        seat_map=seat_map,
+        taken_bitmap=taken_bitmap,
         is_roundtrip=is_roundtrip,
         return_date=return_date,
         return_time=return_time,
-        return_taken_seats=return_taken_seats
+        return_seat_map=return_seat_map,
+        return_taken_bitmap=return_taken_bitmap
     )
 
 
 
 @app.route('/payment/<ref>', methods=['GET', 'POST'])
+@idempotent(lambda ref: f'payment:{ref}')
 def payment(ref):
     """Handle payment for a booking after seats have been selected"""
     booking = FerryBooking.query.filter_by(booking_reference=ref).first_or_404()
@@ -1042,9 +2071,14 @@ def payment(ref):
     if not booking.selected_seats:
         flash('Please select your seats first.', 'warning')
         return redirect(url_for('select_seats'))
+    if booking.hold_expired:
+        return hold_expired_redirect(booking)
     
     if request.method == 'POST':
         payment_method = request.form.get('payment_method')
+        if payment_method not in PAYMENT_METHODS:
+            flash('Please choose a payment method.', 'warning')
+            return redirect(url_for('payment', ref=booking.booking_reference))
         booking.payment_method = payment_method
         
         # Handle file uploads directory
@@ -1074,12 +2108,23 @@ def payment(ref):
             booking.payment_info = f"card:{masked} exp:{card_expiry}"
         
         else:
-            # Stripe or PayPal - mark as redirected
+            # Stripe or PayPal - mark as redirected; the seats stay held until the gateway confirms
             booking.payment_status = 'redirected'
             booking.payment_info = payment_method
+
+        if booking.payment_status == 'paid' or (booking.payment_status == 'pending' and booking.payment_info):
+            # a taken payment (or an uploaded bank slip awaiting review) turns the hold into a real booking
+            confirm_hold(booking)
+        else:
+            # money is on its way from outside the site: keep the seats while an admin
+            # (or the Stripe webhook) can still confirm it
+            booking.hold_expires_at = datetime.utcnow() + timedelta(hours=PAYMENT_HOLD_HOURS)
         
         # Save payment info
+        record_booking_event('payment_status_changed', booking)
         db.session.commit()
+        # Have the receipt ready by the time the confirmation page asks for it
+        queue_receipt(booking)
         
         # Clear temporary session data
         session.pop('temp_booking', None)
@@ -1087,8 +2132,15 @@ def payment(ref):
         
         # Store reference for confirmation
         session['last_booking_ref'] = booking.booking_reference
+
+        if payment_method == 'Stripe':
+            return redirect(url_for('create_checkout_session', ref=booking.booking_reference))
         
-        flash(f'Payment processed! Booking Reference: {booking.booking_reference}', 'success')
+        if booking.status == 'held':
+            flash(f'Your seats are held until your {payment_method} payment is confirmed. '
+                  f'Booking Reference: {booking.booking_reference}', 'info')
+        else:
+            flash(f'Payment processed! Booking Reference: {booking.booking_reference}', 'success')
         return redirect(url_for('confirmation', ref=booking.booking_reference))
     
     # GET - show payment form
@@ -1119,21 +2171,315 @@ def my_booking():
     return redirect(url_for('confirmation', ref=ref))
 
 
+USER_BOOKINGS_PAGE_SIZE = 20
+# only what bookings.html (and the JSON variant) shows
+USER_BOOKING_COLUMNS = [
+    FerryBooking.id, FerryBooking.booking_reference, FerryBooking.name,
+    FerryBooking.departure, FerryBooking.destination, FerryBooking.date, FerryBooking.time,
+    FerryBooking.seats, FerryBooking.total_price, FerryBooking.status, FerryBooking.created_at,
+]
+
+
+def user_booking_page(user_id, cursor=None, limit=USER_BOOKINGS_PAGE_SIZE):
+    """
+    One page of a customer's bookings, newest first, as lightweight rows.
+    Served by ix_ferry_bookings_user_created. Returns (rows, next_cursor).
+    """
+    query = db.session.query(*USER_BOOKING_COLUMNS).filter(FerryBooking.user_id == user_id)
+    after = decode_cursor(cursor)
+    if after:
+        created, bid = after
+        query = query.filter(db.or_(
+            FerryBooking.created_at < created,
+            db.and_(FerryBooking.created_at == created, FerryBooking.id < bid)
+        ))
+    rows = query.order_by(FerryBooking.created_at.desc(), FerryBooking.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
 @app.route('/bookings')
 @login_required
 def bookings():
     """Show logged-in user's bookings only"""
-    user_bookings = FerryBooking.query.filter_by(user_id=current_user.id).order_by(FerryBooking.created_at.desc()).all()
-    return render_template('bookings.html', bookings=user_bookings)
+    after = request.args.get('after')
+    user_bookings, next_cursor = user_booking_page(current_user.id, after)
+    return render_template('bookings.html', bookings=user_bookings, next_cursor=next_cursor, paged=bool(after))
 
 
-@app.route('/get_times', methods=['POST'])
-def get_times():
-    departure = request.form.get('departure')
-    destination = request.form.get('destination')
-    date_str = request.form.get('date')
-    # Use the unified availability helper which prefers DailySchedule (date-specific)
-    if not (departure and destination and date_str):
+@app.route('/api/bookings')
+@login_required
+def api_bookings():
+    """JSON variant of /bookings for the mobile client; pass next_cursor back as ?after="""
+    rows, next_cursor = user_booking_page(current_user.id, request.args.get('after'))
+    return jsonify({
+        'bookings': [{
+            'id': b.id,
+            'booking_reference': b.booking_reference,
+            'name': b.name,
+            'departure': b.departure,
+            'destination': b.destination,
+            'date': b.date.isoformat(),
+            'time': b.time,
+            'seats': b.seats,
+            'total_price': b.total_price,
+            'status': b.status,
+            'created_at': b.created_at.isoformat() if b.created_at else None,
+        } for b in rows],
+        'next_cursor': next_cursor
+    })
+
+
+# -----------------------
+# Group bookings API (tour operators)
+# -----------------------
+GROUP_BOOKING_MAX_ITEMS = int(os.getenv('GROUP_BOOKING_MAX_ITEMS', 50))
+GROUP_BOOKING_PAYMENT_METHOD = 'Invoice'
+GROUP_BOOKING_PAYMENT_METHODS = ['Invoice', 'Bank Transfer']
+# Group bookings are confirmed before they are paid, so only these accounts (emails,
+# comma-separated) may make them
+GROUP_BOOKING_OPERATORS = {email.strip().lower() for email in os.getenv('GROUP_BOOKING_OPERATORS', '').split(',')
+                           if email.strip()}
+
+
+def operator_required(fn):
+    """Decorator for the group bookings API: the logged-in user must be a listed tour operator"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if (current_user.email or '').lower() not in GROUP_BOOKING_OPERATORS:
+            return jsonify({'error': 'Group bookings are only open to tour operator accounts.'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+_HHMM = re.compile(r'^([01]\d|2[0-3]):[0-5]\d$')
+
+
+def parse_group_booking_item(item, defaults):
+    """
+    Validate one entry of a group booking request. Returns a dict of FerryBooking
+    column values (seat numbers and price still to fill in); raises ValueError.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('each booking must be an object')
+    values = {field: str(item.get(field) or defaults.get(field) or '').strip()
+              for field in ('name', 'email', 'phone', 'departure', 'destination', 'date', 'time')}
+    missing = [field for field, value in values.items() if not value]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if (values['departure'], values['destination']) not in ROUTE_PRICES:
+        raise ValueError(f"no route {values['departure']} -> {values['destination']}")
+    try:
+        values['date'] = datetime.strptime(values['date'], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('date must be YYYY-MM-DD')
+    if values['date'] < datetime.utcnow().date():
+        raise ValueError('date is in the past')
+    if not _HHMM.match(values['time']):
+        raise ValueError('time must be HH:MM')
+    try:
+        values['seats'] = int(item.get('seats'))
+    except (TypeError, ValueError):
+        raise ValueError('seats must be a whole number')
+    capacity = sailing_layout(values['departure'], values['destination'], values['date'], values['time']).capacity
+    if not 1 <= values['seats'] <= capacity:
+        raise ValueError(f'seats must be between 1 and {capacity}')
+
+    values['is_roundtrip'] = bool(item.get('return_date') or item.get('return_time'))
+    values['return_date'] = values['return_time'] = None
+    if values['is_roundtrip']:
+        try:
+            values['return_date'] = datetime.strptime(str(item.get('return_date')), '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('return_date must be YYYY-MM-DD')
+        if values['return_date'] < values['date']:
+            raise ValueError('return_date is before date')
+        values['return_time'] = str(item.get('return_time') or '')
+        if not _HHMM.match(values['return_time']):
+            raise ValueError('return_time must be HH:MM')
+        capacity = sailing_layout(values['destination'], values['departure'],
+                                  values['return_date'], values['return_time']).capacity
+        if values['seats'] > capacity:
+            raise ValueError(f'seats must be between 1 and {capacity} on the return sailing')
+    return values
+
+
+def sailing_seat_usage(sailings, lock=False):
+    """
+    {(dep, dest, date, time): set of taken seat numbers, plus seats booked} for many
+    sailings at once: one query for outbound legs and one for round-trip return legs.
+    Bookings without seat numbers yet still count through the seat total.
+    With lock=True both queries read FOR UPDATE; on MySQL that also locks the scanned
+    ix_ferry_bookings_sailing ranges, so another booking for these sailings waits
+    until the caller commits.
+    """
+    usage = {sailing: {'taken': set(), 'booked': 0} for sailing in sailings}
+    if not sailings:
+        return usage
+    outbound = db.session.query(
+        FerryBooking.departure, FerryBooking.destination, FerryBooking.date, FerryBooking.time,
+        FerryBooking.seats, FerryBooking.selected_seats
+    ).filter(
+        FerryBooking.date.in_({d for _, _, d, _ in sailings}),
+        db.or_(*[db.and_(FerryBooking.departure == dep, FerryBooking.destination == dest,
+                         FerryBooking.date == d, FerryBooking.time == t) for dep, dest, d, t in sailings]),
+        *active_booking_criteria()
+    )
+    return_legs = db.session.query(
+        FerryBooking.destination, FerryBooking.departure, FerryBooking.return_date, FerryBooking.return_time,
+        FerryBooking.seats, FerryBooking.return_selected_seats
+    ).filter(
+        FerryBooking.date <= max(d for _, _, d, _ in sailings),
+        db.or_(*[db.and_(FerryBooking.departure == dest, FerryBooking.destination == dep,
+                         FerryBooking.return_date == d, FerryBooking.return_time == t)
+                 for dep, dest, d, t in sailings]),
+        *active_booking_criteria()
+    )
+    if lock:
+        outbound, return_legs = outbound.with_for_update(), return_legs.with_for_update()
+    for query in (outbound, return_legs):
+        for dep, dest, d, t, seats, seat_list in query:
+            entry = usage.get((dep, dest, d, t))
+            if entry is None:
+                continue
+            entry['booked'] += seats or 0
+            entry['taken'].update(int(x) for x in (seat_list or '').split(',') if x.strip().isdigit())
+    return usage
+
+
+def create_group_bookings(items, user_id, payment_method=GROUP_BOOKING_PAYMENT_METHOD):
+    """
+    Check capacity for every leg of `items` (parsed by parse_group_booking_item) in bulk,
+    assign seats, and insert all bookings plus their booking_created events with two
+    batched INSERTs in a single transaction. All or nothing: raises ValueError with a
+    list of per-sailing problems if any leg does not fit. Returns the inserted rows.
+    The caller rolls back on ValueError, which releases the seat locks.
+    """
+    legs = []  # (item index, 'selected_seats' | 'return_selected_seats', sailing)
+    for i, item in enumerate(items):
+        legs.append((i, 'selected_seats', (item['departure'], item['destination'], item['date'], item['time'])))
+        if item['is_roundtrip']:
+            legs.append((i, 'return_selected_seats',
+                         (item['destination'], item['departure'], item['return_date'], item['return_time'])))
+
+    # locked until the commit below, so two requests cannot hand out the same seats
+    usage = sailing_seat_usage({sailing for _, _, sailing in legs}, lock=True)
+    layouts = {sailing: sailing_layout(*sailing) for sailing in usage}
+    wanted = {}
+    for i, _, sailing in legs:
+        wanted[sailing] = wanted.get(sailing, 0) + items[i]['seats']
+    problems = [
+        {'departure': dep, 'destination': dest, 'date': d.isoformat(), 'time': t, 'requested': seats,
+         'available': max(0, layouts[(dep, dest, d, t)].capacity - usage[(dep, dest, d, t)]['booked'])}
+        for (dep, dest, d, t), seats in wanted.items()
+        if usage[(dep, dest, d, t)]['booked'] + seats > layouts[(dep, dest, d, t)].capacity
+    ]
+    if problems:
+        raise ValueError(problems)
+
+    rows = [dict(item) for item in items]
+    for i, column, sailing in legs:
+        seats = assign_seats(usage[sailing]['taken'], rows[i]['seats'], layouts[sailing])
+        if seats is None:
+            # seat totals fit but the free seat numbers do not (legacy rows without numbers)
+            raise ValueError([{'departure': sailing[0], 'destination': sailing[1], 'date': sailing[2].isoformat(),
+                               'time': sailing[3], 'requested': rows[i]['seats'],
+                               'available': layouts[sailing].capacity - len(usage[sailing]['taken'])}])
+        usage[sailing]['taken'].update(seats)
+        rows[i][column] = ','.join(map(str, seats))
+
+    now = datetime.utcnow()
+    for row, ref in zip(rows, new_booking_references(len(rows))):
+        price = ROUTE_PRICES[(row['departure'], row['destination'])]
+        row['total_price'] = price * row['seats']
+        if row['is_roundtrip']:
+            row['total_price'] += ROUTE_PRICES.get((row['destination'], row['departure']), price) * row['seats']
+        row.update(booking_reference=ref, user_id=user_id, status='confirmed',
+                   payment_method=payment_method, payment_status='pending', created_at=now, updated_at=now)
+        row.setdefault('return_selected_seats', None)
+
+    db.session.execute(FerryBooking.__table__.insert(), rows)
+    inserted = db.session.query(*booking_event_columns(), FerryBooking.selected_seats,
+                                FerryBooking.return_selected_seats, FerryBooking.return_date,
+                                FerryBooking.return_time).filter(
+        FerryBooking.booking_reference.in_([row['booking_reference'] for row in rows])
+    ).all()
+    db.session.execute(BookingEvent.__table__.insert(),
+                       [booking_event_values('booking_created', b) for b in inserted])
+    db.session.commit()
+    order = {row['booking_reference']: i for i, row in enumerate(rows)}
+    return sorted(inserted, key=lambda b: order[b.booking_reference])
+
+
+@app.route('/api/group-bookings', methods=['POST'])
+@csrf.exempt  # JSON only - a cross-site form cannot send application/json
+@login_required
+@operator_required
+@idempotent(lambda: f'group-bookings:user:{current_user.id}')
+def api_group_bookings():
+    """
+    Book many sailings in one request. Body:
+      {"name", "email", "phone", "payment_method",        (defaults for every entry)
+       "bookings": [{"departure", "destination", "date", "time", "seats",
+                     "return_date", "return_time", "name", "email", "phone"}, ...]}
+    Seats are assigned automatically. Either every booking is made or none is.
+    """
+    data = request.get_json(silent=True) if request.is_json else None
+    if not isinstance(data, dict) or not isinstance(data.get('bookings'), list) or not data['bookings']:
+        return jsonify({'error': 'Send a JSON object with a non-empty "bookings" list.'}), 400
+    if len(data['bookings']) > GROUP_BOOKING_MAX_ITEMS:
+        return jsonify({'error': f'At most {GROUP_BOOKING_MAX_ITEMS} bookings per request.'}), 400
+    payment_method = data.get('payment_method') or GROUP_BOOKING_PAYMENT_METHOD
+    if payment_method not in GROUP_BOOKING_PAYMENT_METHODS:
+        return jsonify({'error': f"payment_method must be one of {', '.join(GROUP_BOOKING_PAYMENT_METHODS)}."}), 400
+
+    defaults = {
+        'name': data.get('name') or current_user.name,
+        'email': data.get('email') or current_user.email,
+        'phone': data.get('phone') or current_user.phone,
+    }
+    items, errors = [], []
+    for i, item in enumerate(data['bookings']):
+        try:
+            items.append(parse_group_booking_item(item, defaults))
+        except ValueError as e:
+            errors.append({'index': i, 'error': str(e)})
+    if errors:
+        return jsonify({'error': 'Invalid bookings.', 'details': errors}), 400
+
+    try:
+        created = create_group_bookings(items, current_user.id, payment_method)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Not enough seats.', 'details': e.args[0]}), 409
+
+    return jsonify({
+        'bookings': [{
+            'booking_reference': b.booking_reference,
+            'departure': b.departure,
+            'destination': b.destination,
+            'date': b.date.isoformat(),
+            'time': b.time,
+            'seats': b.seats,
+            'selected_seats': b.selected_seats,
+            'return_date': b.return_date.isoformat() if b.return_date else None,
+            'return_time': b.return_time,
+            'return_selected_seats': b.return_selected_seats,
+            'total_price': b.total_price,
+            'payment_status': b.payment_status,
+        } for b in created],
+        'total_price': sum(b.total_price for b in created),
+    }), 201
+
+
+@app.route('/get_times', methods=['POST'])
+def get_times():
+    departure = request.form.get('departure')
+    destination = request.form.get('destination')
+    date_str = request.form.get('date')
+    # Use the unified availability helper which prefers DailySchedule (date-specific)
+    if not (departure and destination and date_str):
         return jsonify([])
     try:
         target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
@@ -1150,13 +2496,7 @@ def get_available_seats():
     date_str = request.form.get('date')
     time = request.form.get('time')
     date = datetime.strptime(date_str, '%Y-%m-%d').date()
-    booked_seats = db.session.query(db.func.sum(FerryBooking.seats)).filter_by(
-        departure=departure,
-        destination=destination,
-        date=date,
-        time=time
-    ).scalar() or 0
-    available = FERRY_CAPACITY - booked_seats
+    available = seats_left(departure, destination, date, time)
     return jsonify({'available': available})
 
 # Route to generate PDF receipt
@@ -1167,17 +2507,56 @@ def pay():
     booking_ref = request.form.get('booking_ref')
     
     # Get booking details
-    booking = FerryBooking.query.filter_by(booking_reference=booking_ref).first_or_404()
-    
-    # Generate PDF
-    pdf_buffer = generate_pdf_receipt(booking)
-    
-    # Return PDF as download
-    return send_file(
-        pdf_buffer,
-        download_name=f"OceanLine_Booking_{booking_ref}.pdf",
-        as_attachment=True
-    )
+    booking = receipt_booking_or_404(booking_ref)
+
+    # Return PDF as download (rendered once, then served from the receipt cache)
+    return send_receipt(booking)
+
+
+@app.route('/receipt/<ref>')
+def receipt(ref):
+    """Cacheable GET download of a booking receipt (answers 304 when unchanged)"""
+    booking = receipt_booking_or_404(ref)
+    return send_receipt(booking)
+
+
+@app.route('/receipt/<ref>/jobs', methods=['POST'])
+def receipt_job_create(ref):
+    """Queue (or find) the render of a booking's current receipt and return its job id"""
+    booking = receipt_booking_or_404(ref)
+    digest, _ = queue_receipt(booking)
+    info = receipt_job_info(digest)
+    return jsonify(info), (200 if info['status'] == 'ready' else 202)
+
+
+def valid_job_id(job_id):
+    return len(job_id) == 32 and all(ch in '0123456789abcdef' for ch in job_id)
+
+
+@app.route('/receipt/jobs/<job_id>')
+def receipt_job_status(job_id):
+    """
+    Job status: ready, queued, running, failed or unknown. 'unknown' means this
+    worker did not queue the job and it has not finished; POST to
+    /receipt/<ref>/jobs again to (re)queue it.
+    """
+    if not valid_job_id(job_id):
+        abort(404)
+    return jsonify(receipt_job_info(job_id))
+
+
+@app.route('/receipt/jobs/<job_id>/download')
+def receipt_job_download(job_id):
+    if not valid_job_id(job_id):
+        abort(404)
+    path = receipt_cache.find(job_id)
+    if path is None:
+        return jsonify(receipt_job_info(job_id)), 404
+    booking_id = int(os.path.basename(path).split('-', 1)[0])
+    booking = db.session.get(FerryBooking, booking_id)
+    if booking is None or not can_view_receipt(booking):
+        abort(404)
+    return send_receipt_file(path, job_id, booking.booking_reference)
 
 
 @app.route('/available_seats')
@@ -1189,7 +2568,7 @@ def available_seats():
 
     daily_list = []
     for d in daily:
-        avail = seats_left(d.departure, d.destination, d.date, d.time)
+        avail = seats_left(d.departure, d.destination, d.date, d.time, layout_named(d.layout).capacity)
         daily_list.append({
             'id': d.id,
             'date': d.date,
@@ -1222,23 +2601,147 @@ def uploaded_file(filename):
     return send_from_directory(uploads_dir, filename, as_attachment=True)
 
 
+PAYMENT_QUEUE_STATUSES = ['pending', 'redirected']
+PAYMENT_QUEUE_PAGE_SIZE = 50
+BULK_CONFIRM_LIMIT = 500
+
+
+def payment_queue_criteria():
+    """
+    Bookings an admin has to look at: payments still to be confirmed (even after the
+    seat hold ran out) and payments that arrived after the hold had expired
+    """
+    return [db.or_(
+        db.and_(FerryBooking.payment_status.in_(PAYMENT_QUEUE_STATUSES), FerryBooking.status != 'cancelled'),
+        db.and_(FerryBooking.payment_status == 'paid', FerryBooking.status == 'expired'),
+    )]
+
+
+def in_payment_queue(booking):
+    if booking.status == 'cancelled':
+        return False
+    return booking.payment_status in PAYMENT_QUEUE_STATUSES or (
+        booking.payment_status == 'paid' and booking.status == 'expired')
+
+
 @app.route('/admin/payments')
 @admin_required
 def admin_payments():
-    bookings = FerryBooking.query.filter(FerryBooking.payment_status.in_(['pending','redirected'])).order_by(FerryBooking.created_at.desc()).all()
-    return render_template('admin/payments.html', bookings=bookings)
+    """
+    Payment review queue, oldest first, keyset-paginated on (created_at, id). Rows
+    whose hold has run out are flagged; confirming them re-checks capacity.
+    """
+    criteria = payment_queue_criteria()
+    query = FerryBooking.query.filter(*criteria)
+    after = decode_cursor(request.args.get('after'))
+    if after:
+        created, bid = after
+        query = query.filter(db.or_(
+            FerryBooking.created_at > created,
+            db.and_(FerryBooking.created_at == created, FerryBooking.id > bid)
+        ))
+    rows = query.order_by(FerryBooking.created_at.asc(), FerryBooking.id.asc()).limit(PAYMENT_QUEUE_PAGE_SIZE + 1).all()
+    next_cursor = None
+    if len(rows) > PAYMENT_QUEUE_PAGE_SIZE:
+        rows = rows[:PAYMENT_QUEUE_PAGE_SIZE]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    total, total_is_estimate = estimated_booking_count(criteria)
+    return render_template(
+        'admin/payments.html',
+        bookings=rows,
+        next_cursor=next_cursor,
+        first_page=after is None,
+        total=total,
+        total_is_estimate=total_is_estimate
+    )
+
+
+@app.route('/admin/payments/<int:id>.json')
+@admin_required
+def admin_payment_row(id):
+    """One queue row for the live payments page (events carry no contact or payment details)"""
+    b = FerryBooking.query.get_or_404(id)
+    return jsonify(dict(b.as_dict(), payment_method=b.payment_method, payment_status=b.payment_status,
+                        payment_info=b.payment_info, hold_expired=b.hold_expired, in_queue=in_payment_queue(b)))
 
 
 @app.route('/admin/payments/<int:id>/confirm', methods=['POST'])
 @admin_required
 def admin_confirm_payment(id):
     b = FerryBooking.query.get_or_404(id)
+    if b.status == 'cancelled':
+        flash(f'Booking {b.booking_reference} is cancelled.', 'warning')
+        return redirect(url_for('admin_payments'))
+    if not confirm_hold(b):
+        db.session.rollback()
+        flash(f'The seat hold for {b.booking_reference} expired and its sailing no longer has room. '
+              'Rebook or refund the customer.', 'danger')
+        return redirect(url_for('admin_payments'))
     b.payment_status = 'paid'
+    record_booking_event('payment_status_changed', b)
     db.session.commit()
+    queue_receipt(b)
     flash('Payment marked as paid.', 'success')
     return redirect(url_for('admin_payments'))
 
 
+def confirm_payments(ids):
+    """
+    Mark every still-pending booking in `ids` as paid (confirming live holds) with
+    one UPDATE, logging a payment_status_changed event per row with one batched
+    INSERT, then queues their receipts. Queue rows whose hold has run out are
+    reinstated one by one where their sailings still have room. Returns the count.
+    """
+    criteria = [FerryBooking.id.in_(ids), *payment_queue_criteria()]
+    rows = db.session.query(*booking_event_columns()).filter(
+        *criteria, FerryBooking.payment_status.in_(PAYMENT_QUEUE_STATUSES), *active_booking_criteria()
+    ).with_for_update().all()
+    confirmed = [r.id for r in rows]
+
+    if rows:
+        db.session.execute(
+            FerryBooking.__table__.update()
+            .where(FerryBooking.__table__.c.id.in_(confirmed))
+            .values(payment_status='paid', status='confirmed', hold_expires_at=None)
+        )
+        events = []
+        for r in rows:
+            previous = r.payment_status
+            paid = SimpleNamespace(**{**r._asdict(), 'payment_status': 'paid'})
+            events.append(booking_event_values('payment_status_changed', paid, previous))
+        db.session.execute(BookingEvent.__table__.insert(), events)
+
+    lapsed = FerryBooking.query.filter(*criteria, FerryBooking.id.notin_(confirmed)) \
+        .order_by(FerryBooking.created_at, FerryBooking.id).with_for_update().all()
+    for booking in lapsed:
+        if reinstate_booking(booking):
+            booking.payment_status = 'paid'
+            record_booking_event('payment_status_changed', booking)
+            confirmed.append(booking.id)
+    db.session.commit()
+    for booking in FerryBooking.query.filter(FerryBooking.id.in_(confirmed)):
+        queue_receipt(booking)
+    return len(confirmed)
+
+
+@app.route('/admin/payments/confirm', methods=['POST'])
+@admin_required
+def admin_bulk_confirm_payments():
+    """Confirm the selected bookings in the payment queue in one statement"""
+    ids = list(dict.fromkeys(int(i) for i in request.form.getlist('ids') if i.isdigit()))[:BULK_CONFIRM_LIMIT]
+    if not ids:
+        flash('Select at least one booking to confirm.', 'warning')
+        return redirect(url_for('admin_payments'))
+    count = confirm_payments(ids)
+    skipped = len(ids) - count
+    message = f'{count} payment(s) marked as paid.'
+    if skipped:
+        message += f' {skipped} were no longer pending or their expired hold no longer fits the sailing.'
+    flash(message, 'success')
+    return redirect(url_for('admin_payments'))
+
+
 @app.route('/create-checkout-session/<ref>')
 def create_checkout_session(ref):
     booking = FerryBooking.query.filter_by(booking_reference=ref).first_or_404()
@@ -1305,7 +2808,13 @@ def stripe_webhook():
             b = FerryBooking.query.filter_by(booking_reference=ref).first()
             if b:
                 b.payment_status = 'paid'
+                if not confirm_hold(b) and b.status == 'held':
+                    # paid after the seats were sold on: stays in the payment queue,
+                    # flagged, for an admin to rebook or refund
+                    b.status = 'expired'
+                record_booking_event('payment_status_changed', b)
                 db.session.commit()
+                queue_receipt(b)
     return '', 200
 
 
@@ -1318,6 +2827,7 @@ def admin_login():
         username = request.form.get('username', '')
         password = request.form.get('password', '')
         if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+            rotate_session_id()
             session['is_admin'] = True
             flash('Welcome, admin!', 'success')
             return redirect(url_for('admin_dashboard'))
@@ -1337,8 +2847,9 @@ def admin_logout():
 @admin_required
 def admin_dashboard():
     """Admin landing: show quick stats"""
-    total_bookings = FerryBooking.query.count()
-    upcoming = FerryBooking.query.filter(FerryBooking.date >= datetime.utcnow().date()).count()
+    active = active_booking_criteria()
+    total_bookings = FerryBooking.query.filter(*active).count()
+    upcoming = FerryBooking.query.filter(FerryBooking.date >= datetime.utcnow().date(), *active).count()
     total_schedules = Schedule.query.count()
     
     # Calculate daily revenue (today) - Database agnostic
@@ -1346,7 +2857,8 @@ def admin_dashboard():
     tomorrow = today + timedelta(days=1)
     daily_revenue = db.session.query(db.func.sum(FerryBooking.total_price)).filter(
         FerryBooking.created_at >= today,
-        FerryBooking.created_at < tomorrow
+        FerryBooking.created_at < tomorrow,
+        *active
     ).scalar() or 0
     
     # Calculate monthly revenue (current month) - Database agnostic
@@ -1361,11 +2873,12 @@ def admin_dashboard():
     
     monthly_revenue = db.session.query(db.func.sum(FerryBooking.total_price)).filter(
         FerryBooking.created_at >= month_start,
-        FerryBooking.created_at < month_end
+        FerryBooking.created_at < month_end,
+        *active
     ).scalar() or 0
     
     # Total all-time revenue
-    total_revenue = db.session.query(db.func.sum(FerryBooking.total_price)).scalar() or 0
+    total_revenue = db.session.query(db.func.sum(FerryBooking.total_price)).filter(*active).scalar() or 0
     
     return render_template(
         'admin/dashboard.html',
@@ -1378,6 +2891,65 @@ def admin_dashboard():
     )
 
 
+_event_stream_slots = threading.BoundedSemaphore(EVENT_STREAM_SLOTS)
+
+
+@app.route('/admin/events')
+@admin_required
+def admin_events():
+    """
+    Server-Sent Events stream of committed BookingEvent rows.
+    Polls the booking_events table (so it works across gunicorn workers) and
+    releases the DB connection between polls.
+    """
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    try:
+        last_id = int(last_id)
+    except (TypeError, ValueError):
+        # fresh connection - start from now, don't replay history
+        last_id = db.session.query(db.func.coalesce(db.func.max(BookingEvent.id), 0)).scalar()
+    db.session.close()
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    retry_ms = int(EVENT_POLL_INTERVAL * 1000)
+
+    def stream():
+        if not _event_stream_slots.acquire(blocking=False):
+            # every stream slot in this process is busy - ask the browser to come back later
+            yield f'retry: {retry_ms * 15}\n\n'
+            return
+        cursor = last_id
+        try:
+            yield f'retry: {retry_ms}\n\n'
+            deadline = time.monotonic() + EVENT_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                rows = db.session.query(BookingEvent.id, BookingEvent.kind, BookingEvent.payload).filter(
+                    BookingEvent.id > cursor
+                ).order_by(BookingEvent.id).limit(100).all()
+                db.session.close()
+
+                for row in rows:
+                    cursor = row.id
+                    yield f'id: {row.id}\nevent: {row.kind}\ndata: {row.payload}\n\n'
+                if not rows:
+                    yield ': keepalive\n\n'
+                    time.sleep(EVENT_POLL_INTERVAL)
+        finally:
+            _event_stream_slots.release()
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers=headers)
+
+
+@app.cli.command('prune-events')
+@click.option('--days', default=7, show_default=True, help='Delete booking events older than this.')
+def prune_events(days):
+    """Delete old rows from the booking_events log"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = BookingEvent.query.filter(BookingEvent.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    print(f"Deleted {deleted} booking events older than {days} days.")
+
+
 @app.route('/admin/reports')
 @admin_required
 def admin_reports():
@@ -1481,11 +3053,382 @@ def admin_reports():
     )
 
 
+ADMIN_BOOKINGS_PAGE_SIZE = 50
+ADMIN_BOOKINGS_COUNT_CAP = 10000
+PAYMENT_STATUSES = ['pending', 'redirected', 'paid']
+
+
+def encode_cursor(created_at, booking_id):
+    """Opaque keyset cursor for a (created_at, id) position"""
+    raw = f"{created_at.isoformat()}|{booking_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; returns (created_at, id) or None if malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_str, id_str = raw.split('|', 1)
+        return datetime.fromisoformat(created_str), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def booking_filters_from_args(args):
+    """
+    Parse the admin booking filters (route, travel date range, payment status, search)
+    from a request args mapping. Returns (filters dict for the template, SQL criteria list);
+    the free-text `q` is not turned into SQL criteria.
+    """
+    filters = {
+        'departure': args.get('departure', ''),
+        'destination': args.get('destination', ''),
+        'date_from': args.get('date_from', ''),
+        'date_to': args.get('date_to', ''),
+        'payment_status': args.get('payment_status', ''),
+        'q': args.get('q', '').strip(),
+    }
+    criteria = []
+    if filters['departure']:
+        criteria.append(FerryBooking.departure == filters['departure'])
+    if filters['destination']:
+        criteria.append(FerryBooking.destination == filters['destination'])
+    if filters['date_from']:
+        try:
+            criteria.append(FerryBooking.date >= datetime.strptime(filters['date_from'], '%Y-%m-%d').date())
+        except ValueError:
+            filters['date_from'] = ''
+    if filters['date_to']:
+        try:
+            criteria.append(FerryBooking.date <= datetime.strptime(filters['date_to'], '%Y-%m-%d').date())
+        except ValueError:
+            filters['date_to'] = ''
+    if filters['payment_status'] == 'none':
+        criteria.append(FerryBooking.payment_status.is_(None))
+    elif filters['payment_status']:
+        criteria.append(FerryBooking.payment_status == filters['payment_status'])
+    # filters['q'] is handled by the search index (see search_booking_ids)
+    return filters, criteria
+
+
+def estimated_booking_count(criteria):
+    """
+    Cheap row count for the admin list header.
+    Unfiltered on MySQL this is the InnoDB table statistic; otherwise an exact count
+    capped at ADMIN_BOOKINGS_COUNT_CAP. Returns (count, is_estimate).
+    """
+    if not criteria and db.engine.dialect.name == 'mysql':
+        rows = db.session.execute(db.text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ferry_bookings'"
+        )).scalar()
+        if rows is not None:
+            return int(rows), True
+
+    capped = db.session.query(FerryBooking.id).filter(*criteria).limit(ADMIN_BOOKINGS_COUNT_CAP + 1).subquery()
+    count = db.session.query(db.func.count()).select_from(capped).scalar()
+    return min(count, ADMIN_BOOKINGS_COUNT_CAP), count > ADMIN_BOOKINGS_COUNT_CAP
+
+
 @app.route('/admin/bookings')
 @admin_required
 def admin_bookings():
-    bookings_list = FerryBooking.query.order_by(FerryBooking.created_at.desc()).all()
-    return render_template('admin/bookings.html', bookings=bookings_list)
+    """
+    Bookings list, newest first, keyset-paginated on (created_at, id).
+    `after` pages towards older bookings, `before` back towards newer ones.
+    """
+    filters, criteria = booking_filters_from_args(request.args)
+    active_filters = {k: v for k, v in filters.items() if v}
+
+    if filters['q']:
+        # ranked search results replace the chronological listing
+        ranked_ids = search_booking_ids(filters['q'], ADMIN_BOOKINGS_PAGE_SIZE, criteria)
+        found = {}
+        if ranked_ids:
+            found = {b.id: b for b in FerryBooking.query.filter(FerryBooking.id.in_(ranked_ids), *criteria)}
+        rows = [found[i] for i in ranked_ids if i in found][:ADMIN_BOOKINGS_PAGE_SIZE]
+        return render_template(
+            'admin/bookings.html',
+            bookings=rows,
+            filters=filters,
+            active_filters=active_filters,
+            next_cursor=None,
+            prev_cursor=None,
+            total=len(rows),
+            total_is_estimate=False,
+            ports=PORTS,
+            payment_statuses=PAYMENT_STATUSES
+        )
+
+    after = decode_cursor(request.args.get('after'))
+    before = decode_cursor(request.args.get('before'))
+
+    query = FerryBooking.query.filter(*criteria)
+    if before:
+        created, bid = before
+        query = query.filter(db.or_(
+            FerryBooking.created_at > created,
+            db.and_(FerryBooking.created_at == created, FerryBooking.id > bid)
+        )).order_by(FerryBooking.created_at.asc(), FerryBooking.id.asc())
+    else:
+        if after:
+            created, bid = after
+            query = query.filter(db.or_(
+                FerryBooking.created_at < created,
+                db.and_(FerryBooking.created_at == created, FerryBooking.id < bid)
+            ))
+        query = query.order_by(FerryBooking.created_at.desc(), FerryBooking.id.desc())
+
+    # fetch one extra row to learn whether another page exists
+    rows = query.limit(ADMIN_BOOKINGS_PAGE_SIZE + 1).all()
+    has_more = len(rows) > ADMIN_BOOKINGS_PAGE_SIZE
+    rows = rows[:ADMIN_BOOKINGS_PAGE_SIZE]
+    if before:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or before:
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        if after or (before and has_more):
+            prev_cursor = encode_cursor(rows[0].created_at, rows[0].id)
+
+    total, total_is_estimate = estimated_booking_count(criteria)
+
+    return render_template(
+        'admin/bookings.html',
+        bookings=rows,
+        filters=filters,
+        active_filters=active_filters,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        ports=PORTS,
+        payment_statuses=PAYMENT_STATUSES
+    )
+
+
+@app.route('/admin/bookings/search')
+@admin_required
+def admin_bookings_search():
+    """JSON quick lookup by partial reference, name, email or phone"""
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    ids = search_booking_ids(request.args.get('q', ''), limit)
+    found = {b.id: b for b in FerryBooking.query.filter(FerryBooking.id.in_(ids))} if ids else {}
+    return jsonify({
+        'backend': search_backend(),
+        'results': [found[i].as_dict() for i in ids if i in found]
+    })
+
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_HEADER = ['Booking Ref', 'Name', 'Email', 'Phone', 'Departure', 'Destination',
+                 'Date', 'Time', 'Seats', 'Total Price', 'Payment Status', 'Created At']
+EXPORT_COLUMNS = [
+    FerryBooking.id, FerryBooking.booking_reference, FerryBooking.name, FerryBooking.email,
+    FerryBooking.phone, FerryBooking.departure, FerryBooking.destination, FerryBooking.date,
+    FerryBooking.time, FerryBooking.seats, FerryBooking.total_price, FerryBooking.payment_status,
+    FerryBooking.created_at,
+]
+
+
+def iter_booking_batches(criteria, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield lists of projected booking rows matching `criteria`, in id order.
+    Keyset batches on the primary key keep memory flat however large the table is.
+    """
+    last_id = 0
+    while True:
+        batch = db.session.query(*EXPORT_COLUMNS).filter(
+            FerryBooking.id > last_id, *criteria
+        ).order_by(FerryBooking.id).limit(batch_size).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def booking_csv_row(b):
+    return [
+        b.booking_reference, b.name, b.email, b.phone,
+        b.departure, b.destination, b.date, b.time,
+        b.seats, b.total_price, b.payment_status or 'N/A',
+        b.created_at.strftime('%Y-%m-%d %H:%M:%S') if b.created_at else ''
+    ]
+
+
+def stream_bookings_csv(criteria, compress=False):
+    """Generator of CSV (optionally gzip) chunks, one chunk per batch of bookings"""
+    from io import StringIO
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return gz.compress(data) if gz else data
+
+    writer.writerow(EXPORT_HEADER)
+    for batch in iter_booking_batches(criteria):
+        writer.writerows(booking_csv_row(b) for b in batch)
+        chunk = flush()
+        if chunk:
+            yield chunk
+    tail = flush()
+    if gz:
+        tail += gz.flush()
+    if tail:
+        yield tail
+
+
+@app.route('/admin/bookings/export')
+@admin_required
+def admin_export_bookings():
+    """
+    Stream bookings as CSV. Accepts the same route / travel date / payment status
+    filters as /admin/bookings, plus gzip=1 for a compressed download.
+    """
+    _, criteria = booking_filters_from_args(request.args)
+    compress = request.args.get('gzip') == '1'
+    filename = f'bookings_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    headers = {'X-Accel-Buffering': 'no'}
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    else:
+        mimetype = 'text/csv'
+    headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return Response(stream_with_context(stream_bookings_csv(criteria, compress)), mimetype=mimetype, headers=headers)
+
+
+# updated_at is set when a row is written, not when its transaction commits, so a
+# long transaction (bulk archive, hold reaper, group insert) can commit rows stamped
+# before the watermark. Each run therefore re-reads CHANGES_EXPORT_OVERLAP_SECONDS
+# behind the watermark and skips rows whose (id, updated_at) it already sent. The
+# overlap must be longer than any booking transaction.
+CHANGES_EXPORT_OVERLAP_SECONDS = int(os.getenv('CHANGES_EXPORT_OVERLAP_SECONDS', 900))
+CHANGES_EXPORT_COLUMNS = EXPORT_COLUMNS + [
+    FerryBooking.payment_method, FerryBooking.is_roundtrip, FerryBooking.return_date,
+    FerryBooking.return_time, FerryBooking.updated_at,
+]
+
+
+def booking_change_record(b):
+    """JSON-ready dict for one exported row"""
+    return {
+        'booking_reference': b.booking_reference,
+        'name': b.name,
+        'email': b.email,
+        'phone': b.phone,
+        'departure': b.departure,
+        'destination': b.destination,
+        'date': b.date.isoformat(),
+        'time': b.time,
+        'seats': b.seats,
+        'total_price': b.total_price,
+        'payment_method': b.payment_method,
+        'payment_status': b.payment_status,
+        'is_roundtrip': bool(b.is_roundtrip),
+        'return_date': b.return_date.isoformat() if b.return_date else None,
+        'return_time': b.return_time,
+        'created_at': b.created_at.isoformat() if b.created_at else None,
+        'updated_at': b.updated_at.isoformat(),
+    }
+
+
+def stream_booking_changes(consumer, fmt='ndjson', reset=False):
+    """
+    Generator of NDJSON or CSV chunks holding the bookings created or modified since
+    `consumer`'s watermark. The watermark only advances once the last chunk has been
+    consumed, so an interrupted transfer is simply re-sent next time.
+    """
+    from io import StringIO
+    overlap = timedelta(seconds=CHANGES_EXPORT_OVERLAP_SECONDS)
+    wm = ExportWatermark.query.filter_by(consumer=consumer).first()
+    since_at, since_id = (None, 0) if (reset or not wm) else (wm.last_updated_at, wm.last_id)
+    sent = set()
+    if since_at and wm.recent_keys:
+        sent = {(bid, at) for bid, at in json.loads(wm.recent_keys)}
+    db.session.close()
+
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        writer.writerow(EXPORT_HEADER + ['Updated At'])
+
+    last = None
+    newest = (since_at, since_id) if since_at else None
+    while True:
+        query = db.session.query(*CHANGES_EXPORT_COLUMNS)
+        if last:
+            at, bid = last
+            query = query.filter(db.or_(
+                FerryBooking.updated_at > at,
+                db.and_(FerryBooking.updated_at == at, FerryBooking.id > bid)
+            ))
+        elif since_at:
+            query = query.filter(FerryBooking.updated_at >= since_at - overlap)
+        batch = query.order_by(FerryBooking.updated_at, FerryBooking.id).limit(EXPORT_BATCH_SIZE).all()
+        db.session.close()
+        if not batch:
+            break
+        last = (batch[-1].updated_at, batch[-1].id)
+        for b in batch:
+            key = (b.id, b.updated_at.isoformat())
+            if key in sent:
+                continue
+            sent.add(key)
+            if newest is None or (b.updated_at, b.id) > newest:
+                newest = (b.updated_at, b.id)
+            if fmt == 'csv':
+                writer.writerow(booking_csv_row(b) + [b.updated_at.strftime('%Y-%m-%d %H:%M:%S')])
+            else:
+                buffer.write(json.dumps(booking_change_record(b)) + '\n')
+        if buffer.tell():
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+    # whole delta delivered - move the watermark
+    wm = ExportWatermark.query.filter_by(consumer=consumer).first()
+    if not wm:
+        wm = ExportWatermark(consumer=consumer, last_id=0)
+        db.session.add(wm)
+    if newest:
+        wm.last_updated_at, wm.last_id = newest
+        horizon = (newest[0] - overlap).isoformat()
+        wm.recent_keys = json.dumps(sorted([bid, at] for bid, at in sent if at >= horizon))
+    elif reset:
+        wm.last_updated_at, wm.last_id, wm.recent_keys = None, 0, None
+    wm.last_run_at = datetime.utcnow()
+    db.session.commit()
+
+
+@app.route('/admin/bookings/export/changes')
+@admin_required
+def admin_export_booking_changes():
+    """
+    Incremental export for a named consumer: ?consumer=accounting&format=ndjson|csv
+    Add reset=1 to start again from the full history.
+    """
+    consumer = request.args.get('consumer', '').strip()
+    fmt = request.args.get('format', 'ndjson')
+    if not consumer or fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'consumer and format (ndjson|csv) are required'}), 400
+
+    ext, mimetype = ('csv', 'text/csv') if fmt == 'csv' else ('ndjson', 'application/x-ndjson')
+    filename = f'bookings_{secure_filename(consumer)}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{ext}'
+    headers = {'Content-Disposition': f'attachment; filename={filename}', 'X-Accel-Buffering': 'no'}
+    body = stream_booking_changes(consumer, fmt, reset=request.args.get('reset') == '1')
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
 
 
 @app.route('/admin/schedules', methods=['GET', 'POST'])
@@ -1497,9 +3440,15 @@ def admin_schedules():
         destination = request.form.get('destination')
         time_str = request.form.get('time')
         date_str = request.form.get('date')
+        layout = request.form.get('layout') or None
+        if layout == DEFAULT_LAYOUT:
+            layout = None
         if not (departure and destination and time_str):
             flash('Missing fields for schedule.', 'danger')
             return redirect(url_for('admin_schedules'))
+        if layout is not None and layout not in vessel_layouts():
+            flash('Unknown vessel layout.', 'danger')
+            return redirect(url_for('admin_schedules'))
 
         # If a date was provided, create a date-specific DailySchedule
         if date_str:
@@ -1511,7 +3460,8 @@ def admin_schedules():
 
             ds_exists = DailySchedule.query.filter_by(departure=departure, destination=destination, date=target_date, time=time_str).first()
             if not ds_exists:
-                daily = DailySchedule(departure=departure, destination=destination, date=target_date, time=time_str, active=True)
+                daily = DailySchedule(departure=departure, destination=destination, date=target_date, time=time_str,
+                                      active=True, layout=layout)
                 db.session.add(daily)
                 db.session.commit()
                 flash('Daily schedule added for ' + target_date.isoformat(), 'success')
@@ -1520,7 +3470,7 @@ def admin_schedules():
             return redirect(url_for('admin_schedules'))
 
         # otherwise create recurring schedule
-        schedule = Schedule(departure=departure, destination=destination, time=time_str, active=True)
+        schedule = Schedule(departure=departure, destination=destination, time=time_str, active=True, layout=layout)
         db.session.add(schedule)
         db.session.commit()
         flash('Schedule added.', 'success')
@@ -1530,7 +3480,31 @@ def admin_schedules():
     schedules = Schedule.query.order_by(Schedule.departure, Schedule.destination, Schedule.time).all()
     # fetch upcoming daily schedules
     daily_schedules = DailySchedule.query.order_by(DailySchedule.date, DailySchedule.departure, DailySchedule.time).all()
-    return render_template('admin/schedules.html', schedules=schedules, daily_schedules=daily_schedules, ports=PORTS)
+    return render_template('admin/schedules.html', schedules=schedules, daily_schedules=daily_schedules, ports=PORTS,
+                           layouts=vessel_layouts(), default_layout=DEFAULT_LAYOUT)
+
+
+def set_schedule_layout(schedule):
+    layout = request.form.get('layout') or None
+    if layout is not None and layout not in vessel_layouts():
+        flash('Unknown vessel layout.', 'danger')
+    else:
+        schedule.layout = None if layout == DEFAULT_LAYOUT else layout
+        db.session.commit()
+        flash('Vessel layout updated.', 'success')
+    return redirect(url_for('admin_schedules'))
+
+
+@app.route('/admin/schedules/<int:id>/layout', methods=['POST'])
+@admin_required
+def admin_schedule_layout(id):
+    return set_schedule_layout(Schedule.query.get_or_404(id))
+
+
+@app.route('/admin/daily-schedules/<int:id>/layout', methods=['POST'])
+@admin_required
+def admin_daily_schedule_layout(id):
+    return set_schedule_layout(DailySchedule.query.get_or_404(id))
 
 
 @app.route('/admin/daily-schedules/<int:id>/delete', methods=['POST'])
@@ -1557,12 +3531,674 @@ def admin_schedule_delete(id):
 @admin_required
 def admin_cancel_booking(id):
     b = FerryBooking.query.get_or_404(id)
-    db.session.delete(b)
+    if b.status in ('cancelled', 'expired'):
+        flash('This booking is no longer active.', 'info')
+        return redirect(url_for('admin_bookings'))
+    b.status = 'cancelled'
+    b.hold_expires_at = None
+    record_booking_event('booking_cancelled', b)
     db.session.commit()
+    receipt_cache.discard(id)
     flash('Booking cancelled.', 'success')
     return redirect(url_for('admin_bookings'))
 
 
+def sailing_legs(dep, dest, sailing_date, sailing_time):
+    """
+    (outbound, return) criteria for active bookings travelling on one sailing:
+    outbound legs booked dep -> dest, and round-trip return legs booked dest -> dep.
+    """
+    outbound = sailing_criteria(dep, dest, sailing_date, sailing_time)
+    return_legs = [
+        FerryBooking.date <= sailing_date,
+        FerryBooking.departure == dest,
+        FerryBooking.destination == dep,
+        FerryBooking.return_date == sailing_date,
+        FerryBooking.return_time == sailing_time,
+        *active_booking_criteria(),
+    ]
+    return outbound, return_legs
+
+
+def _leg_totals(criteria):
+    count, seats = db.session.query(
+        db.func.count(FerryBooking.id), db.func.coalesce(db.func.sum(FerryBooking.seats), 0)
+    ).filter(*criteria).one()
+    return int(count), int(seats)
+
+
+def cancel_sailing(dep, dest, sailing_date, sailing_time):
+    """
+    Cancel a sailing with one UPDATE per leg type and one batched event INSERT.
+    Bookings whose outbound leg is on the sailing are cancelled outright. Round trips
+    that only return on it keep their outbound leg: the return leg is cleared and
+    logged as 'return_leg_cancelled'. Returns a summary dict.
+    """
+    outbound, return_legs = sailing_legs(dep, dest, sailing_date, sailing_time)
+    outbound_totals = _leg_totals(outbound)
+    return_totals = _leg_totals(return_legs)
+
+    outbound_rows = db.session.query(*booking_event_columns()).filter(*outbound).with_for_update().all()
+    return_rows = db.session.query(*booking_event_columns()).filter(*return_legs).with_for_update().all()
+    if outbound_rows:
+        db.session.execute(
+            db.update(FerryBooking).where(FerryBooking.id.in_([r.id for r in outbound_rows]))
+            .values(status='cancelled').execution_options(synchronize_session=False)
+        )
+    if return_rows:
+        db.session.execute(
+            db.update(FerryBooking).where(FerryBooking.id.in_([r.id for r in return_rows]))
+            .values(return_date=None, return_time=None, return_selected_seats=None)
+            .execution_options(synchronize_session=False)
+        )
+    events = [booking_event_values('booking_cancelled', r, r.payment_status) for r in outbound_rows]
+    events += [booking_event_values('return_leg_cancelled', r, r.payment_status) for r in return_rows]
+    if events:
+        db.session.execute(BookingEvent.__table__.insert(), events)
+    db.session.commit()
+    return {
+        'action': 'cancelled',
+        'sailing': {'departure': dep, 'destination': dest, 'date': sailing_date.isoformat(), 'time': sailing_time},
+        'bookings': outbound_totals[0],
+        'passengers': outbound_totals[1],
+        'return_legs': return_totals[0],
+        'return_passengers': return_totals[1],
+    }
+
+
+def deactivate_sailing(dep, dest, sailing_date, sailing_time):
+    """
+    Take one sailing off the schedule: its DailySchedule entries are deactivated, or an
+    inactive entry is added when the sailing only comes from the recurring schedule
+    (see scheduled_sailings). Left for the caller to commit.
+    """
+    updated = db.session.execute(
+        db.update(DailySchedule).where(
+            DailySchedule.departure == dep, DailySchedule.destination == dest,
+            DailySchedule.date == sailing_date, DailySchedule.time == sailing_time,
+        ).values(active=False).execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated:
+        db.session.add(DailySchedule(departure=dep, destination=dest, date=sailing_date,
+                                     time=sailing_time, active=False))
+
+
+def move_sailing(dep, dest, sailing_date, sailing_time, target_date, target_time):
+    """
+    Move every booking on a sailing to another sailing of the same route.
+    The target must be scheduled, and capacity is checked for the whole group up
+    front (all or nothing). Each booking then gets seats on the new sailing through
+    assign_seats, in booking order, around the seats already taken there. Raises
+    ValueError when the target is not running or cannot take everyone, or when it
+    would put a round trip's outbound leg after its return leg. Moves are logged as
+    'booking_moved' events. Returns a summary dict.
+    """
+    layout_name = scheduled_sailings(dep, dest, target_date).get(target_time, False)
+    if layout_name is False:
+        raise ValueError(f'No {dep} → {dest} sailing is scheduled for {target_date.isoformat()} {target_time}.')
+
+    outbound, return_legs = sailing_legs(dep, dest, sailing_date, sailing_time)
+
+    # lock the legs being moved so a concurrent change cannot slip in between
+    moving = db.session.query(FerryBooking.id, FerryBooking.seats, FerryBooking.departure).filter(
+        db.or_(db.and_(*outbound), db.and_(*return_legs))
+    ).order_by(FerryBooking.created_at, FerryBooking.id).with_for_update().all()
+    moving_ids = [r.id for r in moving]
+    # HH:MM strings compare in time order
+    inverted = db.session.query(db.func.count(FerryBooking.id)).filter(db.or_(
+        db.and_(*outbound, FerryBooking.return_date.isnot(None), db.or_(
+            FerryBooking.return_date < target_date,
+            db.and_(FerryBooking.return_date == target_date, FerryBooking.return_time <= target_time),
+        )),
+        db.and_(*return_legs, db.or_(
+            FerryBooking.date > target_date,
+            db.and_(FerryBooking.date == target_date, FerryBooking.time >= target_time),
+        )),
+    )).scalar()
+    if inverted:
+        raise ValueError(f'{inverted} round trips would travel out after they return; '
+                         f'choose an earlier sailing or move them one by one.')
+
+    outbound_totals = _leg_totals(outbound)
+    return_totals = _leg_totals(return_legs)
+    target = sailing_seat_usage({(dep, dest, target_date, target_time)}, lock=True)[(dep, dest, target_date, target_time)]
+    passengers = outbound_totals[1] + return_totals[1]
+    layout = layout_named(layout_name)
+    if target['booked'] + passengers > layout.capacity:
+        raise ValueError(f"Target sailing has {max(0, layout.capacity - target['booked'])} seats left; "
+                         f'{passengers} passengers need to move.')
+
+    outbound_seats, return_seats = [], []
+    taken = target['taken']
+    for r in moving:
+        seats = assign_seats(taken, r.seats, layout)
+        if seats is None:
+            raise ValueError(f'Target sailing cannot seat booking {r.id} ({r.seats} passengers).')
+        taken.update(seats)
+        (outbound_seats if r.departure == dep else return_seats).append(
+            {'b_id': r.id, 'seat_list': ','.join(str(n) for n in seats)}
+        )
+
+    bookings = FerryBooking.__table__
+    if outbound_seats:
+        db.session.execute(
+            bookings.update().where(bookings.c.id == db.bindparam('b_id'))
+            .values(date=target_date, time=target_time, selected_seats=db.bindparam('seat_list')),
+            outbound_seats,
+        )
+    if return_seats:
+        db.session.execute(
+            bookings.update().where(bookings.c.id == db.bindparam('b_id'))
+            .values(return_date=target_date, return_time=target_time, return_selected_seats=db.bindparam('seat_list')),
+            return_seats,
+        )
+    if moving_ids:
+        moved = db.session.query(*booking_event_columns()).filter(FerryBooking.id.in_(moving_ids)).all()
+        db.session.execute(BookingEvent.__table__.insert(), [
+            booking_event_values('booking_moved', r, r.payment_status) for r in moved
+        ])
+    db.session.commit()
+    return {
+        'action': 'moved',
+        'sailing': {'departure': dep, 'destination': dest, 'date': sailing_date.isoformat(), 'time': sailing_time},
+        'target': {'date': target_date.isoformat(), 'time': target_time},
+        'bookings': outbound_totals[0],
+        'passengers': outbound_totals[1],
+        'return_legs': return_totals[0],
+        'return_passengers': return_totals[1],
+    }
+
+
+@app.route('/admin/sailings/cancel', methods=['POST'])
+@admin_required
+def admin_cancel_sailing():
+    """
+    Cancel a whole sailing (route + date + time, or a DailySchedule id). With
+    move_date/move_time the passengers are moved to that sailing instead.
+    Responds with JSON when the client asks for it, otherwise flashes a summary.
+    """
+    wants_json = request.accept_mimetypes.best == 'application/json'
+
+    def error(message, status=400):
+        if wants_json:
+            return jsonify({'error': message}), status
+        flash(message, 'danger')
+        return redirect(url_for('admin_schedules'))
+
+    if request.form.get('daily_schedule_id'):
+        daily = DailySchedule.query.get_or_404(request.form.get('daily_schedule_id', type=int))
+        dep, dest, sailing_date, sailing_time = daily.departure, daily.destination, daily.date, daily.time
+    else:
+        dep = request.form.get('departure')
+        dest = request.form.get('destination')
+        sailing_time = request.form.get('time')
+        try:
+            sailing_date = datetime.strptime(request.form.get('date', ''), '%Y-%m-%d').date()
+        except ValueError:
+            sailing_date = None
+        if not (dep and dest and sailing_time and sailing_date):
+            return error('Choose the route, date and time of the sailing.')
+
+    move_date = None
+    move_time = request.form.get('move_time')
+    if request.form.get('move_date') or move_time:
+        try:
+            move_date = datetime.strptime(request.form.get('move_date', ''), '%Y-%m-%d').date()
+        except ValueError:
+            move_date = None
+        if not (move_date and move_time) or (move_date, move_time) == (sailing_date, sailing_time):
+            return error('Choose a different date and time to move passengers to.')
+
+    try:
+        # the sailing itself no longer runs; committed together with the bookings
+        deactivate_sailing(dep, dest, sailing_date, sailing_time)
+        if move_date:
+            summary = move_sailing(dep, dest, sailing_date, sailing_time, move_date, move_time)
+        else:
+            summary = cancel_sailing(dep, dest, sailing_date, sailing_time)
+    except ValueError as e:
+        db.session.rollback()
+        return error(str(e), 409)
+
+    if wants_json:
+        return jsonify(summary)
+
+    label = f"{dep} → {dest} {sailing_date.isoformat()} {sailing_time}"
+    if summary['action'] == 'moved':
+        flash(f"Moved {summary['bookings']} bookings ({summary['passengers']} passengers) and "
+              f"{summary['return_legs']} return legs from {label} to {move_date.isoformat()} {move_time}. "
+              f"Passengers were given seats on the new sailing.", 'success')
+    else:
+        flash(f"Cancelled {label}: {summary['bookings']} bookings ({summary['passengers']} passengers). "
+              f"{summary['return_legs']} round trips returning on it lost their return leg and keep their outbound trip.",
+              'success')
+    return redirect(url_for('admin_schedules'))
+
+
+# -----------------------
+# Passenger manifests and bulk receipts
+# -----------------------
+MANIFEST_COLUMNS = [
+    FerryBooking.id, FerryBooking.booking_reference, FerryBooking.name, FerryBooking.phone,
+    FerryBooking.departure, FerryBooking.destination, FerryBooking.time, FerryBooking.seats,
+    FerryBooking.selected_seats, FerryBooking.return_time, FerryBooking.return_selected_seats,
+    FerryBooking.payment_status,
+]
+
+
+def manifest_criteria(sailing_date, dep=None, dest=None, sailing_time=None):
+    """
+    (outbound, return) criteria for every active leg travelling on `sailing_date`,
+    optionally narrowed to one route and/or departure time. Return legs are
+    matched on the reversed route, as in sailing_legs().
+    """
+    outbound = [FerryBooking.date == sailing_date, *active_booking_criteria()]
+    return_legs = [FerryBooking.date <= sailing_date, FerryBooking.return_date == sailing_date,
+                   *active_booking_criteria()]
+    if dep:
+        outbound.append(FerryBooking.departure == dep)
+        return_legs.append(FerryBooking.destination == dep)
+    if dest:
+        outbound.append(FerryBooking.destination == dest)
+        return_legs.append(FerryBooking.departure == dest)
+    if sailing_time:
+        outbound.append(FerryBooking.time == sailing_time)
+        return_legs.append(FerryBooking.return_time == sailing_time)
+    return outbound, return_legs
+
+
+def manifest_legs(sailing_date, dep=None, dest=None, sailing_time=None):
+    """
+    Passenger legs on the selected sailings as SimpleNamespace(sailing, booking,
+    seats, leg), ordered by departure time, route and passenger name.
+    `sailing` is (departure, destination, time) as the ferry actually runs.
+    """
+    outbound, return_legs = manifest_criteria(sailing_date, dep, dest, sailing_time)
+    legs = [
+        SimpleNamespace(sailing=(b.departure, b.destination, b.time), booking=b,
+                        seats=b.selected_seats, leg='Outbound')
+        for b in db.session.query(*MANIFEST_COLUMNS).filter(*outbound)
+    ]
+    legs += [
+        SimpleNamespace(sailing=(b.destination, b.departure, b.return_time), booking=b,
+                        seats=b.return_selected_seats, leg='Return')
+        for b in db.session.query(*MANIFEST_COLUMNS).filter(*return_legs)
+    ]
+    legs.sort(key=lambda l: (l.sailing[2], l.sailing[0], l.sailing[1], l.booking.name.lower()))
+    return legs
+
+
+def manifest_pdf(sailing_date, legs):
+    """Printable boarding manifest: one page per sailing, passengers in a table"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=30, rightMargin=30, topMargin=30, bottomMargin=30)
+    title = ParagraphStyle('mt', fontSize=14, leading=18, textColor=colors.HexColor('#0E3A96'))
+    sub = ParagraphStyle('ms', fontSize=8, leading=11, textColor=colors.HexColor('#6B7280'))
+
+    elements = []
+    if not legs:
+        elements.append(Paragraph(f'Passenger Manifest - {sailing_date.strftime("%A, %B %d, %Y")}', title))
+        elements.append(Paragraph('No passengers booked.', sub))
+
+    sailings = {}
+    for leg in legs:
+        sailings.setdefault(leg.sailing, []).append(leg)
+    for n, ((dep, dest, sailing_time), rows) in enumerate(sailings.items()):
+        if n:
+            elements.append(PageBreak())
+        passengers = sum(leg.booking.seats for leg in rows)
+        elements.append(Paragraph(f'Passenger Manifest - {dep} to {dest}', title))
+        elements.append(Paragraph(
+            f'{sailing_date.strftime("%A, %B %d, %Y")} at {sailing_time} &middot; '
+            f'{len(rows)} bookings, {passengers} passengers &middot; printed {datetime.now().strftime("%Y-%m-%d %H:%M")}',
+            sub))
+        elements.append(Spacer(1, 8))
+
+        data = [['#', 'Reference', 'Name', 'Phone', 'Pax', 'Seats', 'Leg', 'Payment', 'Boarded']]
+        for i, leg in enumerate(rows, 1):
+            b = leg.booking
+            data.append([
+                str(i), b.booking_reference, b.name[:32], b.phone, str(b.seats),
+                (leg.seats or '-')[:24], leg.leg, b.payment_status or 'unpaid', '',
+            ])
+        table = Table(data, colWidths=[22, 62, 120, 70, 26, 80, 44, 50, 41], repeatRows=1)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2663EB')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F3F6FB')]),
+            ('GRID', (0, 0), (-1, -1), 0.4, colors.HexColor('#D1D5DB')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        elements.append(table)
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+class _ZipStream:
+    """Write-only file object that hands out what zipfile wrote so far"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def manifest_bookings(sailing_date, dep=None, dest=None, sailing_time=None):
+    """Full booking rows (receipts need every receipt field) for the selected sailings"""
+    outbound, return_legs = manifest_criteria(sailing_date, dep, dest, sailing_time)
+    return FerryBooking.query.filter(db.or_(db.and_(*outbound), db.and_(*return_legs))) \
+        .order_by(FerryBooking.id).all()
+
+
+def stream_receipts_zip(bookings):
+    """
+    Yield a ZIP of the bookings' receipts as it is written. Every receipt is
+    queued on the receipt pool up front (cached ones complete immediately) and
+    added in completion order, so rendering runs on all pool processes while
+    finished files are already being sent. Failures are listed in ERRORS.txt
+    rather than breaking the archive.
+    """
+    pending = {}
+    for b in bookings:
+        _, future = queue_receipt(b)
+        pending[future] = b.booking_reference
+
+    out = _ZipStream()
+    errors = []
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_STORED) as archive:
+        for future in as_completed(pending):
+            ref = pending[future]
+            try:
+                path = future.result()
+            except Exception as e:
+                errors.append(f'{ref}: {e}')
+                continue
+            archive.write(path, arcname=f'OceanLine_Booking_{ref}.pdf')
+            yield out.drain()
+        if errors:
+            archive.writestr('ERRORS.txt', '\n'.join(errors) + '\n')
+    yield out.drain()
+
+
+def manifest_filename(sailing_date, dep=None, dest=None, sailing_time=None, ext='pdf'):
+    parts = [sailing_date.isoformat()] + [p for p in (dep, dest, (sailing_time or '').replace(':', '')) if p]
+    return secure_filename('OceanLine_Manifest_' + '_'.join(parts)) + '.' + ext
+
+
+@app.route('/admin/sailings/manifest')
+@admin_required
+def admin_sailing_manifest():
+    """
+    Manifest PDF (format=pdf) or ZIP of receipts (format=zip) for a sailing or a
+    whole day. Select by daily_schedule_id, or date plus optional departure,
+    destination and time.
+    """
+    if request.args.get('daily_schedule_id'):
+        daily = DailySchedule.query.get_or_404(request.args.get('daily_schedule_id', type=int))
+        dep, dest, sailing_date, sailing_time = daily.departure, daily.destination, daily.date, daily.time
+    else:
+        dep = request.args.get('departure') or None
+        dest = request.args.get('destination') or None
+        sailing_time = request.args.get('time') or None
+        try:
+            sailing_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+        except ValueError:
+            flash('Choose the date of the sailing.', 'danger')
+            return redirect(url_for('admin_schedules'))
+
+    if request.args.get('format') == 'zip':
+        bookings = manifest_bookings(sailing_date, dep, dest, sailing_time)
+        name = manifest_filename(sailing_date, dep, dest, sailing_time, 'zip').replace('Manifest', 'Receipts', 1)
+        return Response(
+            stream_with_context(stream_receipts_zip(bookings)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename={name}'}
+        )
+
+    pdf = manifest_pdf(sailing_date, manifest_legs(sailing_date, dep, dest, sailing_time))
+    return send_file(BytesIO(pdf), mimetype='application/pdf', as_attachment=True,
+                     download_name=manifest_filename(sailing_date, dep, dest, sailing_time))
+
+
+# -----------------------
+# Seat audit
+# -----------------------
+# Nothing in the schema stops two bookings on one sailing from holding the same
+# seat, so `flask audit-seats` (nightly) and /admin/reports/seat-audit look for:
+#   collision      a seat number held by more than one booking (or twice by one)
+#   over_capacity  more passengers than the sailing's vessel layout has seats
+#   seat_count     a booking whose seat list does not match its passenger count
+#   invalid_seat   a seat number that does not exist on the vessel layout
+SEAT_AUDIT_BATCH_SIZE = 5000
+SEAT_AUDIT_PAGE_LIMIT = 500   # issues listed on the admin page; the CSV has all of them
+SEAT_AUDIT_KINDS = ('collision', 'over_capacity', 'seat_count', 'invalid_seat')
+SEAT_AUDIT_HEADER = ['Date', 'Time', 'Departure', 'Destination', 'Issue', 'Seat', 'Bookings', 'Detail']
+
+
+def sailing_layout_resolver(start, end):
+    """
+    sailing_layout() for every sailing between two dates, answered from two
+    up-front queries instead of two per sailing.
+    """
+    layouts = vessel_layouts()
+    daily = {
+        (d.departure, d.destination, d.date, d.time): d.layout
+        for d in db.session.query(DailySchedule.departure, DailySchedule.destination, DailySchedule.date,
+                                  DailySchedule.time, DailySchedule.layout)
+        .filter(DailySchedule.date >= start, DailySchedule.date <= end, DailySchedule.active == True)
+    }
+    recurring = {}
+    for r in db.session.query(Schedule.departure, Schedule.destination, Schedule.time, Schedule.layout) \
+            .filter(Schedule.active == True):
+        recurring.setdefault((r.departure, r.destination, r.time), r.layout)
+
+    def resolve(dep, dest, sailing_date, sailing_time):
+        key = (dep, dest, sailing_date, sailing_time)
+        name = daily[key] if key in daily else recurring.get((dep, dest, sailing_time))
+        return layouts.get(name) or layouts[DEFAULT_LAYOUT]
+    return resolve
+
+
+def _audit_legs(start, end):
+    """
+    Every active booking leg (outbound and round-trip return) travelling between
+    two dates as (departure, destination, date, time, reference, seats, seat list),
+    in date order. One streamed UNION ALL query, so only one batch is held in memory
+    and only one result set is open on the connection (PyMySQL's unbuffered cursor
+    cannot interleave two).
+    """
+    outbound = db.select(
+        FerryBooking.departure.label('departure'), FerryBooking.destination.label('destination'),
+        FerryBooking.date.label('date'), FerryBooking.time.label('time'),
+        FerryBooking.booking_reference, FerryBooking.seats, FerryBooking.selected_seats.label('seat_list')
+    ).where(
+        FerryBooking.date >= start, FerryBooking.date <= end, *active_booking_criteria()
+    )
+    return_legs = db.select(
+        FerryBooking.destination, FerryBooking.departure, FerryBooking.return_date, FerryBooking.return_time,
+        FerryBooking.booking_reference, FerryBooking.seats, FerryBooking.return_selected_seats
+    ).where(
+        # outbound leg is never after the return leg - lets MySQL skip future partitions
+        FerryBooking.date <= end,
+        FerryBooking.return_date >= start, FerryBooking.return_date <= end,
+        FerryBooking.return_time.isnot(None),
+        *active_booking_criteria()
+    )
+    legs = db.union_all(outbound, return_legs).subquery()
+    return db.session.execute(
+        db.select(legs).order_by(legs.c.date).execution_options(yield_per=SEAT_AUDIT_BATCH_SIZE)
+    )
+
+
+def _audit_sailing(sailing, legs, layout):
+    """Issues (dicts) for the legs of one sailing"""
+    dep, dest, sailing_date, sailing_time = sailing
+
+    def issue(kind, detail, bookings, seat=None):
+        return {'date': sailing_date, 'time': sailing_time, 'departure': dep, 'destination': dest,
+                'kind': kind, 'seat': seat, 'bookings': bookings, 'detail': detail}
+
+    issues = []
+    valid = set(layout.seats)
+    holders = {}
+    passengers = 0
+    for _, _, _, _, ref, seats, seat_list in legs:
+        passengers += seats or 0
+        numbers = [n.strip() for n in (seat_list or '').split(',') if n.strip()]
+        if numbers and len(numbers) != seats:
+            issues.append(issue('seat_count', f'{seats} passengers but {len(numbers)} seats assigned', [ref]))
+        for n in numbers:
+            if not n.isdigit() or int(n) not in valid:
+                issues.append(issue('invalid_seat', f'no seat {n} on layout {layout.name}', [ref], n))
+                continue
+            holders.setdefault(int(n), []).append(ref)
+    for seat in sorted(holders):
+        if len(holders[seat]) > 1:
+            refs = list(dict.fromkeys(holders[seat]))
+            detail = f'held by {len(refs)} bookings' if len(refs) > 1 else 'listed twice in one booking'
+            issues.append(issue('collision', detail, refs, seat))
+    if passengers > layout.capacity:
+        issues.append(issue('over_capacity', f'{passengers} passengers for {layout.capacity} seats',
+                            sorted({leg[4] for leg in legs})))
+    return issues
+
+
+def audit_seats(start, end, summary=None):
+    """
+    Yield seat issues for every sailing between `start` and `end` (dates, inclusive),
+    sorted by sailing, in a single pass over the bookings. Only one day's legs are
+    held at a time. If given, `summary` is filled with counts of sailings, legs and
+    issues per kind.
+    """
+    if summary is None:
+        summary = {}
+    summary.update(sailings=0, legs=0, **{kind: 0 for kind in SEAT_AUDIT_KINDS})
+    resolve = sailing_layout_resolver(start, end)
+    for _, day_legs in groupby(_audit_legs(start, end), key=lambda leg: leg[2]):
+        sailings = {}
+        for leg in day_legs:
+            sailings.setdefault(leg[:4], []).append(leg)
+            summary['legs'] += 1
+        # within a day, order by time then route (grouping is done here, not by the
+        # database, so collation differences cannot split a sailing)
+        for sailing in sorted(sailings, key=lambda k: (k[3], k[0], k[1])):
+            summary['sailings'] += 1
+            for found in _audit_sailing(sailing, sailings[sailing], resolve(*sailing)):
+                summary[found['kind']] += 1
+                yield found
+
+
+def seat_audit_row(found):
+    return [found['date'].isoformat(), found['time'], found['departure'], found['destination'], found['kind'],
+            found['seat'] if found['seat'] is not None else '', ' '.join(found['bookings']), found['detail']]
+
+
+def seat_audit_range(args):
+    """(start, end) from ?from=&to= (YYYY-MM-DD); defaults to the next 365 days"""
+    today = datetime.utcnow().date()
+    try:
+        start = datetime.strptime(args.get('from'), '%Y-%m-%d').date() if args.get('from') else today
+        end = datetime.strptime(args.get('to'), '%Y-%m-%d').date() if args.get('to') else start + timedelta(days=365)
+    except ValueError:
+        return None
+    return start, end
+
+
+@app.route('/admin/reports/seat-audit')
+@admin_required
+def admin_seat_audit():
+    """Seat collisions, over-capacity sailings and seat-count mismatches; format=csv streams them all"""
+    dates = seat_audit_range(request.args)
+    if dates is None or dates[0] > dates[1]:
+        flash('Choose a valid date range.', 'danger')
+        return redirect(url_for('admin_seat_audit'))
+    start, end = dates
+
+    if request.args.get('format') == 'csv':
+        def generate():
+            from io import StringIO
+            buffer = StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(SEAT_AUDIT_HEADER)
+            for found in audit_seats(start, end):
+                writer.writerow(seat_audit_row(found))
+                if buffer.tell() > 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        return Response(stream_with_context(generate()), mimetype='text/csv', headers={
+            'Content-Disposition': f'attachment; filename=seat_audit_{start:%Y%m%d}_{end:%Y%m%d}.csv'
+        })
+
+    started = time.perf_counter()
+    summary = {}
+    issues = []
+    for found in audit_seats(start, end, summary):
+        if len(issues) < SEAT_AUDIT_PAGE_LIMIT:
+            issues.append(found)
+    return render_template('admin/seat_audit.html', issues=issues, summary=summary, kinds=SEAT_AUDIT_KINDS,
+                           start=start, end=end, limit=SEAT_AUDIT_PAGE_LIMIT,
+                           total=sum(summary[kind] for kind in SEAT_AUDIT_KINDS),
+                           seconds=time.perf_counter() - started)
+
+
+@app.cli.command('audit-seats')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help='First travel date (default: today).')
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help='Last travel date (default: 365 days on).')
+@click.option('--csv', 'csv_path', type=click.Path(dir_okay=False), help='Also write every issue to this CSV file.')
+@click.option('--quiet', '-q', is_flag=True, help='Only print the summary.')
+def audit_seats_command(date_from, date_to, csv_path, quiet):
+    """Check sailings for double-booked seats and capacity problems; exits 1 if any are found"""
+    start = date_from.date() if date_from else datetime.utcnow().date()
+    end = date_to.date() if date_to else start + timedelta(days=365)
+    started = time.perf_counter()
+    summary = {}
+    out = writer = None
+    if csv_path:
+        out = open(csv_path + '.part', 'w', encoding='utf-8', newline='')
+        writer = csv.writer(out)
+        writer.writerow(SEAT_AUDIT_HEADER)
+    try:
+        for found in audit_seats(start, end, summary):
+            row = seat_audit_row(found)
+            if writer:
+                writer.writerow(row)
+            if not quiet:
+                print(f"{row[0]} {row[1]} {row[2]} -> {row[3]}  {row[4]}"
+                      f"{' seat ' + str(row[5]) if row[5] != '' else ''}: {row[7]} [{row[6]}]")
+    finally:
+        if out:
+            out.close()
+    if csv_path:
+        os.replace(csv_path + '.part', csv_path)
+
+    total = sum(summary[kind] for kind in SEAT_AUDIT_KINDS)
+    print(f"Audited {summary['sailings']} sailings ({summary['legs']} booking legs) from {start} to {end} "
+          f"in {time.perf_counter() - started:.1f}s: {total} issues "
+          f"({', '.join(f'{summary[kind]} {kind}' for kind in SEAT_AUDIT_KINDS)}).")
+    if total:
+        raise SystemExit(1)
+
+
 @app.route('/admin/settings', methods=['GET', 'POST'])
 @admin_required
 def admin_settings():
@@ -1590,6 +4226,27 @@ def admin_settings():
             except ValueError:
                 flash('Invalid capacity value.', 'danger')
         
+        # Vessel layouts - JSON {name: {"label": ..., "rows": [...]}}, see vessel_layouts()
+        elif action == 'update_layouts':
+            try:
+                layouts = json.loads(request.form.get('vessel_layouts') or '{}')
+                if not isinstance(layouts, dict):
+                    raise ValueError('expected a JSON object of layouts')
+                for name, spec in layouts.items():
+                    if name == DEFAULT_LAYOUT:
+                        raise ValueError(f'"{DEFAULT_LAYOUT}" is built from the ferry capacity and cannot be redefined')
+                    if not isinstance(spec, dict) or not isinstance(spec.get('rows'), list):
+                        raise ValueError(f'{name}: needs a "rows" list')
+                    parsed_layout(tuple(spec['rows']), name, spec.get('label'))
+            except ValueError as e:
+                flash(f'Layouts not saved: {e}', 'danger')
+            else:
+                config['vessel_layouts'] = layouts
+                if save_config(config):
+                    flash(f'{len(layouts)} vessel layout(s) saved.', 'success')
+                else:
+                    flash('Vessel layouts updated in memory but failed to save to config file.', 'warning')
+
         # Pricing Management - Update Route Price
         elif action == 'update_price':
             departure = request.form.get('price_departure')
@@ -1638,56 +4295,29 @@ def admin_settings():
             else:
                 flash('Current password is incorrect.', 'danger')
         
-        # Database Backup - Export bookings
+        # Database Backup - Export bookings (streamed, see admin_export_bookings)
         elif action == 'export_bookings':
-            try:
-                import csv
-                from io import StringIO
-                
-                output = StringIO()
-                writer = csv.writer(output)
-                
-                # Write header
-                writer.writerow(['Booking Ref', 'Name', 'Email', 'Phone', 'Departure', 'Destination', 
-                               'Date', 'Time', 'Seats', 'Total Price', 'Payment Status', 'Created At'])
-                
-                # Write data
-                bookings = FerryBooking.query.all()
-                for b in bookings:
-                    writer.writerow([
-                        b.booking_reference, b.name, b.email, b.phone,
-                        b.departure, b.destination, b.date, b.time,
-                        b.seats, b.total_price, b.payment_status or 'N/A',
-                        b.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                    ])
-                
-                # Create response
-                from flask import make_response
-                output.seek(0)
-                response = make_response(output.getvalue())
-                response.headers['Content-Disposition'] = f'attachment; filename=bookings_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-                response.headers['Content-Type'] = 'text/csv'
-                return response
-            except Exception as e:
-                flash(f'Export failed: {str(e)}', 'danger')
-        
-        # Database Maintenance - Clear old bookings
+            return redirect(url_for('admin_export_bookings'))
+
+        # Database Maintenance - Archive old bookings
         elif action == 'clear_old_bookings':
             days_old = request.form.get('days_old')
             try:
                 days = int(days_old)
+                if days < 30:
+                    raise ValueError
                 cutoff_date = datetime.utcnow() - timedelta(days=days)
-                old_bookings = FerryBooking.query.filter(FerryBooking.created_at < cutoff_date).all()
-                count = len(old_bookings)
-                
-                for booking in old_bookings:
-                    db.session.delete(booking)
-                db.session.commit()
-                
-                flash(f'Deleted {count} bookings older than {days} days.', 'success')
+                # bounded per request; `flask archive-bookings` has no limit
+                moved, finished = archive_old_bookings(cutoff_date, max_chunks=ARCHIVE_REQUEST_CHUNKS)
+                if finished:
+                    flash(f'Archived {moved} bookings that travelled more than {days} days ago.', 'success')
+                else:
+                    flash(f'Archived {moved} bookings that travelled more than {days} days ago; more remain. '
+                          f'Run it again or use "flask archive-bookings".', 'warning')
             except ValueError:
-                flash('Invalid number of days.', 'danger')
+                flash('Invalid number of days (minimum 30).', 'danger')
             except Exception as e:
+                db.session.rollback()
                 flash(f'Error: {str(e)}', 'danger')
         
         return redirect(url_for('admin_settings'))
@@ -1714,6 +4344,7 @@ def admin_settings():
     return render_template(
         'admin/settings.html',
         ferry_capacity=FERRY_CAPACITY,
+        vessel_layouts=json.dumps(config.get('vessel_layouts', {}), indent=2),
         route_prices=ROUTE_PRICES,
         ports=PORTS,
         total_bookings=total_bookings,
@@ -1724,82 +4355,83 @@ def admin_settings():
     )
 
 
+# -----------------------
+# Documentation PDFs (cached, built in the background)
+# -----------------------
+docs_cache = DocsCache(os.getenv('DOCS_CACHE_DIR', os.path.join(app.root_path, 'docs_cache')), app.root_path)
+
+
+def serve_document(name):
+    """
+    Send the cached PDF for the current generator source, or start building it in
+    the background and tell the admin to come back - never render in the request.
+    """
+    state, digest, detail = docs_cache.status(name)
+    download_name = docs_cache.documents[name].download_name
+    if state == 'ready':
+        return send_file(detail, mimetype='application/pdf', as_attachment=True,
+                         download_name=download_name, etag=digest, conditional=True)
+    if state == 'failed':
+        flash(f'Error generating {download_name}: {detail}. Retrying in the background.', 'danger')
+    docs_cache.build(name)
+    if state != 'failed':
+        flash(f'{download_name} is being generated in the background. Try again in a minute.', 'info')
+    return redirect(url_for('admin_dashboard'))
+
+
+@app.route('/admin/docs/status')
+@admin_required
+def admin_docs_status():
+    """Build state of every documentation PDF"""
+    result = {}
+    for name in docs_cache.documents:
+        state, digest, detail = docs_cache.status(name)
+        result[name] = {'status': state, 'source_hash': digest}
+        if state == 'failed':
+            result[name]['error'] = detail
+    return jsonify(result)
+
+
 @app.route('/admin/generate-pdf')
 @admin_required
 def admin_generate_pdf():
     """Generate architecture documentation PDF"""
-    try:
-        from generate_architecture_pdf import create_architecture_pdf
-        filename = create_architecture_pdf()
-        return send_file(filename, as_attachment=True, download_name='OceanLine_Architecture_Diagram.pdf')
-    except Exception as e:
-        flash(f'Error generating PDF: {str(e)}', 'danger')
-        return redirect(url_for('admin_dashboard'))
+    return serve_document('architecture')
 
 
 @app.route('/admin/generate-frontend-pdf')
 @admin_required
 def admin_generate_frontend_pdf():
     """Generate frontend pages documentation PDF"""
-    try:
-        from generate_frontend_pdf import create_frontend_pdf
-        filename = create_frontend_pdf()
-        return send_file(filename, as_attachment=True, download_name='OceanLine_Frontend_Pages.pdf')
-    except Exception as e:
-        flash(f'Error generating PDF: {str(e)}', 'danger')
-        return redirect(url_for('admin_dashboard'))
+    return serve_document('frontend')
 
 
 @app.route('/admin/generate-diagrams-pdf')
 @admin_required
 def admin_generate_diagrams_pdf():
     """Generate system diagrams PDF (text-based)"""
-    try:
-        from generate_diagrams_pdf import create_diagrams_pdf
-        filename = create_diagrams_pdf()
-        return send_file(filename, as_attachment=True, download_name='OceanLine_System_Diagrams.pdf')
-    except Exception as e:
-        flash(f'Error generating PDF: {str(e)}', 'danger')
-        return redirect(url_for('admin_dashboard'))
+    return serve_document('diagrams')
 
 
 @app.route('/admin/generate-visual-diagrams-pdf')
 @admin_required
 def admin_generate_visual_diagrams_pdf():
     """Generate visual diagrams PDF with graphviz images (requires Graphviz installed)"""
-    try:
-        from generate_visual_diagrams import create_visual_diagrams_pdf
-        filename = create_visual_diagrams_pdf()
-        return send_file(filename, as_attachment=True, download_name='OceanLine_Visual_Diagrams.pdf')
-    except Exception as e:
-        flash(f'Error generating visual diagrams PDF: {str(e)}', 'danger')
-        return redirect(url_for('admin_dashboard'))
+    return serve_document('visual-diagrams')
 
 
 @app.route('/admin/generate-enhanced-diagrams-pdf')
 @admin_required
 def admin_generate_enhanced_diagrams_pdf():
     """Generate enhanced visual diagrams PDF (pure Python, no external dependencies)"""
-    try:
-        from generate_enhanced_diagrams import create_enhanced_diagrams_pdf
-        filename = create_enhanced_diagrams_pdf()
-        return send_file(filename, as_attachment=True, download_name='OceanLine_Enhanced_Diagrams.pdf')
-    except Exception as e:
-        flash(f'Error generating enhanced diagrams PDF: {str(e)}', 'danger')
-        return redirect(url_for('admin_dashboard'))
+    return serve_document('enhanced-diagrams')
 
 
 @app.route('/admin/generate-dfd-pdf')
 @admin_required
 def admin_generate_dfd_pdf():
     """Generate Data Flow Diagram PDF"""
-    try:
-        from generate_dfd_pdf import create_dfd_pdf
-        filename = create_dfd_pdf()
-        return send_file(filename, as_attachment=True, download_name='OceanLine_Data_Flow_Diagram.pdf')
-    except Exception as e:
-        flash(f'Error generating DFD PDF: {str(e)}', 'danger')
-        return redirect(url_for('admin_dashboard'))
+    return serve_document('dfd')
 
 
 @app.route('/admin/test-route')
@@ -1841,6 +4473,300 @@ def migrate_add_users():
             print(f"Migration error: {e}")
 
 
+@app.cli.command('search-index')
+def build_search_index():
+    """
+    Create the MySQL FULLTEXT (ngram) booking search index, or warm the trigram fallback.
+    A partitioned ferry_bookings (`flask partitions init`) cannot have a FULLTEXT
+    index, so there the trigram index is used as well.
+    """
+    if db.engine.dialect.name == 'mysql' and booking_partitions():
+        print("ferry_bookings is partitioned and MySQL does not allow FULLTEXT indexes on "
+              "partitioned tables; booking search uses the in-process trigram index.")
+    elif db.engine.dialect.name == 'mysql':
+        if search_backend() == 'fulltext':
+            print(f"{SEARCH_FULLTEXT_INDEX} already exists.")
+            return
+        with db.engine.connect() as conn:
+            conn.execute(db.text(
+                f"ALTER TABLE ferry_bookings ADD FULLTEXT INDEX {SEARCH_FULLTEXT_INDEX} "
+                "(booking_reference, name, email, phone) WITH PARSER ngram"
+            ))
+            conn.commit()
+        _search_state['backend'] = None
+        print(f"Created {SEARCH_FULLTEXT_INDEX}. Restart the app workers to start using it.")
+        return
+
+    started = time.perf_counter()
+    index = booking_trigram_index()
+    print(f"Indexed {len(index)} bookings in {time.perf_counter() - started:.2f}s (in-process trigram index).")
+
+
+@app.cli.command('export-changes')
+@click.option('--consumer', required=True, help='Name of the downstream system, e.g. accounting.')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--output', '-o', type=click.Path(dir_okay=False), required=True, help='File to write.')
+@click.option('--reset', is_flag=True, help='Ignore the stored watermark and export everything.')
+def export_changes(consumer, fmt, output, reset):
+    """Write bookings changed since the consumer's watermark, then advance it"""
+    tmp_path = output + '.part'
+    rows = 0
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in stream_booking_changes(consumer, fmt, reset=reset):
+            f.write(chunk)
+            rows += chunk.count('\n')
+    os.replace(tmp_path, output)
+    if fmt == 'csv':
+        rows -= 1
+    print(f"Wrote {rows} changed bookings for '{consumer}' to {output}.")
+
+
+@app.cli.command('archive-bookings')
+@click.option('--days', default=365, show_default=True, help='Archive bookings that travelled more than this many days ago.')
+@click.option('--chunk', default=ARCHIVE_CHUNK_SIZE, show_default=True, help='Rows moved per transaction.')
+def archive_bookings(days, chunk):
+    """Move old bookings into ferry_bookings_archive in small transactions"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    started = time.perf_counter()
+
+    def progress(moved):
+        print(f"  archived {moved} bookings ({time.perf_counter() - started:.1f}s)")
+
+    moved, _ = archive_old_bookings(cutoff, chunk_size=chunk, progress=progress)
+    print(f"Archived {moved} bookings that travelled before {cutoff:%Y-%m-%d}.")
+
+
+@app.cli.command('reap-holds')
+@click.option('--batch', default=HOLD_REAP_BATCH_SIZE, show_default=True, help='Holds released per transaction.')
+def reap_holds(batch):
+    """Release unpaid seat holds that have expired (run every few minutes from cron)"""
+    started = time.perf_counter()
+
+    def progress(released):
+        print(f"  released {released} holds ({time.perf_counter() - started:.1f}s)")
+
+    released = reap_expired_holds(batch_size=batch, progress=progress)
+    print(f"Released {released} expired seat holds.")
+
+
+docs_cli = AppGroup('docs', help='Documentation PDFs (generate_*.py).')
+app.cli.add_command(docs_cli)
+
+
+@docs_cli.command('build')
+@click.argument('names', nargs=-1)
+@click.option('--force', is_flag=True, help='Rebuild even if nothing changed.')
+@click.option('--workers', '-j', type=int, help='Parallel builds (default: one per CPU).')
+@click.option('--output-dir', '-o', type=click.Path(file_okay=False),
+              help='Also copy the finished PDFs here under their usual file names.')
+def docs_build(names, force, workers, output_dir):
+    """Build every (or the named) documentation PDF whose generator or inputs changed"""
+    documents = docs_cache.documents
+    unknown = [name for name in names if name not in documents]
+    if unknown:
+        raise click.BadParameter(f"unknown document(s) {', '.join(unknown)}; choose from {', '.join(documents)}",
+                                 param_hint='NAMES')
+    failures = docs_cache.build_all(list(names) or None, force=force, max_workers=workers)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        for name in names or documents:
+            state, _, path = docs_cache.status(name)
+            if state == 'ready':
+                shutil.copyfile(path, os.path.join(output_dir, documents[name].download_name))
+        print(f'Copied to {output_dir}')
+    if failures:
+        raise SystemExit(1)
+
+
+@app.cli.command('manifest')
+@click.argument('sailing_date', type=click.DateTime(formats=['%Y-%m-%d']))
+@click.option('--departure', help='Only sailings from this port.')
+@click.option('--destination', help='Only sailings to this port.')
+@click.option('--time', 'sailing_time', help='Only the sailing at this time (HH:MM).')
+@click.option('--receipts', is_flag=True, help='Write a ZIP of every receipt instead of the manifest PDF.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='File to write (default: generated name).')
+def manifest(sailing_date, departure, destination, sailing_time, receipts, output):
+    """Passenger manifest PDF, or ZIP of receipts, for a sailing or a whole day"""
+    sailing_date = sailing_date.date()
+    started = time.perf_counter()
+    ext = 'zip' if receipts else 'pdf'
+    output = output or manifest_filename(sailing_date, departure, destination, sailing_time, ext)
+    tmp_path = output + '.part'
+    with open(tmp_path, 'wb') as f:
+        if receipts:
+            bookings = manifest_bookings(sailing_date, departure, destination, sailing_time)
+            for chunk in stream_receipts_zip(bookings):
+                f.write(chunk)
+            summary = f'{len(bookings)} receipts'
+        else:
+            legs = manifest_legs(sailing_date, departure, destination, sailing_time)
+            f.write(manifest_pdf(sailing_date, legs))
+            summary = f'manifest of {len(legs)} passenger legs'
+    os.replace(tmp_path, output)
+    print(f"Wrote {summary} to {output} in {time.perf_counter() - started:.1f}s.")
+
+
+# -----------------------
+# MySQL date partitioning (hot/cold storage for ferry_bookings)
+# -----------------------
+# ferry_bookings is RANGE COLUMNS(date) partitioned by travel month: p202501 holds
+# January 2025 sailings, pmax catches anything beyond the newest month. Queries that
+# pin `date` (see sailing_criteria) only touch the partition for that day.
+# SQLite has no partitioning; there the ix_ferry_bookings_sailing index (date first)
+# keeps availability lookups narrow and `flask archive-bookings` moves old rows out.
+partitions_cli = AppGroup('partitions', help='Manage MySQL date partitions of ferry_bookings.')
+app.cli.add_command(partitions_cli)
+
+
+def _add_months(d, n):
+    """First day of the month `n` months after d's month"""
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def _partition_clause(month):
+    """PARTITION definition holding every sailing in `month`"""
+    return f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{_add_months(month, 1).isoformat()}')"
+
+
+def booking_partitions():
+    """[(name, upper bound date or None for MAXVALUE, approx rows)] for ferry_bookings"""
+    rows = db.session.execute(db.text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ferry_bookings' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    )).all()
+    result = []
+    for name, description, table_rows in rows:
+        bound = None if description == 'MAXVALUE' else datetime.strptime(description.strip("'"), '%Y-%m-%d').date()
+        result.append((name, bound, table_rows))
+    return result
+
+
+def _partitioning_supported():
+    if db.engine.dialect.name == 'mysql':
+        return True
+    print("Partitioning needs MySQL. On this database availability queries rely on the "
+          "ix_ferry_bookings_sailing index; use `flask archive-bookings` to move old rows out.")
+    return False
+
+
+@partitions_cli.command('status')
+def partitions_status():
+    """List partitions with their approximate row counts"""
+    if not _partitioning_supported():
+        return
+    parts = booking_partitions()
+    if not parts:
+        print("ferry_bookings is not partitioned. Run `flask partitions init`.")
+    for name, bound, rows in parts:
+        print(f"{name:10} < {bound.isoformat() if bound else 'MAXVALUE':10} ~{rows} rows")
+
+
+@partitions_cli.command('init')
+@click.option('--months-ahead', default=3, show_default=True, help='Future months to create partitions for.')
+def partitions_init(months_ahead):
+    """
+    Convert ferry_bookings to monthly partitions on the travel date.
+    MySQL requires the partition column in every unique key and does not allow
+    foreign keys on partitioned tables, so this:
+    - drops the users FK (ferry_bookings.user_id is no longer checked by the database;
+      users are never deleted, and bookings are always created for the logged-in user),
+    - makes the primary key (id, date),
+    - turns booking_reference into a plain index. References stay unique through the
+      booking_references table, which is backfilled here first,
+    - drops the FULLTEXT search index (`flask search-index`), which partitioned InnoDB
+      tables cannot have; booking search falls back to the in-process trigram index.
+    """
+    if not _partitioning_supported():
+        return
+    if booking_partitions():
+        print("ferry_bookings is already partitioned.")
+        return
+
+    from sqlalchemy import inspect
+    BookingReference.__table__.create(db.engine, checkfirst=True)
+    print(f"Claimed {backfill_booking_references()} existing booking references.")
+    first = db.session.query(db.func.min(FerryBooking.date)).scalar() or date.today()
+    month = date(first.year, first.month, 1)
+    last = _add_months(date.today(), months_ahead)
+    clauses = []
+    while month <= last:
+        clauses.append(_partition_clause(month))
+        month = _add_months(month, 1)
+    clauses.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+
+    statements = [
+        f"ALTER TABLE ferry_bookings DROP FOREIGN KEY {fk['name']}"
+        for fk in inspect(db.engine).get_foreign_keys('ferry_bookings')
+    ]
+    if search_backend() == 'fulltext':
+        statements.append(f"ALTER TABLE ferry_bookings DROP INDEX {SEARCH_FULLTEXT_INDEX}")
+        print(f"Dropping {SEARCH_FULLTEXT_INDEX}: partitioned tables cannot have FULLTEXT indexes. "
+              "Booking search will use the in-process trigram index once the app workers restart.")
+    statements += [
+        "ALTER TABLE ferry_bookings DROP INDEX ix_ferry_bookings_booking_reference, "
+        "ADD INDEX ix_ferry_bookings_booking_reference (booking_reference)",
+        "ALTER TABLE ferry_bookings DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)",
+        f"ALTER TABLE ferry_bookings PARTITION BY RANGE COLUMNS(date) ({', '.join(clauses)})",
+    ]
+    with db.engine.connect() as conn:
+        for sql in statements:
+            print(sql[:100] + ('...' if len(sql) > 100 else ''))
+            conn.execute(db.text(sql))
+        conn.commit()
+    _search_state['backend'] = None
+    print(f"Partitioned ferry_bookings into {len(clauses)} partitions.")
+
+
+@partitions_cli.command('maintain')
+@click.option('--months-ahead', default=3, show_default=True, help='Keep partitions ready this many months ahead.')
+@click.option('--retain-months', default=24, show_default=True,
+              help='Archive and drop partitions whose sailings are older than this (0 keeps all).')
+def partitions_maintain(months_ahead, retain_months):
+    """Create upcoming monthly partitions and detach old ones into ferry_bookings_archive"""
+    if not _partitioning_supported():
+        return
+    parts = booking_partitions()
+    if not parts:
+        print("ferry_bookings is not partitioned. Run `flask partitions init`.")
+        return
+
+    with db.engine.connect() as conn:
+        # split pmax so upcoming sailings land in their own month partition
+        month = max(bound for _, bound, _ in parts if bound)
+        last = _add_months(date.today(), months_ahead)
+        clauses = []
+        while month <= last:
+            clauses.append(_partition_clause(month))
+            month = _add_months(month, 1)
+        if clauses:
+            clauses.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+            conn.execute(db.text(f"ALTER TABLE ferry_bookings REORGANIZE PARTITION pmax INTO ({', '.join(clauses)})"))
+            print(f"Added {len(clauses) - 1} partitions.")
+
+        if retain_months:
+            cutoff = _add_months(date.today(), -retain_months)
+            names = [c.name for c in FerryBookingArchive.__table__.columns if c.name in FerryBooking.__table__.c]
+            columns = ', '.join(names)
+            for name, bound, rows in parts:
+                if bound is None or bound > cutoff:
+                    continue
+                # copy only rows not archived yet: a run that copied the partition but
+                # failed to drop it is simply repeated
+                conn.execute(db.text(
+                    f"INSERT INTO ferry_bookings_archive ({columns}, archived_at) "
+                    f"SELECT {', '.join('b.' + n for n in names)}, UTC_TIMESTAMP() "
+                    f"FROM ferry_bookings PARTITION ({name}) b "
+                    f"LEFT JOIN ferry_bookings_archive a ON a.id = b.id WHERE a.id IS NULL"
+                ))
+                conn.commit()
+                conn.execute(db.text(f"ALTER TABLE ferry_bookings DROP PARTITION {name}"))
+                conn.execute(BookingEvent.__table__.insert(), [bookings_archived_event(rows)])
+                print(f"Archived and dropped {name} (~{rows} rows).")
+        conn.commit()
+
+
 @app.cli.command('seed-schedules')
 def seed_schedules():
     """Seed some default schedules into Schedule table (idempotent)"""
@@ -0,0 +1,15 @@
+"""
+Test setup. Runs before pytest imports any test module, so app.py picks up a
+throwaway SQLite database and cookie sessions instead of the MySQL settings.
+"""
+import os
+import tempfile
+
+# scripts/test_*.py are manual scripts against a running database, not tests
+collect_ignore = ['scripts']
+
+_tmp = tempfile.mkdtemp(prefix='oceanline-tests-')
+os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(_tmp, 'oceanline.db')
+os.environ['SESSION_STORE_URL'] = 'cookie'
+os.environ['RECEIPT_WORKERS'] = '0'
+os.environ['RECEIPT_CACHE_DIR'] = os.path.join(_tmp, 'receipt_cache')
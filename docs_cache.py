@@ -0,0 +1,258 @@
+"""
+Cached, background-built documentation PDFs.
+
+Generators are discovered, not registered. Every `generate_*.py` module in the
+project root that defines a top-level `create_*_pdf(filename=...)` is a
+document. Its name comes from the module (generate_visual_diagrams ->
+visual-diagrams), and the `filename` default is its download name.
+
+Each PDF is stored as `<cache_dir>/<name>-<hash>.pdf`. The hash covers the
+document's inputs:
+- the generator's source,
+- any project modules it imports,
+- any files matched by an optional module-level `DOC_INPUTS = [glob, ...]`.
+An edit therefore invalidates only the documents it affects.
+
+Builds run in separate processes: they are CPU-heavy, and some shell out to
+Graphviz. Each build starts a fresh process, so an edited generator is
+re-imported. A build writes to a temporary file and renames it into place,
+so a reader never sees a partial PDF. Two marker files sit next to the PDF:
+- `<name>-<hash>.building` shows every web worker and the CLI that a build is
+  under way.
+- `<name>-<hash>.error` keeps the last failure message.
+"""
+import ast
+import contextlib
+import glob
+import hashlib
+import importlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+Document = namedtuple('Document', 'name module function download_name')
+
+# A .building marker older than this belongs to a build that died with its process
+STALE_BUILD_SECONDS = 600
+
+
+def discover_documents(root):
+    """
+    Map document name -> Document for every generator module in `root`.
+    Modules are parsed, not imported, so discovery is cheap and side-effect free.
+    """
+    documents = {}
+    for path in sorted(glob.glob(os.path.join(root, 'generate_*.py'))):
+        module = os.path.splitext(os.path.basename(path))[0]
+        for node in _parse(path).body:
+            if isinstance(node, ast.FunctionDef) and node.name.startswith('create_') and node.name.endswith('_pdf'):
+                args = node.args.args[len(node.args.args) - len(node.args.defaults):]
+                defaults = {arg.arg: value for arg, value in zip(args, node.args.defaults)}
+                default = defaults.get('filename')
+                download_name = default.value if isinstance(default, ast.Constant) else f'{module}.pdf'
+                name = module[len('generate_'):].removesuffix('_pdf').replace('_', '-')
+                documents[name] = Document(name, module, node.name, download_name)
+                break
+    return documents
+
+
+_parsed = {}
+
+
+def _parse(path):
+    """ast of a source file, memoised until the file changes"""
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _parsed:
+        with open(path, encoding='utf-8') as f:
+            _parsed[key] = ast.parse(f.read(), path)
+    return _parsed[key]
+
+
+def build_document(root, module_name, func_name, path):
+    """
+    Pool entry point: run one generator into a temp file, move it to `path` and
+    return (path, seconds). The generator's own progress output is swallowed.
+    """
+    started = time.perf_counter()
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    generator = getattr(importlib.import_module(module_name), func_name)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    os.close(fd)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path, time.perf_counter() - started
+
+
+def _spawn_pool(max_workers):
+    # a fresh process per build, so edited generators are re-imported
+    return ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'),
+                               max_tasks_per_child=1)
+
+
+class DocsCache:
+    """Status, background builds, batch builds and lookups for the discovered documents"""
+
+    def __init__(self, directory, root, max_workers=1):
+        self.directory = directory
+        self.root = root
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def documents(self):
+        return discover_documents(self.root)
+
+    def input_files(self, name):
+        """Generator source, project modules it imports and files matching its DOC_INPUTS"""
+        module_path = os.path.join(self.root, self.documents[name].module + '.py')
+        files = {module_path}
+        for node in _parse(module_path).body:
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            elif (isinstance(node, ast.Assign) and len(node.targets) == 1
+                  and getattr(node.targets[0], 'id', None) == 'DOC_INPUTS'):
+                for pattern in ast.literal_eval(node.value):
+                    files.update(glob.glob(os.path.join(self.root, pattern), recursive=True))
+                continue
+            else:
+                continue
+            for module in modules:
+                local = os.path.join(self.root, module.split('.')[0] + '.py')
+                if os.path.exists(local):
+                    files.add(local)
+        return sorted(f for f in files if os.path.isfile(f))
+
+    def source_hash(self, name):
+        digest = hashlib.sha256()
+        for path in self.input_files(name):
+            digest.update(os.path.relpath(path, self.root).encode('utf-8') + b'\0')
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def _base(self, name, digest):
+        return os.path.join(self.directory, f'{name}-{digest}')
+
+    def status(self, name):
+        """
+        (status, digest, detail): status is ready (detail = PDF path), building,
+        failed (detail = error message) or missing.
+        """
+        digest = self.source_hash(name)
+        base = self._base(name, digest)
+        if os.path.exists(base + '.pdf'):
+            return 'ready', digest, base + '.pdf'
+        try:
+            if time.time() - os.path.getmtime(base + '.building') < STALE_BUILD_SECONDS:
+                return 'building', digest, None
+        except FileNotFoundError:
+            pass
+        if os.path.exists(base + '.error'):
+            with open(base + '.error', encoding='utf-8') as f:
+                return 'failed', digest, f.read()
+        return 'missing', digest, None
+
+    def _claim(self, name, digest):
+        """Create the .building marker; False if another process holds a live one"""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        base = self._base(name, digest)
+        try:
+            if time.time() - os.path.getmtime(base + '.building') >= STALE_BUILD_SECONDS:
+                os.remove(base + '.building')
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(base + '.building', os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+        except FileExistsError:
+            return False
+        if os.path.exists(base + '.error'):
+            os.remove(base + '.error')
+        return True
+
+    def build(self, name):
+        """Start a background build unless the current version is ready or already building"""
+        state, digest, detail = self.status(name)
+        if state in ('ready', 'building'):
+            return state, digest, detail
+        if not self._claim(name, digest):
+            return 'building', digest, None
+
+        base = self._base(name, digest)
+        doc = self.documents[name]
+        with self._lock:
+            if self._pool is None:
+                self._pool = _spawn_pool(self.max_workers)
+            future = self._pool.submit(build_document, self.root, doc.module, doc.function, base + '.pdf')
+        future.add_done_callback(lambda f: self._finished(name, base, f))
+        return 'building', digest, None
+
+    def build_all(self, names=None, force=False, max_workers=None, echo=print):
+        """
+        Build `names` (default: every document) side by side in a process pool,
+        skipping documents whose inputs are unchanged unless `force`. Reports one
+        line per document through `echo`; returns the number of failed builds.
+        """
+        names = names or list(self.documents)
+        width = max(len(name) for name in names)
+        todo = {}
+        for name in names:
+            state, digest, _ = self.status(name)
+            if state == 'ready' and not force:
+                echo(f'  {name:<{width}}  up to date')
+            elif state == 'building' or not self._claim(name, digest):
+                echo(f'  {name:<{width}}  already being built elsewhere, skipped')
+            else:
+                todo[name] = self._base(name, digest)
+        if not todo:
+            return 0
+
+        started = time.perf_counter()
+        failures = 0
+        documents = self.documents
+        with _spawn_pool(max_workers or min(len(todo), os.cpu_count() or 1)) as pool:
+            futures = {
+                pool.submit(build_document, self.root, documents[name].module,
+                            documents[name].function, base + '.pdf'): name
+                for name, base in todo.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                self._finished(name, todo[name], future)
+                if future.exception() is not None:
+                    failures += 1
+                    echo(f'  {name:<{width}}  FAILED  {type(future.exception()).__name__}: {future.exception()}')
+                else:
+                    echo(f'  {name:<{width}}  built in {future.result()[1]:.1f}s')
+        echo(f'{len(todo) - failures} built, {failures} failed, '
+             f'{len(names) - len(todo)} skipped in {time.perf_counter() - started:.1f}s')
+        return failures
+
+    def _finished(self, name, base, future):
+        error = future.exception()
+        if error is not None:
+            with open(base + '.error', 'w', encoding='utf-8') as f:
+                f.write(f'{type(error).__name__}: {error}')
+        else:
+            # drop PDFs built from older inputs
+            for old in glob.glob(os.path.join(self.directory, f'{glob.escape(name)}-*.pdf')):
+                if old != base + '.pdf':
+                    os.remove(old)
+        try:
+            os.remove(base + '.building')
+        except FileNotFoundError:
+            pass
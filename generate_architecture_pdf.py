@@ -12,10 +12,9 @@ from reportlab.platypus import Table, TableStyle, Preformatted
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from datetime import datetime
 
-def create_architecture_pdf():
+def create_architecture_pdf(filename="OceanLine_Architecture_Diagram.pdf"):
     """Generate the architecture PDF document"""
     
-    filename = "OceanLine_Architecture_Diagram.pdf"
     doc = SimpleDocTemplate(filename, pagesize=A4,
                           rightMargin=50, leftMargin=50,
                           topMargin=50, bottomMargin=50)
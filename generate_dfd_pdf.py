@@ -12,10 +12,9 @@ from reportlab.lib.enums import TA_CENTER
 from reportlab.graphics.shapes import Drawing, Rect, String, Line, Circle, Polygon
 from datetime import datetime
 
-def create_dfd_pdf():
+def create_dfd_pdf(filename="OceanLine_Data_Flow_Diagram.pdf"):
     """Generate Data Flow Diagram PDF"""
     
-    filename = "OceanLine_Data_Flow_Diagram.pdf"
     doc = SimpleDocTemplate(filename, pagesize=A4,
                           rightMargin=50, leftMargin=50,
                           topMargin=50, bottomMargin=50)
@@ -12,10 +12,9 @@ from reportlab.platypus import Table, TableStyle, Preformatted, KeepTogether
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from datetime import datetime
 
-def create_diagrams_pdf():
+def create_diagrams_pdf(filename="OceanLine_System_Diagrams.pdf"):
     """Generate the diagrams PDF document"""
     
-    filename = "OceanLine_System_Diagrams.pdf"
     doc = SimpleDocTemplate(filename, pagesize=A4,
                           rightMargin=50, leftMargin=50,
                           topMargin=50, bottomMargin=50)
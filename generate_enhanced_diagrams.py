@@ -15,10 +15,9 @@ from reportlab.graphics import renderPDF
 from datetime import datetime
 import os
 
-def create_enhanced_diagrams_pdf():
+def create_enhanced_diagrams_pdf(filename="OceanLine_Enhanced_Diagrams.pdf"):
     """Generate PDF with enhanced visual diagrams using reportlab graphics"""
     
-    filename = "OceanLine_Enhanced_Diagrams.pdf"
     doc = SimpleDocTemplate(filename, pagesize=A4,
                           rightMargin=50, leftMargin=50,
                           topMargin=50, bottomMargin=50)
@@ -12,10 +12,9 @@ from reportlab.platypus import Table, TableStyle, Preformatted, Image as RLImage
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from datetime import datetime
 
-def create_frontend_pdf():
+def create_frontend_pdf(filename="OceanLine_Frontend_Pages.pdf"):
     """Generate the frontend documentation PDF"""
     
-    filename = "OceanLine_Frontend_Pages.pdf"
     doc = SimpleDocTemplate(filename, pagesize=A4,
                           rightMargin=50, leftMargin=50,
                           topMargin=50, bottomMargin=50)
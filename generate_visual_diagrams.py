@@ -10,13 +10,64 @@ from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.enums import TA_CENTER
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import graphviz
+import hashlib
+import glob
 import os
 
-def create_visual_diagrams_pdf():
+
+class DiagramRenderer:
+    """
+    Render Graphviz digraphs concurrently, caching each PNG under a hash of its
+    DOT source. png() returns the final path straight away (Image flowables
+    only open the file at build time), so all diagrams render in parallel while
+    the rest of the document is laid out; call wait() before doc.build().
+    Unchanged diagrams are never re-rendered.
+    """
+
+    def __init__(self, directory, max_workers=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # dot runs as a subprocess, so threads render truly in parallel
+        self._pool = ThreadPoolExecutor(max_workers)
+        self._futures = []
+        self.rendered = []
+        self.reused = []
+
+    def png(self, graph):
+        digest = hashlib.sha256(graph.source.encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(self.directory, f'{graph.name}-{digest}.png')
+        if os.path.exists(path):
+            self.reused.append(graph.name)
+        else:
+            self._futures.append(self._pool.submit(self._render, graph, path))
+        return path
+
+    def _render(self, graph, path):
+        data = graph.pipe(format='png')
+        tmp = f'{path}.{os.getpid()}.part'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        # drop PNGs rendered from older versions of this diagram
+        for old in glob.glob(os.path.join(self.directory, f'{glob.escape(graph.name)}-*.png')):
+            if old != path:
+                os.remove(old)
+        self.rendered.append(graph.name)
+
+    def wait(self):
+        """Block until every queued render is done (re-raising the first failure)"""
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+def create_visual_diagrams_pdf(filename="OceanLine_Visual_Diagrams.pdf"):
     """Generate PDF with visual diagrams"""
     
-    filename = "OceanLine_Visual_Diagrams.pdf"
     doc = SimpleDocTemplate(filename, pagesize=A4,
                           rightMargin=50, leftMargin=50,
                           topMargin=50, bottomMargin=50)
@@ -72,10 +123,9 @@ def create_visual_diagrams_pdf():
     elements.append(info_table)
     elements.append(PageBreak())
     
-    # Create diagrams directory
-    diagrams_dir = "diagram_images"
-    if not os.path.exists(diagrams_dir):
-        os.makedirs(diagrams_dir)
+    # Diagrams render in the background (and are reused when unchanged)
+    diagrams_dir = os.getenv('DIAGRAM_CACHE_DIR', "diagram_images")
+    diagrams = DiagramRenderer(diagrams_dir)
     
     # Diagram 1: System Architecture
     elements.append(Paragraph("1. System Architecture Diagram", heading1_style))
@@ -108,9 +158,7 @@ def create_visual_diagrams_pdf():
     arch.edge('controller', 'presentation', 'Render', style='dashed')
     arch.edge('presentation', 'client', 'HTML', style='dashed')
     
-    arch_file = os.path.join(diagrams_dir, 'architecture')
-    arch.render(arch_file, cleanup=True)
-    elements.append(Image(arch_file + '.png', width=5*inch, height=4*inch))
+    elements.append(Image(diagrams.png(arch), width=5*inch, height=4*inch))
     elements.append(PageBreak())
     
     # Diagram 2: Database ERD
@@ -134,9 +182,7 @@ def create_visual_diagrams_pdf():
     # Relationships
     erd.edge('users:f1', 'bookings:f1', label='1:N', color='blue', fontcolor='blue', fontsize='9')
     
-    erd_file = os.path.join(diagrams_dir, 'erd')
-    erd.render(erd_file, cleanup=True)
-    elements.append(Image(erd_file + '.png', width=6*inch, height=4*inch))
+    elements.append(Image(diagrams.png(erd), width=6*inch, height=4*inch))
     elements.append(PageBreak())
     
     # Diagram 3: User Booking Flow
@@ -166,9 +212,7 @@ def create_visual_diagrams_pdf():
     flow.edge('payment', 'confirm', 'Upload Proof\n/Bank Transfer')
     flow.edge('confirm', 'end', 'Download PDF')
     
-    flow_file = os.path.join(diagrams_dir, 'user_flow')
-    flow.render(flow_file, cleanup=True)
-    elements.append(Image(flow_file + '.png', width=4.5*inch, height=5*inch))
+    elements.append(Image(diagrams.png(flow), width=4.5*inch, height=5*inch))
     elements.append(PageBreak())
     
     # Diagram 4: Admin Dashboard Flow
@@ -198,9 +242,7 @@ def create_visual_diagrams_pdf():
     admin.edge('dashboard', 'reports')
     admin.edge('dashboard', 'settings')
     
-    admin_file = os.path.join(diagrams_dir, 'admin_flow')
-    admin.render(admin_file, cleanup=True)
-    elements.append(Image(admin_file + '.png', width=5*inch, height=4*inch))
+    elements.append(Image(diagrams.png(admin), width=5*inch, height=4*inch))
     elements.append(PageBreak())
     
     # Diagram 5: API Request Flow
@@ -242,9 +284,7 @@ def create_visual_diagrams_pdf():
     api.edge('pay', 'server')
     api.edge('server', 'pay', 'PDF', style='dashed')
     
-    api_file = os.path.join(diagrams_dir, 'api_flow')
-    api.render(api_file, cleanup=True)
-    elements.append(Image(api_file + '.png', width=6*inch, height=3.5*inch))
+    elements.append(Image(diagrams.png(api), width=6*inch, height=3.5*inch))
     elements.append(PageBreak())
     
     # Diagram 6: Deployment Architecture
@@ -298,9 +338,7 @@ def create_visual_diagrams_pdf():
     deploy.edge('app1', 's3', 'Upload')
     deploy.edge('db_primary', 'db_replica', 'Replication', style='dotted')
     
-    deploy_file = os.path.join(diagrams_dir, 'deployment')
-    deploy.render(deploy_file, cleanup=True)
-    elements.append(Image(deploy_file + '.png', width=6*inch, height=5*inch))
+    elements.append(Image(diagrams.png(deploy), width=6*inch, height=5*inch))
     elements.append(PageBreak())
     
     # Summary
@@ -334,9 +372,11 @@ def create_visual_diagrams_pdf():
     elements.append(footer_table)
     
     # Build PDF
+    diagrams.wait()
     doc.build(elements)
     print(f"✅ Visual diagrams PDF generated successfully: {filename}")
-    print(f"   Diagram images saved in: {diagrams_dir}/")
+    print(f"   Diagram images saved in: {diagrams_dir}/ "
+          f"({len(diagrams.rendered)} rendered, {len(diagrams.reused)} reused)")
     return filename
 
 if __name__ == "__main__":
@@ -0,0 +1,15 @@
+# Gunicorn settings for OceanLine
+# Run with: gunicorn app:app   (this file is picked up automatically)
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+
+# Threaded workers: a long-lived /admin/events stream occupies one thread, not a
+# whole worker process. Keep threads comfortably above EVENT_STREAM_SLOTS so booking
+# traffic always has free threads while admin dashboards are open.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+keepalive = 5
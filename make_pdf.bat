@@ -1,4 +1,4 @@
 @echo off
-cd /d "C:\DATA\ONEDRIVE\BIT\Final Project\oceanline"
-.venv\Scripts\python.exe generate_architecture_pdf.py
+cd /d "%~dp0"
+.venv\Scripts\python.exe run_pdf_gen.py %*
 pause
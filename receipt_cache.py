@@ -0,0 +1,67 @@
+"""
+On-disk cache of rendered receipt PDFs.
+
+Each file is named `<booking_id>-<digest>.pdf`, where the digest is a hash of
+every field printed on the receipt. A booking whose receipt fields change gets
+a new digest, so a stale file is never served. The old file is removed the next
+time that booking's receipt is stored.
+"""
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+
+def fingerprint(fields):
+    """Stable short hash of a mapping of receipt fields (values are str()-ed)"""
+    blob = json.dumps(fields, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(blob).hexdigest()[:32]
+
+
+class ReceiptCache:
+    """Content-addressed PDF store rooted at `directory`"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, booking_id, digest):
+        return os.path.join(self.directory, f'{booking_id}-{digest}.pdf')
+
+    def get(self, booking_id, digest):
+        """Path of the cached PDF, or None on a miss"""
+        path = self.path(booking_id, digest)
+        return path if os.path.exists(path) else None
+
+    def find(self, digest):
+        """Path of the cached PDF with this digest, whichever booking it belongs to"""
+        matches = glob.glob(os.path.join(self.directory, f'*-{glob.escape(digest)}.pdf'))
+        return matches[0] if matches else None
+
+    def put(self, booking_id, digest, data):
+        """
+        Store `data` atomically (temp file + rename) and drop older versions of
+        this booking's receipt. Returns the final path.
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = self.path(booking_id, digest)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.discard(booking_id, keep=path)
+        return path
+
+    def discard(self, booking_id, keep=None):
+        """Remove cached receipts for a booking (except `keep`)"""
+        for old in glob.glob(os.path.join(self.directory, f'{booking_id}-*.pdf')):
+            if old != keep:
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass
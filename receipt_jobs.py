@@ -0,0 +1,114 @@
+"""
+Background receipt rendering.
+
+Receipts are rendered in a ProcessPoolExecutor, so the CPU-bound ReportLab work
+never runs on a request thread. A job's id is the receipt digest, which is also
+the key the finished PDF is stored under in the ReceiptCache. Any process (any
+gunicorn worker) can therefore tell that a job is done by looking in the
+cache. Only the process that queued a job knows whether it is still queued,
+running or has failed.
+
+Workers only import this module, receipt_pdf and receipt_cache, never the
+Flask app, and jobs carry plain field dicts rather than ORM objects.
+"""
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+from receipt_cache import ReceiptCache
+from receipt_pdf import render_receipt
+
+
+def render_to_cache(directory, booking_id, digest, fields):
+    """Pool entry point: render a receipt from plain fields and store it"""
+    pdf = render_receipt(SimpleNamespace(**fields))
+    return ReceiptCache(directory).put(booking_id, digest, pdf)
+
+
+class ReceiptJobs:
+    """
+    Queue receipt renders on a lazily started process pool.
+
+    With max_workers=0 jobs run inline on the calling thread (handy for the dev
+    server and scripts).
+    """
+
+    MAX_FAILURES = 256
+
+    def __init__(self, cache, max_workers=2):
+        self.cache = cache
+        self.max_workers = max_workers
+        self._pool = None
+        self._jobs = {}                     # digest -> Future, while in flight
+        self._failed = OrderedDict()        # digest -> error message (most recent last)
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: never fork a threaded server process
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def submit(self, booking_id, digest, fields):
+        """
+        Make sure the receipt `digest` is (being) rendered. Returns a Future whose
+        result is the cached PDF path; an already cached receipt is not re-rendered.
+        """
+        path = self.cache.get(booking_id, digest)
+        if path:
+            done = Future()
+            done.set_result(path)
+            return done
+
+        with self._lock:
+            future = self._jobs.get(digest)
+            if future is not None:
+                return future
+            self._failed.pop(digest, None)
+            if self.max_workers:
+                args = (render_to_cache, self.cache.directory, booking_id, digest, fields)
+                try:
+                    future = self._executor().submit(*args)
+                except BrokenProcessPool:
+                    self._pool = None
+                    future = self._executor().submit(*args)
+            else:
+                future = Future()
+            self._jobs[digest] = future
+        future.add_done_callback(lambda f: self._finished(digest, f))
+
+        if not self.max_workers:
+            try:
+                future.set_result(render_to_cache(self.cache.directory, booking_id, digest, fields))
+            except Exception as exc:
+                future.set_exception(exc)
+        return future
+
+    def _finished(self, digest, future):
+        with self._lock:
+            self._jobs.pop(digest, None)
+            if future.exception() is not None:
+                self._failed[digest] = str(future.exception()) or type(future.exception()).__name__
+                while len(self._failed) > self.MAX_FAILURES:
+                    self._failed.popitem(last=False)
+
+    def status(self, digest):
+        """(status, error) where status is ready, queued, running, failed or unknown"""
+        if self.cache.find(digest):
+            return 'ready', None
+        with self._lock:
+            future = self._jobs.get(digest)
+            if future is not None:
+                return ('running' if future.running() else 'queued'), None
+            if digest in self._failed:
+                return 'failed', self._failed[digest]
+        return 'unknown', None
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,276 @@
+"""
+Fast-path booking receipt renderer.
+
+Draws the receipt straight onto a ReportLab canvas instead of building a
+Platypus story. The output matches app.generate_pdf_receipt point for point
+(same fonts, colours, boxes and positions). Everything that never changes
+(colours, column positions, static labels and their centred offsets) is worked
+out once at import. A render only places the booking's own text, a handful of
+rectangles and the QR code, which is filled as a single path.
+
+`render_receipt(booking)` accepts anything with the FerryBooking receipt
+attributes (a model instance, a SimpleNamespace, ...) and returns PDF bytes.
+"""
+from io import BytesIO
+from itertools import groupby
+
+from reportlab.graphics.barcode import qrencoder
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# -----------------------
+# Static layout (computed once per process)
+# -----------------------
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LEFT = 35                               # page margin; tables span the full content width
+CONTENT_WIDTH = PAGE_WIDTH - 70
+RIGHT = LEFT + CONTENT_WIDTH
+CENTER = LEFT + CONTENT_WIDTH / 2
+TEXT_LEFT = LEFT + 6                    # free-standing paragraphs sit inside the frame padding
+TOP = 36                                # top margin + frame padding
+LEADING = 12                            # ReportLab's default paragraph leading
+
+PRIMARY_BLUE = colors.HexColor('#2663EB')
+DARK_BLUE = colors.HexColor('#0E3A96')
+LIGHT_BLUE = colors.HexColor('#DCEAFF')
+ORANGE = colors.HexColor('#F25809')
+LIGHT_ORANGE = colors.HexColor('#FFF2E6')
+GRAY_TEXT = colors.HexColor('#6B7280')
+DARK_TEXT = colors.HexColor('#111827')
+RULE = colors.HexColor('#E5E7EB')
+
+REGULAR = 'Helvetica'
+BOLD = 'Helvetica-Bold'
+LABEL_SIZE = 6
+VALUE_SIZE = 7
+
+QR_SIZE = 65
+QR_BORDER = 4                           # quiet zone, in modules (QrCodeWidget default)
+MAX_SEATS_SHOWN = 8
+
+
+def _columns(widths):
+    """x of each column for a label/value grid centred in the content width"""
+    x = LEFT + (CONTENT_WIDTH - sum(widths)) / 2
+    positions = []
+    for width in widths:
+        positions.append((x, width - 4))    # 0pt left / 4pt right cell padding
+        x += width
+    return tuple(positions)
+
+
+JOURNEY_COLUMNS = _columns((60, CONTENT_WIDTH / 2 - 70, 60, CONTENT_WIDTH / 2 - 70))
+PASSENGER_COLUMNS = _columns((60, CONTENT_WIDTH / 2 - 70, 80, CONTENT_WIDTH / 2 - 90))
+
+
+def _wrap(text, font, size, width):
+    """Word-wrap like a Paragraph, breaking words that are wider than the column"""
+    lines = []
+    for line in simpleSplit(text, font, size, width):
+        while stringWidth(line, font, size) > width:
+            cut = len(line) - 1
+            while cut > 1 and stringWidth(line[:cut], font, size) > width:
+                cut -= 1
+            lines.append(line[:cut])
+            line = line[cut:]
+        lines.append(line)
+    return lines
+
+
+def _label_lines(text, width):
+    return tuple(_wrap(text, BOLD, LABEL_SIZE, width))
+
+
+# Static grid labels, pre-wrapped to their column widths
+_LABELS = {
+    (text, width): _label_lines(text, width)
+    for columns in (JOURNEY_COLUMNS, PASSENGER_COLUMNS)
+    for _, width in columns
+    for text in ('ROUTE', 'DURATION', 'FROM', 'TO', 'DATE', 'TIME', 'NAME', 'PASSENGERS',
+                 'EMAIL', 'PHONE', 'PAYMENT METHOD', '')
+}
+
+FOOTER_LINES = (
+    'Important: Please arrive at the ferry terminal at least 30 minutes before departure.',
+    'For any queries, contact us at support@oceanlineferry.com',
+    'Thank you for choosing OceanLine Ferry Service!',
+)
+
+
+# -----------------------
+# Drawing helpers (y is measured down from the top of the page)
+# -----------------------
+def _y(top):
+    return PAGE_HEIGHT - top
+
+
+def _text(c, x, baseline, text, font, size, color):
+    c.setFillColor(color)
+    c.setFont(font, size)
+    c.drawString(x, _y(baseline), text)
+
+
+def _centred(c, baseline, text, font, size, color, center=CENTER):
+    c.setFillColor(color)
+    c.setFont(font, size)
+    c.drawCentredString(center, _y(baseline), text)
+
+
+def _box(c, top, height, fill, radius=0, x=LEFT, width=CONTENT_WIDTH):
+    c.setFillColor(fill)
+    if radius:
+        c.roundRect(x, _y(top + height), width, height, radius, stroke=0, fill=1)
+    else:
+        c.rect(x, _y(top + height), width, height, stroke=0, fill=1)
+
+
+def _rule(c, top):
+    """Thin grey section rule; takes the height of an empty table row"""
+    c.setStrokeColor(RULE)
+    c.setLineWidth(1.2)
+    c.line(LEFT, _y(top), RIGHT, _y(top))
+    return top + 18
+
+
+def _heading(c, top, text):
+    _text(c, TEXT_LEFT, top + 9, text, BOLD, 9, PRIMARY_BLUE)
+    return _rule(c, top + LEADING + 3)
+
+
+def _band(c, top, text, fill, color):
+    """Coloured DEPARTURE / RETURN TRIP banner"""
+    _box(c, top, 20, fill, radius=4)
+    _centred(c, top + 4 + 7, text, BOLD, 7, color)
+    return top + 20
+
+
+def _grid(c, top, rows, columns):
+    """label/value rows; values wrap inside their column like a Paragraph would"""
+    for row in rows:
+        cells = []
+        for i, ((x, width), text) in enumerate(zip(columns, row)):
+            if i % 2 == 0:
+                lines = _LABELS.get((text, width)) or _label_lines(text, width)
+                cells.append((x, lines, BOLD, LABEL_SIZE, GRAY_TEXT))
+            else:
+                lines = _wrap(text, REGULAR, VALUE_SIZE, width)
+                cells.append((x, lines, REGULAR, VALUE_SIZE, DARK_TEXT))
+        for x, lines, font, size, color in cells:
+            for n, line in enumerate(lines):
+                _text(c, x, top + 3 + size + n * LEADING, line, font, size, color)
+        top += 3 + LEADING * max(1, *(len(cell[1]) for cell in cells)) + 2
+    return top
+
+
+def _seats(c, top, seats, fill):
+    _text(c, TEXT_LEFT, top + 6, 'SEATS', BOLD, LABEL_SIZE, GRAY_TEXT)
+    top += LEADING
+    if seats:
+        labels = [seat.strip() for seat in seats.split(',')[:MAX_SEATS_SHOWN]]
+        x = LEFT + (CONTENT_WIDTH - 28 * len(labels)) / 2
+        for label in labels:
+            _box(c, top + 3, 18, fill, radius=3, x=x, width=24)
+            _centred(c, top + 12, label, BOLD, LABEL_SIZE, colors.white, center=x + 12)
+            x += 28
+        top += 24
+    return top + 7
+
+
+def _qr(c, top, value):
+    qr = qrencoder.QRCode(None, qrencoder.QRErrorCorrectLevel.L)
+    qr.addData(value)
+    qr.make()
+    count = qr.getModuleCount()
+    module = QR_SIZE / (count + QR_BORDER * 2)
+    left = CENTER - QR_SIZE / 2
+    bottom = _y(top + QR_SIZE)
+    path = c.beginPath()
+    for r, row in enumerate(qr.modules):
+        col = 0
+        for dark, run in groupby(map(bool, row)):
+            span = len(list(run))
+            if dark:
+                path.rect(left + (col + QR_BORDER) * module,
+                          bottom + QR_SIZE - (r + QR_BORDER + 1) * module,
+                          span * module, module)
+            col += span
+    c.setFillColor(colors.black)
+    c.drawPath(path, stroke=0, fill=1)
+
+
+# -----------------------
+# Renderer
+# -----------------------
+def render_receipt(booking):
+    """Render one booking receipt and return the PDF bytes"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+
+    # Header
+    _box(c, TOP, 82, PRIMARY_BLUE)
+    _centred(c, TOP + 24, 'Ferry Booking Confirmation', BOLD, 16, colors.white)
+    _centred(c, TOP + 42, 'OceanLine Ferry Service', REGULAR, 8, colors.white)
+    _centred(c, TOP + 65.5, f'{booking.booking_reference} - {booking.name}', REGULAR, 5.5, colors.white)
+    top = TOP + 82 + 6
+
+    _qr(c, top + 3, booking.booking_reference)
+    top += QR_SIZE + 6 + 5
+
+    # Booking reference box
+    _box(c, top, 48, LIGHT_BLUE, radius=5)
+    _centred(c, top + 12, 'BOOKING REFERENCE', BOLD, 6, DARK_BLUE)
+    _centred(c, top + 40, booking.booking_reference, BOLD, 10, DARK_BLUE)
+    top += 48 + 8
+
+    # Journey
+    roundtrip = bool(booking.is_roundtrip and booking.return_date and booking.return_time)
+    top = _heading(c, top, f'Journey Details - {"Two-Way Trip" if roundtrip else "One-Way Trip"}') + 5
+
+    top = _band(c, top, 'DEPARTURE TRIP', LIGHT_BLUE, DARK_BLUE) + 4
+    top = _grid(c, top, (
+        ('ROUTE', f'{booking.departure} to {booking.destination}', 'DURATION', '90 min'),
+        ('FROM', booking.departure, 'TO', booking.destination),
+        ('DATE', booking.date.strftime('%A, %B %d, %Y'), 'TIME', booking.time),
+    ), JOURNEY_COLUMNS) + 3
+    top = _seats(c, top, booking.selected_seats, PRIMARY_BLUE)
+
+    if roundtrip:
+        top = _band(c, top, 'RETURN TRIP', LIGHT_ORANGE, ORANGE) + 4
+        top = _grid(c, top, (
+            ('ROUTE', f'{booking.destination} to {booking.departure}', 'DURATION', '90 min'),
+            ('FROM', booking.destination, 'TO', booking.departure),
+            ('DATE', booking.return_date.strftime('%A, %B %d, %Y'), 'TIME', booking.return_time),
+        ), JOURNEY_COLUMNS) + 3
+        top = _seats(c, top, booking.return_selected_seats, ORANGE)
+
+    # Passenger
+    top = _heading(c, top, 'Passenger Information') + 5
+    top = _grid(c, top, (
+        ('NAME', booking.name, 'PASSENGERS', str(booking.seats)),
+        ('EMAIL', booking.email, 'PHONE', booking.phone),
+        ('PAYMENT METHOD', booking.payment_method or '—', '', ''),
+    ), PASSENGER_COLUMNS) + 10
+
+    # Total
+    _box(c, top, 56, LIGHT_BLUE, radius=6)
+    c.setStrokeColor(PRIMARY_BLUE)
+    c.setLineWidth(1.5)
+    c.setLineCap(1)
+    c.setLineJoin(1)
+    c.roundRect(LEFT, _y(top + 56), CONTENT_WIDTH, 56, 6, stroke=1, fill=0)
+    _centred(c, top + 15, 'TOTAL AMOUNT PAID', BOLD, 7, DARK_BLUE)
+    _centred(c, top + 48, f'MVR {booking.total_price:.2f}', BOLD, 12, PRIMARY_BLUE)
+    top += 56 + 8
+
+    # Footer
+    top = _rule(c, top) + 4
+    for line in FOOTER_LINES:
+        _centred(c, top + 6, line, REGULAR, 6, GRAY_TEXT)
+        top += 7
+
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
@@ -1,3 +1,21 @@
+"""
+Build the documentation PDFs - same as `flask --app app docs build [--force] [NAMES...]`.
+Unchanged documents are skipped; pass --force to rebuild them anyway.
+
+    python run_pdf_gen.py                 # every generate_*.py
+    python run_pdf_gen.py architecture    # just generate_architecture_pdf.py
+"""
+import os
 import sys
-sys.path.insert(0, r'C:\DATA\ONEDRIVE\BIT\Final Project\oceanline')
-exec(open('generate_architecture_pdf.py').read())
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import docs_cache  # noqa: E402
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    names = [arg for arg in args if not arg.startswith('-')]
+    unknown = [name for name in names if name not in docs_cache.documents]
+    if unknown:
+        sys.exit(f"Unknown document(s) {', '.join(unknown)}; choose from {', '.join(docs_cache.documents)}")
+    sys.exit(1 if docs_cache.build_all(names or None, force='--force' in args) else 0)
@@ -0,0 +1,40 @@
+"""
+Receipts per second: Platypus receipt (generate_pdf_receipt) vs. the canvas
+fast path (receipt_pdf.render_receipt). Uses a synthetic round-trip booking, so
+no database rows are needed.
+
+    PYTHONPATH=. python scripts/bench_receipts.py [renders]
+"""
+import sys
+import time
+from datetime import date
+from types import SimpleNamespace
+
+from app import generate_pdf_receipt
+from receipt_pdf import render_receipt
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+booking = SimpleNamespace(
+    booking_reference='OL-BENCH001', name='Aishath Mohamed', email='aishath@example.com',
+    phone='+960 7771234', departure='Male', destination='K.Maafushi', date=date(2030, 1, 5),
+    time='08:00', seats=3, selected_seats='1,2,3', is_roundtrip=True, return_date=date(2030, 1, 9),
+    return_time='16:30', return_selected_seats='10,11,12', total_price=1234.5,
+    payment_method='Bank Transfer',
+)
+
+
+def bench(name, render):
+    render(booking)  # warm up (font metrics, imports)
+    start = time.perf_counter()
+    for _ in range(N):
+        render(booking)
+    elapsed = time.perf_counter() - start
+    rate = N / elapsed
+    print(f'{name:<10} {N} receipts in {elapsed:.2f}s  ->  {rate:,.0f} receipts/s  ({elapsed / N * 1000:.2f} ms each)')
+    return rate
+
+
+platypus = bench('platypus', lambda b: generate_pdf_receipt(b).getvalue())
+canvas = bench('canvas', render_receipt)
+print(f'speed-up: {canvas / platypus:.1f}x')
@@ -1,4 +1,4 @@
-from app import app, db
+from app import app, db, FerryBooking, BookingReference, backfill_booking_references
 from sqlalchemy import inspect, text
 
 with app.app_context():
@@ -17,7 +17,10 @@ with app.app_context():
         'is_roundtrip': 'BOOLEAN',
         'return_date': 'DATE',
         'return_time': 'VARCHAR(10)',
-        'return_selected_seats': 'VARCHAR(200)'
+        'return_selected_seats': 'VARCHAR(200)',
+        'updated_at': 'DATETIME',
+        'status': "VARCHAR(20) NOT NULL DEFAULT 'confirmed'",
+        'hold_expires_at': 'DATETIME'
     }
 
     for col, coltype in expected.items():
@@ -34,4 +37,86 @@ with app.app_context():
         except Exception as e:
             print('Failed to add', col, '->', e)
 
+    # The archive mirrors ferry_bookings, so it needs columns added after it was created
+    if 'ferry_bookings_archive' in inspector.get_table_names():
+        archive_cols = [c['name'] for c in inspector.get_columns('ferry_bookings_archive')]
+        for col in ('hold_expires_at',):
+            if col in archive_cols:
+                continue
+            print('Adding archive column:', col)
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text(f"ALTER TABLE ferry_bookings_archive ADD COLUMN {col} {expected[col]}"))
+                    conn.commit()
+                print('Added archive', col)
+            except Exception as e:
+                print('Failed to add archive', col, '->', e)
+
+    # Vessel layout assignment on schedules
+    for table in ('schedules', 'daily_schedules'):
+        if table not in inspector.get_table_names():
+            continue
+        if 'layout' in [c['name'] for c in inspector.get_columns(table)]:
+            print(f'Column exists: {table}.layout')
+            continue
+        print(f'Adding column: {table}.layout')
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN layout VARCHAR(50)"))
+                conn.commit()
+            print(f'Added {table}.layout')
+        except Exception as e:
+            print(f'Failed to add {table}.layout ->', e)
+
+    # Version stamp that invalidates cached logins after profile / password changes
+    if 'users' in inspector.get_table_names():
+        if 'session_version' in [c['name'] for c in inspector.get_columns('users')]:
+            print('Column exists: users.session_version')
+        else:
+            print('Adding column: users.session_version')
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE users ADD COLUMN session_version INTEGER NOT NULL DEFAULT 1"))
+                    conn.commit()
+                print('Added users.session_version')
+            except Exception as e:
+                print('Failed to add users.session_version ->', e)
+
+    # Keys of rows sent inside the incremental export's re-read overlap
+    if 'export_watermarks' in inspector.get_table_names():
+        if 'recent_keys' in [c['name'] for c in inspector.get_columns('export_watermarks')]:
+            print('Column exists: export_watermarks.recent_keys')
+        else:
+            print('Adding column: export_watermarks.recent_keys')
+            try:
+                with db.engine.connect() as conn:
+                    conn.execute(text("ALTER TABLE export_watermarks ADD COLUMN recent_keys TEXT"))
+                    conn.commit()
+                print('Added export_watermarks.recent_keys')
+            except Exception as e:
+                print('Failed to add export_watermarks.recent_keys ->', e)
+
+    # Every issued booking reference, so references stay unique once ferry_bookings is partitioned
+    BookingReference.__table__.create(db.engine, checkfirst=True)
+    print('Claimed', backfill_booking_references(), 'existing booking references')
+
+    # Rows that predate updated_at count as last changed when they were created
+    with db.engine.connect() as conn:
+        result = conn.execute(text("UPDATE ferry_bookings SET updated_at = created_at WHERE updated_at IS NULL"))
+        conn.commit()
+    print('Backfilled updated_at on', result.rowcount, 'rows')
+
+    # Create any indexes declared on the model that the table does not have yet
+    existing_indexes = {ix['name'] for ix in inspector.get_indexes('ferry_bookings')}
+    for index in FerryBooking.__table__.indexes:
+        if index.name in existing_indexes:
+            print('Index exists:', index.name)
+            continue
+        print('Creating index:', index.name)
+        try:
+            index.create(db.engine)
+            print('Created', index.name)
+        except Exception as e:
+            print('Failed to create', index.name, '->', e)
+
     print('Done')
@@ -0,0 +1,143 @@
+"""
+In-process trigram index used for booking search when the database has no
+FULLTEXT/ngram support (SQLite in development).
+
+Documents are small dicts of text fields; each field is lower-cased (phone
+numbers are reduced to digits) and broken into overlapping 3-character grams.
+Search scores a document by the fraction of query trigrams it contains, with
+a boost for exact substring and prefix hits, so partial and slightly
+misspelled input still ranks the right booking first.
+"""
+import math
+import re
+import threading
+from collections import defaultdict
+
+# A document must share at least this fraction of the query's trigrams
+MIN_SIMILARITY = 0.5
+
+_NON_DIGITS = re.compile(r'\D+')
+_PHONE_LIKE = re.compile(r'^[\d\s+()\-]+$')
+
+
+def normalize(value, digits_only=False):
+    """Lower-case and collapse whitespace; optionally keep digits only (phones)"""
+    if not value:
+        return ''
+    if digits_only:
+        return _NON_DIGITS.sub('', value)
+    return ' '.join(value.lower().split())
+
+
+def trigrams(text):
+    """Set of 3-character grams for `text`, padded so short words still index"""
+    if not text:
+        return set()
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Thread-safe trigram index mapping document ids to ranked search hits.
+
+    `fields` passed to add() is a mapping of field name -> text; names listed in
+    `digit_fields` are indexed as digits only.
+    """
+
+    def __init__(self, digit_fields=('phone',), prefix_field='booking_reference'):
+        self.digit_fields = set(digit_fields)
+        self.prefix_field = prefix_field
+        self._postings = defaultdict(set)   # trigram -> {doc_id}
+        self._docs = {}                     # doc_id -> {field: normalized text}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def ids(self):
+        """Set of indexed document ids"""
+        with self._lock:
+            return set(self._docs)
+
+    def _normalized(self, fields):
+        return {
+            name: normalize(value, digits_only=name in self.digit_fields)
+            for name, value in fields.items()
+            if value
+        }
+
+    def add(self, doc_id, fields):
+        """Index (or re-index) a document"""
+        docs = self._normalized(fields)
+        with self._lock:
+            if doc_id in self._docs:
+                self._discard(doc_id)
+            self._docs[doc_id] = docs
+            for text in docs.values():
+                for gram in trigrams(text):
+                    self._postings[gram].add(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            if doc_id in self._docs:
+                self._discard(doc_id)
+
+    def _discard(self, doc_id):
+        for text in self._docs.pop(doc_id).values():
+            for gram in trigrams(text):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(doc_id)
+                    if not posting:
+                        del self._postings[gram]
+
+    def search(self, query, limit=50):
+        """
+        Return up to `limit` (doc_id, score) pairs, best first (every hit when
+        `limit` is None). Newer (higher) ids win ties.
+        """
+        text = normalize(query)
+        if not text:
+            return []
+        queries = [text]
+        if _PHONE_LIKE.match(query.strip()):
+            digits = normalize(query, digits_only=True)
+            if digits and digits != text:
+                queries.append(digits)
+
+        with self._lock:
+            scores = {}
+            for q in queries:
+                for doc_id, score in self._score(q).items():
+                    if score > scores.get(doc_id, 0):
+                        scores[doc_id] = score
+
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return ranked[:limit]
+
+    def _score(self, text):
+        grams = trigrams(text)
+        if not grams:
+            return {}
+
+        # Any document reaching the threshold must contain at least one of the
+        # (n - needed + 1) rarest query trigrams, so only those postings are
+        # scanned for candidates; common grams (".co", "com") are only probed.
+        needed = max(1, math.ceil(len(grams) * MIN_SIMILARITY))
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        candidates = set().union(*postings[:len(grams) - needed + 1])
+
+        results = {}
+        for doc_id in candidates:
+            hits = sum(1 for posting in postings if doc_id in posting)
+            if hits < needed:
+                continue
+            score = hits / len(grams)
+            fields = self._docs[doc_id]
+            if any(text in value for value in fields.values()):
+                score += 1.0
+            if fields.get(self.prefix_field, '').startswith(text):
+                score += 0.5
+            results[doc_id] = score
+        return results
@@ -0,0 +1,187 @@
+"""
+Best-available seat allocation.
+
+A VesselLayout is a list of rows; each row lists seat numbers left to right, with
+None for an aisle or a gap. Seats next to each other in a row (no aisle between
+them) are "together". allocate_seats() picks seats for a party of N from the
+seats that are still free:
+
+1. If one stretch of free seats in a row can take the whole party, use the
+   smallest such stretch (front rows win ties). Long free stretches stay intact
+   for larger groups that book later.
+2. Otherwise, split the party over as few stretches as possible, keeping those
+   stretches in neighbouring rows.
+
+A 35-seat vessel has at most a few dozen free stretches, so one call costs
+microseconds. It is cheap enough to run inline on every booking.
+
+Layouts can also be written as text, one string per row. Each letter is a seat of
+that class (see SEAT_CLASSES), '_' is an aisle and '.' is an empty space.
+Seats are numbered from 1, left to right and front to back:
+
+    VesselLayout.parse(['PP_PP', 'SS_SSS', 'SS_SSS', 'A._.A'])
+"""
+import base64
+from functools import lru_cache
+
+SEAT_CLASSES = {'S': 'Standard', 'P': 'Premium', 'A': 'Accessible'}
+AISLE = '_'
+GAP = '.'
+
+
+class VesselLayout:
+    """
+    Seat map of a vessel: rows of seat numbers, None marking an aisle or gap.
+    `cells` keeps the drawing (seat / aisle / gap per position) and `classes`
+    maps seat number -> seat class letter.
+    """
+
+    def __init__(self, rows, name=None, label=None, cells=None, classes=None):
+        self.rows = tuple(tuple(row) for row in rows)
+        self.name = name
+        self.label = label or name
+        self.seats = tuple(seat for row in self.rows for seat in row if seat is not None)
+        self.capacity = len(self.seats)
+        self.classes = dict(classes or {seat: 'S' for seat in self.seats})
+        self.cells = cells or tuple(
+            tuple(('seat', seat, self.classes[seat]) if seat is not None else (AISLE,) for seat in row)
+            for row in self.rows
+        )
+        self.key = (self.cells, self.name, self.label)
+
+    def __eq__(self, other):
+        return isinstance(other, VesselLayout) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    @classmethod
+    def parse(cls, rows, name=None, label=None):
+        """Build a layout from text rows; raises ValueError on anything but seat letters, '_' and '.'"""
+        seat = 0
+        cells, numbered, classes = [], [], {}
+        for text in rows:
+            row_cells, row_seats = [], []
+            for char in str(text).strip():
+                if char in (AISLE, GAP):
+                    row_cells.append((char,))
+                    row_seats.append(None)
+                elif char.upper() in SEAT_CLASSES:
+                    seat += 1
+                    classes[seat] = char.upper()
+                    row_cells.append(('seat', seat, char.upper()))
+                    row_seats.append(seat)
+                else:
+                    raise ValueError(f'unknown seat map character {char!r}')
+            cells.append(tuple(row_cells))
+            numbered.append(row_seats)
+        if not seat:
+            raise ValueError('a layout needs at least one seat')
+        return cls(numbered, name=name, label=label, cells=tuple(cells), classes=classes)
+
+    @classmethod
+    def grid(cls, capacity, columns, aisles=(), name=None, label=None):
+        """
+        Seats 1..capacity numbered row by row, `columns` per row. `aisles` lists the
+        column counts after which an aisle runs, e.g. (2,) for a 2 + rest layout.
+        """
+        rows = []
+        for start in range(1, capacity + 1, columns):
+            row = []
+            for column, seat in enumerate(range(start, min(start + columns, capacity + 1))):
+                if column in aisles:
+                    row.append(None)
+                row.append(seat)
+            rows.append(row)
+        return cls(rows, name=name, label=label)
+
+    def blocks(self):
+        """(row index, [seat, ...]) for every aisle-free stretch of seats"""
+        for r, row in enumerate(self.rows):
+            block = []
+            for seat in row + (None,):
+                if seat is None:
+                    if block:
+                        yield r, block
+                    block = []
+                else:
+                    block.append(seat)
+
+
+@lru_cache(maxsize=64)
+def grid_layout(capacity, columns, aisles=(), name=None, label=None):
+    return VesselLayout.grid(capacity, columns, aisles, name=name, label=label)
+
+
+@lru_cache(maxsize=64)
+def parsed_layout(rows, name=None, label=None):
+    """VesselLayout.parse for a tuple of rows, memoised"""
+    return VesselLayout.parse(rows, name=name, label=label)
+
+
+def seat_bitmap(taken, capacity):
+    """
+    Taken seats as a compact URL-safe base64 bit set: bit (n - 1) is seat n, so a
+    35-seat sailing needs 7 characters.
+    """
+    bits = bytearray((capacity + 7) // 8)
+    for seat in taken:
+        if 1 <= seat <= capacity:
+            bits[(seat - 1) // 8] |= 1 << ((seat - 1) % 8)
+    return base64.urlsafe_b64encode(bytes(bits)).decode('ascii').rstrip('=')
+
+
+def free_runs(layout, taken):
+    """(row index, [seat, ...]) for every stretch of adjacent free seats"""
+    runs = []
+    for r, block in layout.blocks():
+        run = []
+        for seat in block + [None]:
+            if seat is None or seat in taken:
+                if run:
+                    runs.append((r, run))
+                run = []
+            else:
+                run.append(seat)
+    return runs
+
+
+def allocate_seats(layout, taken, count):
+    """
+    Seat numbers for a party of `count`, as close together as the free seats
+    allow, or None if fewer than `count` seats are free.
+    """
+    if count <= 0:
+        return []
+    taken = set(taken)
+    runs = free_runs(layout, taken)
+    if sum(len(run) for _, run in runs) < count:
+        return None
+
+    fits = [(len(run), r, run) for r, run in runs if len(run) >= count]
+    if fits:
+        _, _, run = min(fits, key=lambda fit: (fit[0], fit[1], fit[2][0]))
+        return sorted(run[:count])
+
+    # No single stretch is big enough. Try each row as the centre of the party:
+    # fill from stretches in that row and then nearer rows, biggest stretch first
+    # within a row. Also try biggest stretch first across the whole vessel, which
+    # gives the fewest pieces. Keep the result with the fewest pieces, then the
+    # fewest rows spanned, then the one nearest the front.
+    orders = [sorted(runs, key=lambda item: (-len(item[1]), item[0], item[1][0]))]
+    for anchor in sorted({r for r, _ in runs}):
+        orders.append(sorted(runs, key=lambda item: (abs(item[0] - anchor), -len(item[1]), item[0], item[1][0])))
+    best = None
+    for ordered in orders:
+        chosen, rows, needed = [], [], count
+        for r, run in ordered:
+            part = run[:needed]
+            chosen.extend(part)
+            rows.append(r)
+            needed -= len(part)
+            if not needed:
+                break
+        score = (len(rows), max(rows) - min(rows), min(rows), min(chosen))
+        if best is None or score < best[0]:
+            best = (score, chosen)
+    return sorted(best[1])
@@ -0,0 +1,258 @@
+"""
+Server-side sessions.
+
+Flask's default session is a signed cookie. It carries all of its contents
+(booking funnel state, login, CSRF token) on every request and is re-signed on
+every change. ServerSideSessionInterface keeps session data in a store instead.
+The cookie holds only a random opaque id.
+
+Stores are picked by URL (see store_from_url):
+
+    sqlite:///path/to/sessions.db   one SQLite file, shared by every worker on the host
+    file:///path/to/directory       one file per session
+    redis://host:6379/0             any Redis-compatible server (needs the `redis` package)
+
+Every session expires after `ttl` seconds without use. A permanent session uses
+the app's PERMANENT_SESSION_LIFETIME instead. Redis drops expired keys itself.
+The SQLite and file stores ignore expired entries and delete them in
+`purge()` (`flask prune-sessions`).
+"""
+import os
+import re
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]{32,64}$')
+
+
+class ServerSideSession(SecureCookieSession):
+    """Session dict plus its id; `sid` is None until the first save"""
+
+    def __init__(self, initial=None, sid=None, expires=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.expires = expires
+        self.stale_sid = None
+
+    def regenerate(self):
+        """New id for the same data (call on login so a planted id is worthless)"""
+        if self.sid:
+            self.stale_sid = self.sid
+        self.sid = None
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSideSession
+
+    def __init__(self, store, ttl):
+        self.store = store
+        self.ttl = ttl
+
+    def lifetime(self, app, session):
+        if session.permanent:
+            return int(app.permanent_session_lifetime.total_seconds())
+        return self.ttl
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and SESSION_ID_PATTERN.match(sid):
+            found = self.store.get(sid)
+            if found is not None:
+                data, expires = found
+                try:
+                    return self.session_class(self.serializer.loads(data), sid=sid, expires=expires)
+                except ValueError:
+                    pass
+        return self.session_class()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        partitioned = self.get_cookie_partitioned(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+        if session.stale_sid:
+            self.store.delete(session.stale_sid)
+
+        if not session:
+            # emptied (logout) or never used: no stored row and no cookie
+            if session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       partitioned=partitioned, samesite=samesite, httponly=httponly)
+            return
+
+        lifetime = self.lifetime(app, session)
+        new = session.sid is None
+        if new:
+            session.sid = secrets.token_urlsafe(32)
+        if new or session.modified:
+            self.store.set(session.sid, self.serializer.dumps(dict(session)).encode('utf-8'), lifetime)
+        elif session.expires is not None and session.expires - time.time() < lifetime / 2:
+            # sliding expiry without a write on every request
+            self.store.touch(session.sid, lifetime)
+        if new or self.should_set_cookie(app, session):
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure,
+                                partitioned=partitioned, samesite=samesite)
+
+
+# -----------------------
+# Stores: get(sid) -> (data, expires epoch) | None, set, touch, delete, purge
+# -----------------------
+class SQLiteSessionStore:
+    """Sessions in one SQLite file; WAL lets gunicorn workers read while one writes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS sessions '
+                         '(id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._connect().execute('SELECT data, expires FROM sessions WHERE id = ? AND expires > ?',
+                                      (sid, time.time())).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, sid, data, ttl):
+        self._connect().execute('INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)',
+                                (sid, data, time.time() + ttl))
+
+    def touch(self, sid, ttl):
+        self._connect().execute('UPDATE sessions SET expires = ? WHERE id = ?', (time.time() + ttl, sid))
+
+    def delete(self, sid):
+        self._connect().execute('DELETE FROM sessions WHERE id = ?', (sid,))
+
+    def purge(self):
+        return self._connect().execute('DELETE FROM sessions WHERE expires <= ?', (time.time(),)).rowcount
+
+
+class FileSessionStore:
+    """One file per session; the file's mtime is its expiry time"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.directory, f'{sid}.session')
+
+    def get(self, sid):
+        path = self._path(sid)
+        try:
+            expires = os.stat(path).st_mtime
+            if expires <= time.time():
+                return None
+            with open(path, 'rb') as f:
+                return f.read(), expires
+        except FileNotFoundError:
+            return None
+
+    def set(self, sid, data, ttl):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            expires = time.time() + ttl
+            os.utime(tmp, (expires, expires))
+            os.replace(tmp, self._path(sid))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def touch(self, sid, ttl):
+        expires = time.time() + ttl
+        try:
+            os.utime(self._path(sid), (expires, expires))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+    def purge(self):
+        removed = 0
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.session') and entry.stat().st_mtime <= now:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+class RedisSessionStore:
+    """Sessions as Redis keys with a TTL; expiry is left to the server"""
+
+    def __init__(self, url, prefix='session:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('SESSION_STORE_URL points at Redis but the `redis` package is not installed.')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, sid):
+        with self.client.pipeline() as pipe:
+            data, ttl = pipe.get(self.prefix + sid).ttl(self.prefix + sid).execute()
+        if data is None:
+            return None
+        return data, time.time() + max(ttl, 0)
+
+    def set(self, sid, data, ttl):
+        self.client.set(self.prefix + sid, data, ex=max(int(ttl), 1))
+
+    def touch(self, sid, ttl):
+        self.client.expire(self.prefix + sid, max(int(ttl), 1))
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+    def purge(self):
+        return 0
+
+
+def store_from_url(url):
+    """Session store for a sqlite:///, file:/// or redis(s):// URL; None for 'cookie'"""
+    if not url or url == 'cookie':
+        return None
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):])
+    if url.startswith('file://'):
+        return FileSessionStore(url[len('file://'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisSessionStore(url)
+    raise ValueError(f'Unsupported SESSION_STORE_URL: {url}')
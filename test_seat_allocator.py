@@ -0,0 +1,87 @@
+import base64
+
+import pytest
+
+from seat_allocator import VesselLayout, allocate_seats, free_runs, seat_bitmap
+
+
+def decode_bitmap(encoded, capacity):
+    """Taken seats from seat_bitmap(), decoded the way select_seats.html does it"""
+    bits = base64.urlsafe_b64decode(encoded + '==='[(len(encoded) + 3) % 4:])
+    return {n + 1 for n in range(capacity) if n >> 3 < len(bits) and (bits[n >> 3] >> (n & 7)) & 1}
+
+
+def test_parse_numbers_seats_and_skips_aisles():
+    layout = VesselLayout.parse(['PP_PP', 'S._S'])
+    assert layout.rows == ((1, 2, None, 3, 4), (5, None, None, 6))
+    assert layout.capacity == 6
+    assert layout.classes[1] == 'P' and layout.classes[6] == 'S'
+    assert list(layout.blocks()) == [(0, [1, 2]), (0, [3, 4]), (1, [5]), (1, [6])]
+
+
+@pytest.mark.parametrize('rows', [['SX'], ['__'], []])
+def test_parse_rejects_bad_layouts(rows):
+    with pytest.raises(ValueError):
+        VesselLayout.parse(rows)
+
+
+def test_party_fits_smallest_stretch():
+    # row 0 has a stretch of 4, row 1 a stretch of 2: the pair goes to row 1
+    layout = VesselLayout.parse(['SSSS', 'SS'])
+    assert allocate_seats(layout, set(), 2) == [5, 6]
+
+
+def test_equal_stretches_front_row_then_left_wins():
+    layout = VesselLayout.parse(['SS_SS', 'SS_SS'])
+    assert allocate_seats(layout, set(), 2) == [1, 2]
+    assert allocate_seats(layout, {1}, 2) == [3, 4]
+    assert allocate_seats(layout, {1, 3}, 2) == [5, 6]
+
+
+def test_split_uses_fewest_stretches():
+    # no stretch of 3 is free; row 1 has two pairs, row 0 only single seats
+    layout = VesselLayout.parse(['SS_SS', 'SS_SS'])
+    assert allocate_seats(layout, {1, 3}, 3) == [5, 6, 7]
+
+
+def test_split_keeps_party_in_neighbouring_rows():
+    layout = VesselLayout.parse(['SS', 'S.', 'SS', 'SS'])
+    # free: seat 2 in row 0, pairs in rows 2 and 3 - the party takes the neighbouring pairs
+    assert allocate_seats(layout, {1, 3}, 3) == [4, 5, 6]
+    # with row 1 free too, rows 0 and 1 are nearest the front
+    assert allocate_seats(layout, set(), 3) == [1, 2, 3]
+
+
+def test_not_enough_seats():
+    layout = VesselLayout.grid(6, 3)
+    assert allocate_seats(layout, {1, 2, 3, 4}, 3) is None
+    assert allocate_seats(layout, set(range(1, 7)), 1) is None
+    assert allocate_seats(layout, set(), 0) == []
+
+
+def test_allocation_never_returns_taken_seats():
+    layout = VesselLayout.grid(35, 7, aisles=(2,))
+    taken = {2, 9, 10, 17, 24, 31}
+    for count in range(1, 36 - len(taken)):
+        seats = allocate_seats(layout, taken, count)
+        assert len(seats) == count
+        assert not taken & set(seats)
+    assert allocate_seats(layout, taken, 36 - len(taken)) is None
+
+
+def test_free_runs_split_at_taken_seats():
+    layout = VesselLayout.parse(['SSSS_S'])
+    assert free_runs(layout, {2}) == [(0, [1]), (0, [3, 4]), (0, [5])]
+
+
+@pytest.mark.parametrize('capacity', [1, 7, 8, 9, 35, 80])
+def test_bitmap_round_trip(capacity):
+    for taken in (set(), {1}, {capacity}, set(range(1, capacity + 1)), set(range(1, capacity + 1, 3))):
+        encoded = seat_bitmap(taken, capacity)
+        assert '=' not in encoded
+        assert decode_bitmap(encoded, capacity) == taken
+
+
+def test_bitmap_ignores_seats_outside_the_vessel():
+    assert decode_bitmap(seat_bitmap({0, 3, 36, -1}, 35), 35) == {3}
+    assert len(seat_bitmap(set(), 35)) == 7
@@ -0,0 +1,96 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import app, audit_seats, db, FerryBooking
+
+DAY = date(2030, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def database():
+    with app.app_context():
+        db.create_all()
+        yield
+        db.session.remove()
+        db.drop_all()
+
+
+def add_booking(ref, seats, selected, departure='Male', destination='Hulhumale', when=DAY, time='08:00',
+                status='confirmed', **extra):
+    db.session.add(FerryBooking(
+        booking_reference=ref, name='Test', email='test@example.com', phone='123',
+        departure=departure, destination=destination, date=when, time=time,
+        seats=seats, selected_seats=selected, total_price=100.0 * seats, status=status, **extra,
+    ))
+    db.session.commit()
+
+
+def run_audit(start=DAY, end=DAY):
+    summary = {}
+    return list(audit_seats(start, end, summary)), summary
+
+
+def test_clean_sailings_have_no_issues():
+    add_booking('A1', 2, '1,2')
+    add_booking('A2', 1, '3')
+    add_booking('A3', 1, '1', time='10:00')
+    issues, summary = run_audit()
+    assert issues == []
+    assert summary['sailings'] == 2 and summary['legs'] == 3
+
+
+def test_shared_seat_is_a_collision():
+    add_booking('A1', 2, '1,2')
+    add_booking('A2', 1, '2')
+    issues, summary = run_audit()
+    assert [(i['kind'], i['seat'], i['bookings']) for i in issues] == [('collision', 2, ['A1', 'A2'])]
+    assert summary['collision'] == 1
+
+
+def test_seat_listed_twice_in_one_booking():
+    add_booking('A1', 2, '4,4')
+    issues, _ = run_audit()
+    assert [(i['kind'], i['seat'], i['detail']) for i in issues] == [('collision', 4, 'listed twice in one booking')]
+
+
+def test_return_leg_collides_with_outbound_leg():
+    # B1's return sailing is A1's outbound sailing
+    add_booking('A1', 1, '3', time='16:00')
+    add_booking('B1', 1, '7', departure='Hulhumale', destination='Male', when=DAY - timedelta(days=2),
+                is_roundtrip=True, return_date=DAY, return_time='16:00', return_selected_seats='3')
+    issues, _ = run_audit()
+    assert [(i['kind'], i['seat'], sorted(i['bookings'])) for i in issues] == [('collision', 3, ['A1', 'B1'])]
+
+
+def test_seat_count_mismatch():
+    add_booking('A1', 3, '1,2')
+    issues, summary = run_audit()
+    assert [(i['kind'], i['bookings']) for i in issues] == [('seat_count', ['A1'])]
+    assert summary['seat_count'] == 1
+
+
+def test_invalid_seat_and_over_capacity():
+    add_booking('A1', 1, '99')
+    add_booking('A2', 35, ','.join(str(n) for n in range(1, 36)))
+    kinds = sorted(i['kind'] for i in run_audit()[0])
+    assert kinds == ['invalid_seat', 'over_capacity']
+
+
+def test_inactive_bookings_are_ignored():
+    add_booking('A1', 1, '5')
+    add_booking('A2', 1, '5', status='cancelled')
+    add_booking('A3', 1, '5', status='expired')
+    add_booking('A4', 1, '5', status='held', hold_expires_at=datetime.utcnow() - timedelta(minutes=1))
+    assert run_audit()[0] == []
+
+
+def test_cli_exits_1_when_issues_are_found():
+    runner = app.test_cli_runner()
+    args = ['audit-seats', '--from', DAY.isoformat(), '--to', DAY.isoformat(), '-q']
+    add_booking('A1', 1, '1')
+    assert runner.invoke(args=args).exit_code == 0
+    add_booking('A2', 1, '1')
+    result = runner.invoke(args=args)
+    assert result.exit_code == 1
+    assert '1 collision' in result.output
@@ -0,0 +1,117 @@
+import time
+
+import pytest
+from flask import Flask, session
+
+from session_store import FileSessionStore, SQLiteSessionStore, ServerSideSessionInterface, store_from_url
+
+TTL = 60
+
+
+@pytest.fixture(params=['sqlite', 'file'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+    return FileSessionStore(str(tmp_path / 'sessions'))
+
+
+@pytest.fixture
+def client(store):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = ServerSideSessionInterface(store, TTL)
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['value'] = value
+        return ''
+
+    @app.route('/get')
+    def get_value():
+        return session.get('value', '')
+
+    @app.route('/rotate')
+    def rotate():
+        session.regenerate()
+        return ''
+
+    @app.route('/clear')
+    def clear():
+        session.clear()
+        return ''
+
+    return app.test_client()
+
+
+def sid(client):
+    cookie = client.get_cookie('session')
+    return cookie.value if cookie else None
+
+
+def test_store_expiry_and_purge(store):
+    store.set('a' * 43, b'live', TTL)
+    store.set('b' * 43, b'dead', -1)
+    assert store.get('a' * 43)[0] == b'live'
+    assert store.get('a' * 43)[1] == pytest.approx(time.time() + TTL, abs=5)
+    assert store.get('b' * 43) is None
+    assert store.purge() == 1
+    assert store.purge() == 0
+    store.touch('a' * 43, -1)
+    assert store.get('a' * 43) is None
+
+
+def test_cookie_only_holds_an_id(client, store):
+    client.get('/get')
+    assert sid(client) is None  # an unused session sets no cookie
+    client.get('/set/hello')
+    assert 'hello' not in sid(client)
+    assert client.get('/get').text == 'hello'
+    assert store.get(sid(client)) is not None
+
+
+def test_expired_session_starts_empty(client, store):
+    client.get('/set/hello')
+    store.touch(sid(client), -1)
+    assert client.get('/get').text == ''
+
+
+def test_idle_session_expiry_slides(client, store):
+    client.get('/set/hello')
+    store.touch(sid(client), TTL / 4)
+    client.get('/get')
+    assert store.get(sid(client))[1] == pytest.approx(time.time() + TTL, abs=5)
+
+
+def test_rotation_keeps_data_and_drops_old_id(client, store):
+    client.get('/set/hello')
+    old = sid(client)
+    client.get('/rotate')
+    new = sid(client)
+    assert new and new != old
+    assert store.get(old) is None
+    assert client.get('/get').text == 'hello'
+    client.set_cookie('session', old)  # a planted or stolen pre-rotation id
+    assert client.get('/get').text == ''
+
+
+def test_cleared_session_is_deleted(client, store):
+    client.get('/set/hello')
+    old = sid(client)
+    client.get('/clear')
+    assert store.get(old) is None
+    assert sid(client) is None
+
+
+def test_unknown_or_malformed_ids_are_ignored(client):
+    client.set_cookie('session', 'x' * 43)
+    assert client.get('/get').text == ''
+    client.set_cookie('session', '../../etc/passwd')
+    assert client.get('/get').text == ''
+
+
+def test_store_from_url(tmp_path):
+    assert store_from_url('cookie') is None
+    assert isinstance(store_from_url('sqlite:///' + str(tmp_path / 's.db')), SQLiteSessionStore)
+    assert isinstance(store_from_url('file://' + str(tmp_path / 'files')), FileSessionStore)
+    with pytest.raises(ValueError):
+        store_from_url('memcached://localhost')
@@ -0,0 +1,61 @@
+"""
+Per-process cache of logged-in users.
+
+Flask-Login calls the user loader on every request that carries a session, so
+without a cache each authenticated page pays for a users-table query. Entries
+here are keyed by user id and live for `ttl` seconds. The least recently used
+entry is dropped once `max_size` is reached.
+
+Each entry stores the user's `session_version` next to the cached object. A
+lookup names the version it expects (the stamp kept in the caller's session), so
+a session that has seen a newer version never gets an older cached copy.
+Changes made in another process reach this one's other sessions within `ttl`.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Thread-safe TTL + LRU map of user id -> (version, object)"""
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()   # id -> (expires, version, value)
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        """The cached value for `user_id` at `version`, or None on a miss"""
+        if not self.ttl or version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, cached_version, value = entry
+            if expires <= time.monotonic() or cached_version != version:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return value
+
+    def put(self, user_id, version, value):
+        if not self.ttl or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, version, value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)